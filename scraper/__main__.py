@@ -0,0 +1,10 @@
+"""python -m scraper（在 repo 根目錄執行），見 cli.py"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cli import main  # noqa: E402
+
+main()
@@ -20,6 +20,8 @@ import urllib.request
 import urllib.parse
 from pathlib import Path
 import logging
+from countries import bounds
+import profiling
 
 logging.basicConfig(
     level=logging.INFO,
@@ -54,13 +56,21 @@ def save_cache(cache: dict):
 
 # ── Nominatim 查詢 ────────────────────────────────────────────
 
-def nominatim_search(query: str) -> tuple[float, float] | None:
-    """單次 Nominatim 查詢，回傳 (lat, lon) 或 None"""
+def nominatim_search(query: str, country: str | None = None) -> tuple[float, float] | None:
+    """
+    單次 Nominatim 查詢，回傳 (lat, lon) 或 None
+    country: 國名，以該國範圍作為 viewbox bias（bounded=0，不會排除範圍外結果）
+    """
     try:
-        params = urllib.parse.urlencode({
+        query_params = {
             'q': query, 'format': 'json',
             'limit': 3, 'addressdetails': 1
-        })
+        }
+        bbox = bounds(country)
+        if bbox:
+            south, west, north, east = bbox
+            query_params['viewbox'] = f'{west},{north},{east},{south}'
+        params = urllib.parse.urlencode(query_params)
         url = f'https://nominatim.openstreetmap.org/search?{params}'
         req = urllib.request.Request(url, headers={'User-Agent': 'NTU-ExchangeSchoolMapper/2.0'})
         with urllib.request.urlopen(req, timeout=10) as resp:
@@ -107,7 +117,7 @@ def get_coordinates(name_en: str, name_zh: str, country: str) -> tuple[float, fl
     unique_queries = [q for q in queries if not (q in seen or seen.add(q))]
 
     for q in unique_queries:
-        result = nominatim_search(q)
+        result = nominatim_search(q, country=country)
         if result:
             return result
         time.sleep(DELAY)
@@ -158,13 +168,14 @@ def main():
             school['latitude']  = lat
             school['longitude'] = lon
             cache_hit += 1
-            logger.debug(f'  [快取] {name_zh} → {lat:.4f}, {lon:.4f}')
+            logger.debug(f'  [快取] {name_zh} → {lat}, {lon}')
             continue
 
         # 查 API
         queried += 1
         logger.info(f'[{idx}/{total}] {name_zh} ({country})')
-        result = get_coordinates(name_en, name_zh, country)
+        with profiling.stage('geocode'):
+            result = get_coordinates(name_en, name_zh, country)
 
         if result:
             lat, lon = result
@@ -187,9 +198,10 @@ def main():
         time.sleep(DELAY)
 
     # 最後存檔
-    save_cache(cache)
-    with open(INPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(schools, f, ensure_ascii=False, indent=2)
+    with profiling.stage('write'):
+        save_cache(cache)
+        with open(INPUT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(schools, f, ensure_ascii=False, indent=2)
 
     logger.info('=' * 55)
     logger.info(f'完成！API 查詢 {queried} 次（快取命中 {cache_hit} 次）')
@@ -201,4 +213,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
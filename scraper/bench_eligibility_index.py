@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+申請資格查詢效能測試：逐筆掃 JSON（線性過濾）vs EligibilityIndex（bitset 交集）
+
+以 raw_schools_v2.json 為樣本，可用 --scale 複製成更多學校；
+隨機產生學生條件，兩種做法的結果必須完全一致。
+
+用法:
+  python bench_eligibility_index.py
+  python bench_eligibility_index.py --scale 100 --queries 2000
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from countries import to_region
+from fetch_schools_v2 import _extract_common_fields
+from eligibility_index import (
+    CEFR_LEVELS, GEPT_LEVELS, JLPT_LEVELS, EligibilityIndex, parse_grade_cells, _parse_student_grade,
+)
+
+BASE_DIR = Path(__file__).parent
+
+
+# ── 線性過濾（與索引相同的判定規則）───────────────────────────
+
+def linear_filter(schools, gpa=None, toefl=None, ielts=None, toeic=None, gept=None, cefr=None,
+                  jlpt=None, grade=None, regions=None, has_failed_courses=False):
+    student_grade = _parse_student_grade(grade) if grade else None
+    student = {
+        'toefl_ibt': toefl, 'ielts': ielts, 'toeic': toeic,
+        'gept': GEPT_LEVELS.get(gept) if gept else None,
+        'language_cefr': CEFR_LEVELS.get(cefr) if cefr else None,
+        'jlpt': JLPT_LEVELS.get(jlpt) if jlpt else None,
+    }
+    scales = {'gept': GEPT_LEVELS, 'language_cefr': CEFR_LEVELS, 'jlpt': JLPT_LEVELS}
+    check_language = any(v is not None for v in student.values())
+
+    result = []
+    for s in schools:
+        if gpa is not None and s.get('gpa_min') is not None and s['gpa_min'] > gpa:
+            continue
+        if check_language:
+            required = {f: s.get(f) for f in student if s.get(f) is not None}
+            if required:
+                ok = False
+                for field, need in required.items():
+                    need = scales[field].get(need) if field in scales else need
+                    if need is not None and student[field] is not None and student[field] >= need:
+                        ok = True
+                        break
+                if not ok:
+                    continue
+        if student_grade:
+            cells = parse_grade_cells(s.get('grade_requirement'))
+            if cells is not None and student_grade not in cells:
+                continue
+        if has_failed_courses and s.get('no_fail_required'):
+            continue
+        if regions and to_region(s.get('country')) not in regions:
+            continue
+        result.append(str(s['id']))
+    return result
+
+
+# ── 測試資料 ─────────────────────────────────────────────────
+
+def load_schools(scale: int) -> list[dict]:
+    with open(BASE_DIR / 'raw_schools_v2.json', encoding='utf-8') as f:
+        samples = json.load(f)
+    # 舊版 JSON 缺少 grade_requirement 等欄位，由 sections 重新萃取
+    for s in samples:
+        s.update(_extract_common_fields(s['sections']))
+    schools = []
+    for copy in range(scale):
+        for s in samples:
+            schools.append({**s, 'id': f"{s['id']}-{copy}" if scale > 1 else s['id']})
+    return schools
+
+
+def random_queries(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        q = {'gpa': round(rng.uniform(2.5, 4.3), 2)}
+        if rng.random() < 0.6:
+            q['toefl'] = rng.randint(60, 110)
+        if rng.random() < 0.4:
+            q['ielts'] = rng.choice([5.5, 6.0, 6.5, 7.0, 7.5])
+        if rng.random() < 0.2:
+            q['gept'] = rng.choice(list(GEPT_LEVELS))
+        if rng.random() < 0.2:
+            q['jlpt'] = rng.choice(list(JLPT_LEVELS))
+        if rng.random() < 0.2:
+            q['cefr'] = rng.choice(list(CEFR_LEVELS))
+        if rng.random() < 0.5:
+            q['grade'] = rng.choice(['大二', '大三', '大四', '碩一', '博一'])
+        if rng.random() < 0.3:
+            q['regions'] = [rng.choice(['歐洲', '亞洲', '北美洲', '大洋洲'])]
+        q['has_failed_courses'] = rng.random() < 0.2
+        queries.append(q)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='申請資格查詢效能測試')
+    parser.add_argument('--scale', type=int, default=1, help='學校資料複製倍數')
+    parser.add_argument('--queries', type=int, default=1000, help='查詢次數')
+    args = parser.parse_args()
+
+    schools = load_schools(args.scale)
+    queries = random_queries(args.queries)
+
+    start = time.perf_counter()
+    index = EligibilityIndex.build(schools)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear_results = [linear_filter(schools, **q) for q in queries]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index_results = [index.query(**q) for q in queries]
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for q in queries:
+        index.query_bits(**q)
+    bits_time = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(linear_results, index_results))
+    size_kb = len(json.dumps(index.to_json(), separators=(',', ':')).encode()) / 1024
+
+    print(f'學校數: {len(schools):,}  查詢數: {len(queries):,}  索引大小: {size_kb:.1f} KB')
+    print('-' * 60)
+    print(f'{"建立索引":<28} {build_time * 1000:>10.1f} ms')
+    print(f'{"線性過濾 (JSON)":<28} {linear_time / len(queries) * 1e6:>10.1f} µs/query')
+    print(f'{"索引查詢 (含轉 id)":<28} {index_time / len(queries) * 1e6:>10.1f} µs/query')
+    print(f'{"索引查詢 (只算 bitset)":<28} {bits_time / len(queries) * 1e6:>10.1f} µs/query')
+    print('-' * 60)
+    print(f'結果不一致: {mismatches} / {len(queries)}')
+
+
+if __name__ == '__main__':
+    main()
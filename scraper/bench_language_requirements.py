@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+語言檢定解析效能測試：各欄位各自 re.search（舊版）vs language_requirements 單次掃描（新版）
+
+  fetch_schools_v2   TOEFL / IELTS / TOEIC / 全民英檢 / CEFR / JLPT 各一個 pattern，只取第一個
+  clean_data         parse_language_requirement 每種測驗依序試多個 pattern（TOEFL / IELTS / TOEIC 各呼叫一次）
+  新版               language_requirements.parse 一次掃描，依組別、擇一條件回傳所有要求
+
+樣本為所有學期的申請資格（見 bench_text_normalizer.eligibility_texts），可用 --scale 複製。
+舊版與新版的第一個值必須一致。
+
+用法:
+  python bench_language_requirements.py
+  python bench_language_requirements.py --scale 20 --rounds 5
+"""
+
+import argparse
+import re
+import time
+
+from bench_text_normalizer import eligibility_texts
+from language_requirements import parse, parse_text
+from text_normalizer import normalize
+
+TESTS = ('toefl_ibt', 'ielts', 'toeic', 'gept', 'language_cefr', 'jlpt')
+
+
+# ── 舊版實作，僅供比較 ───────────────────────────────────────
+
+def legacy_v2_fields(text: str) -> dict:
+    """fetch_schools_v2 原本的寫法（正規化後的文字，每個欄位一個 pattern）"""
+    fields = {}
+    m = re.search(r'TOEFL iBT ?:? ?(\d+)', text)
+    fields['toefl_ibt'] = int(m.group(1)) if m else None
+    m = re.search(r'IELTS ?:? ?(\d+\.?\d*)', text)
+    fields['ielts'] = float(m.group(1)) if m else None
+    m = re.search(r'TOEIC ?:? ?(\d+)', text)
+    fields['toeic'] = int(m.group(1)) if m else None
+    m = re.search(r'全民英檢 ?(初級|中級(?!以下)|中高級|高級|優級)', text)
+    fields['gept'] = m.group(1) if m else None
+    m = (re.search(r'(?:法語|德語|西班牙語?|葡萄牙語|韓語|日語|中文) ?(?:檢定|能力|CEFR)? ?(?:成績 ?)?([ABC]\d)', text)
+         or re.search(r'CEFR ([ABC]\d)', text))
+    fields['language_cefr'] = m.group(1) if m else None
+    m = re.search(r'JLPT ?(?:成績 ?)?(?:[Nn](\d)|(\d) ?級)', text)
+    fields['jlpt'] = f'N{m.group(1) or m.group(2)}' if m else None
+    return fields
+
+
+_LEGACY_CLEAN = {
+    'toefl': ([r'TOEFL\s*iBT\s*[:：]?\s*(\d+)', r'TOEFL\s*[:：]?\s*(\d+)', r'托福\s*[:：]?\s*(\d+)'], 120),
+    'ielts': ([r'IELTS\s*[:：]?\s*(\d+\.?\d*)'], 9),
+    'toeic': ([r'TOEIC\s*[:：]?\s*(\d+)', r'多益\s*[:：]?\s*(\d+)'], 990),
+}
+
+
+def legacy_clean_data(text: str, test_type: str):
+    """clean_data.parse_language_requirement 原本的寫法（原始文字，依序試每個 pattern）"""
+    patterns, max_score = _LEGACY_CLEAN[test_type]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            score = float(match.group(1))
+            if 0 <= score <= max_score:
+                return int(score) if test_type != 'ielts' else score
+    return None
+
+
+# ── 量測 ─────────────────────────────────────────────────────
+
+def best_of(fn, rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='語言檢定解析效能測試')
+    parser.add_argument('--scale', type=int, default=1, help='文字複製倍數')
+    parser.add_argument('--rounds', type=int, default=5, help='重複次數（取最快）')
+    args = parser.parse_args()
+
+    raw = eligibility_texts() * args.scale
+    texts = [normalize(t) for t in raw]
+    n = len(texts)
+    size_mb = sum(len(t.encode('utf-8')) for t in texts) / 1024 / 1024
+
+    # ── 結果比對 ────────────────────────────────────────
+    legacy = [legacy_v2_fields(t) for t in texts]
+    parsed = [parse(t) for t in texts]
+    v2_mismatches = sum(any(p.first(k) != l[k] for k in TESTS) for p, l in zip(parsed, legacy))
+    clean_mismatches = 0
+    for t in raw:
+        requirements = parse(normalize(t)).items
+        for test_type, tests in (('toefl', ('toefl_ibt', 'toefl')), ('ielts', ('ielts',)), ('toeic', ('toeic',))):
+            new = next((r.value for r in requirements if r.test in tests), None)
+            clean_mismatches += new != legacy_clean_data(t, test_type)
+
+    # ── 速度（v2 與 parse 不含正規化；clean_data 用原始文字）──
+    v2_time = best_of(lambda: [legacy_v2_fields(t) for t in texts], args.rounds)
+    clean_time = best_of(lambda: [legacy_clean_data(t, k) for t in raw for k in _LEGACY_CLEAN], args.rounds)
+    parse_time = best_of(lambda: [parse(t) for t in texts], args.rounds)
+    def clean_data_new():
+        """clean_data 新版的用法：每段原始文字查 TOEFL / IELTS / TOEIC，第一次正規化 + 解析，其餘命中快取"""
+        parse_text.cache_clear()     # 每輪從空快取開始，否則後幾輪只量到查表
+        for t in raw:
+            for _ in _LEGACY_CLEAN:
+                parse_text(t).items
+    cached_time = best_of(clean_data_new, args.rounds)
+
+    total = sum(len(p.items) for p in parsed)
+    multi = sum(len({r.test for r in p.items}) < len(p.items) for p in parsed)
+    grouped = sum(len(p.groups) > 1 for p in parsed)
+    either = sum(any(len(c) > 1 for clauses in p.groups.values() for c in clauses) for p in parsed)
+
+    print(f'申請資格文字: {n:,} 段（{size_mb:.2f} MB）')
+    print('-' * 72)
+    for label, seconds in [
+        ('舊版 v2（6 個 search，只取第一個）', v2_time),
+        ('舊版 clean_data（3 種 × 多 pattern）', clean_time),
+        ('新版 parse（全部要求）', parse_time),
+        ('新版 clean_data（含正規化，× 3 種）', cached_time),
+    ]:
+        print(f'{label:<34} {n / seconds:>10,.0f} 段/s {size_mb / seconds:>8.1f} MB/s')
+    print('-' * 72)
+    print(f'要求總數: {total:,}（同一項檢定出現多次的文字 {multi}，舊版只取第一個）')
+    print(f'多個組別的文字: {grouped}，含擇一條件的文字: {either}')
+    print(f'與舊版 v2 第一個值不一致: {v2_mismatches} / {n}')
+    print(f'與舊版 clean_data 不一致: {clean_mismatches} / {len(raw) * 3}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+記錄型別效能測試：json.load 出來的 dict（舊版）vs records.py 的 __slots__ dataclass（新版）
+
+  記憶體   每 10,000 筆（學校 / 心得）常駐的大小（tracemalloc，含字串）
+  萃取     _extract_common_fields：舊 sections dict（每次判斷 dict / list）vs Sections
+  互轉     School.from_dict(...).to_dict() 必須與原 JSON 完全相同
+
+學校以 raw_schools_v2.json 為樣本，可用 --scale 複製；心得沒有樣本檔，依 fetch_experiences.py 的欄位合成。
+
+用法:
+  python bench_records.py
+  python bench_records.py --scale 100 --rounds 5
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+from fetch_schools_v2 import _extract_common_fields
+from records import ExperienceEntry, School, Sections
+from text_normalizer import normalize
+
+BASE_DIR = Path(__file__).parent
+PER = 10_000
+
+
+# ── 舊版實作（sections dict），僅供比較 ─────────────────────
+
+def legacy_section_text(sections, label):
+    val = sections.get(label, {})
+    if isinstance(val, dict):
+        return val.get('text', '')
+    if isinstance(val, list):
+        return val[0].get('text', '') if val else ''
+    return ''
+
+
+class _LegacySections:
+    """以舊的 dict 查詢方式提供 text() / normalized() 與 in，_extract_common_fields 其餘部分相同"""
+
+    __slots__ = ('sections',)
+
+    def __init__(self, sections: dict):
+        self.sections = sections
+
+    def text(self, label):
+        return legacy_section_text(self.sections, label)
+
+    def normalized(self, label):
+        return normalize(legacy_section_text(self.sections, label))
+
+    def __contains__(self, label):
+        return label in self.sections
+
+
+# ── 測試資料 ─────────────────────────────────────────────────
+
+def school_json(scale: int) -> str:
+    with open(BASE_DIR / 'raw_schools_v2.json', encoding='utf-8') as f:
+        samples = json.load(f)
+    schools = []
+    for copy in range(scale):
+        for s in samples:
+            schools.append({**s, 'id': f"{s['id']}-{copy}" if scale > 1 else s['id']})
+    return json.dumps(schools, ensure_ascii=False)
+
+
+def experience_json(n: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    colleges = ['工學院', '管理學院', '文學院', '電機資訊學院', '社會科學院', '理學院']
+    countries = ['日本', '美國', '德國', '法國', '韓國', '荷蘭', '英國', '瑞典']
+    entries = []
+    for i in range(n):
+        entry = {
+            'year_info': f'{rng.randint(105, 113)}學年度 第{rng.randint(1, 2)}學期',
+            'country': rng.choice(countries),
+            'school': f'交換學校 {rng.randint(1, 400)}',
+            'college': rng.choice(colleges),
+            'department': f'{rng.choice(["資訊", "電機", "經濟", "外文", "化工"])}學系',
+            'degree': rng.choice(['學士', '碩士']),
+            'name': f'學生{i}',
+            'detail_url': f'https://oia.ntu.edu.tw/outgoing/report.view/id.{100000 + i}',
+        }
+        if rng.random() < 0.95:   # 少數詳細頁抓取失敗，沒有連結欄位
+            entry['pdf_links'] = [
+                {'url': f'https://oia.ntu.edu.tw/upload/report/{i}-{k}.pdf', 'text': f'心得報告{k + 1}.pdf'}
+                for k in range(rng.randint(1, 2))
+            ]
+            entry['image_links'] = [
+                {'url': f'https://oia.ntu.edu.tw/upload/report/{i}-{k}.jpg', 'alt': ''}
+                for k in range(rng.randint(0, 6))
+            ]
+        entries.append(entry)
+    return json.dumps(entries, ensure_ascii=False)
+
+
+# ── 量測 ─────────────────────────────────────────────────────
+
+def retained_bytes(text: str, convert=None) -> tuple[int, int]:
+    """載入（並轉換）後仍常駐的記憶體；回傳 (bytes, 筆數)"""
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(text)
+    if convert:
+        data = [convert(d) for d in data]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(data)
+
+
+def best_of(fn, rounds: int, setup=None) -> float:
+    """setup 每輪重建輸入（不計時），避免 Section 的正規化快取讓後面幾輪變快"""
+    times = []
+    for _ in range(rounds):
+        data = setup() if setup else None
+        start = time.perf_counter()
+        fn(data) if setup else fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='記錄型別效能測試')
+    parser.add_argument('--scale', type=int, default=35, help='學校資料複製倍數（預設約 10,000 筆）')
+    parser.add_argument('--experiences', type=int, default=PER, help='合成心得筆數')
+    parser.add_argument('--rounds', type=int, default=3, help='萃取測試重複次數（取最快）')
+    args = parser.parse_args()
+
+    schools_text = school_json(args.scale)
+    experiences_text = experience_json(args.experiences)
+
+    # ── 互轉 ────────────────────────────────────────────
+    raw = json.loads(schools_text)
+    start = time.perf_counter()
+    schools = [School.from_dict(d) for d in raw]
+    from_time = time.perf_counter() - start
+    start = time.perf_counter()
+    round_trip = [s.to_dict() for s in schools]
+    to_time = time.perf_counter() - start
+    school_mismatches = sum(a != b for a, b in zip(round_trip, raw))
+    raw_exp = json.loads(experiences_text)
+    exp_mismatches = sum(ExperienceEntry.from_dict(d).to_dict() != d for d in raw_exp)
+
+    # ── 記憶體 ──────────────────────────────────────────
+    memory = []
+    for label, text, convert in [
+        ('學校 dict', schools_text, None),
+        ('學校 School', schools_text, School.from_dict),
+        ('心得 dict', experiences_text, None),
+        ('心得 ExperienceEntry', experiences_text, ExperienceEntry.from_dict),
+    ]:
+        size, n = retained_bytes(text, convert)
+        memory.append((label, size / n * PER / 1024 / 1024))
+
+    # ── 萃取 ────────────────────────────────────────────
+    legacy = [_LegacySections(d['sections']) for d in raw]
+    canonical = [s.sections for s in schools]
+    legacy_dicts = [d['sections'] for d in raw]
+
+    def fresh_sections():
+        return [Sections.from_json(d['sections_ordered']) for d in raw]
+
+    extract_all = lambda sections: [_extract_common_fields(s) for s in sections]
+    legacy_time = best_of(extract_all, args.rounds, setup=lambda: legacy)
+    legacy_result = extract_all(legacy)
+    records_time = best_of(extract_all, args.rounds, setup=fresh_sections)
+    coerce_time = best_of(extract_all, args.rounds, setup=lambda: legacy_dicts)
+    extract_mismatches = sum(a != b for a, b in zip(legacy_result, extract_all(canonical)))
+
+    labels = ['申請資格', '名額', '學校年曆', '注意事項', '住宿資訊', '此校開放予第二次出國交換之同學選填']
+    lookup_legacy = best_of(lambda: [legacy_section_text(d, l) for d in legacy_dicts for l in labels], args.rounds)
+    lookup_records = best_of(lambda: [s.text(l) for s in canonical for l in labels], args.rounds)
+
+    n = len(schools)
+    print(f'學校數: {n:,}  心得數: {len(raw_exp):,}')
+    print('-' * 60)
+    for label, mb in memory:
+        print(f'{label:<24} {mb:>10.2f} MB / 10k 筆')
+    print('-' * 60)
+    print(f'{"萃取 (sections dict)":<24} {legacy_time / n * 1e6:>10.1f} µs/校')
+    print(f'{"萃取 (Sections)":<24} {records_time / n * 1e6:>10.1f} µs/校')
+    print(f'{"萃取 (dict → Sections)":<24} {coerce_time / n * 1e6:>10.1f} µs/校')
+    print(f'{"查 section (dict)":<24} {lookup_legacy / n / len(labels) * 1e9:>10.0f} ns/次')
+    print(f'{"查 section (Sections)":<24} {lookup_records / n / len(labels) * 1e9:>10.0f} ns/次')
+    print(f'{"from_dict":<24} {from_time / n * 1e6:>10.1f} µs/校')
+    print(f'{"to_dict":<24} {to_time / n * 1e6:>10.1f} µs/校')
+    print('-' * 60)
+    print(f'互轉不一致: 學校 {school_mismatches} / {n}，心得 {exp_mismatches} / {len(raw_exp)}')
+    print(f'萃取結果不一致: {extract_mismatches} / {n}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+爬蟲解析 / 萃取 / 清理各階段的效能測試（離線，只用 repo 內的 fixture）
+
+階段與輸入:
+  extract_school_links       page_source.html（列表頁，fetch_schools.parse_school_list）
+  extract_school_links_v2    page_source.html 載入 Playwright 頁面（需已安裝 chromium，否則略過）
+  extract_common_fields      raw_schools_v2.json 每間學校的 sections
+  english_names              raw_schools.json 的 text_content
+  standardize_colleges       school_map.csv「不接受申請之學院」+ raw_schools_v2.json eligibility_text
+  parse_language_requirement school_map.csv「語言要求」+ eligibility_text，TOEFL / IELTS / TOEIC 各解析一次
+
+每個階段先以 timeit 自動決定迴圈次數（每輪至少 0.2 秒），取 --repeat 輪中最快的一輪換算 items/s；
+每輪同時量一段固定的校正工作，階段 / 校正的耗時比（relative_cost）用於和基準比較，
+換機器或機器忙碌時仍可比較。記憶體為單次執行時 tracemalloc 的峰值。
+
+與 bench_baseline.json 比較：throughput 下降或記憶體峰值增加超過 --threshold 即回傳 exit code 1。
+確認變更後以 --save-baseline 更新基準。
+
+用法:
+  python bench_suite.py                          # 執行並與基準比較
+  python bench_suite.py --stages extract_common_fields parse_language_requirement
+  python bench_suite.py --save-baseline          # 寫入 bench_baseline.json
+  python bench_suite.py --threshold 0.1
+"""
+
+import argparse
+import csv
+import json
+import logging
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+BASE_DIR = Path(__file__).parent
+BASELINE_FILE = BASE_DIR / 'bench_baseline.json'
+# 記憶體峰值低於此值時不判定退步（避免小型階段的雜訊）
+MEMORY_SLACK_KB = 64
+
+
+def _load_json(name):
+    with open(BASE_DIR / name, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _school_map_column(column: str) -> list[str]:
+    with open(BASE_DIR / 'school_map.csv', encoding='utf-8') as f:
+        return [row[column] for row in csv.DictReader(f) if row.get(column)]
+
+
+# ── 各階段：回傳 (要計時的函式, 處理筆數, 結束時呼叫的清理函式) ──────────
+
+def stage_extract_school_links():
+    from fetch_schools import logger, parse_school_list
+    logger.setLevel(logging.WARNING)
+    html = (BASE_DIR / 'page_source.html').read_text(encoding='utf-8')
+    return (lambda: parse_school_list(html)), len(parse_school_list(html)), None
+
+
+def stage_extract_school_links_v2():
+    from playwright.sync_api import sync_playwright
+    import browser_service
+    import fetch_schools_v2
+    fetch_schools_v2.logger.setLevel(logging.WARNING)
+    html = (BASE_DIR / 'page_source.html').read_text(encoding='utf-8')
+
+    playwright = sync_playwright().start()
+    try:
+        browser = browser_service.launch(playwright)
+    except Exception:
+        playwright.stop()
+        raise
+    page = browser.new_page()
+    page.set_content(html)
+
+    def run():
+        # extract_school_links 等待頁面 JS 的 2 秒與解析無關，不計入
+        with mock.patch.object(fetch_schools_v2.time, 'sleep'):
+            return fetch_schools_v2.extract_school_links(page)
+
+    def cleanup():
+        browser.close()
+        playwright.stop()
+
+    return run, len(run()), cleanup
+
+
+def stage_extract_common_fields():
+    from fetch_schools_v2 import _extract_common_fields
+    from records import Sections
+    # 與爬蟲相同，輸入為 Sections；每輪重建（含轉換），正規化結果不會沿用上一輪的快取
+    ordered = [s['sections_ordered'] for s in _load_json('raw_schools_v2.json') if s.get('sections_ordered')]
+    return (lambda: [_extract_common_fields(Sections.from_json(s)) for s in ordered]), len(ordered), None
+
+
+def stage_english_names():
+    from english_names import name_map
+    raw = _load_json('raw_schools.json')
+    return (lambda: name_map(raw)), len(raw), None
+
+
+def _eligibility_texts():
+    texts = [s.get('eligibility_text') or '' for s in _load_json('raw_schools_v2.json')]
+    return [t for t in texts if t]
+
+
+def stage_standardize_colleges():
+    from clean_data import logger, standardize_colleges
+    logger.setLevel(logging.WARNING)
+    texts = _school_map_column('不接受申請之學院') + _eligibility_texts()
+    return (lambda: [standardize_colleges(t) for t in texts]), len(texts), None
+
+
+def stage_parse_language_requirement():
+    from clean_data import logger, parse_language_requirement
+    from language_requirements import parse_text
+    logger.setLevel(logging.WARNING)
+    texts = _school_map_column('語言要求') + _eligibility_texts()
+    tests = ('toefl', 'ielts', 'toeic')
+
+    def run():
+        parse_text.cache_clear()   # 每輪從空快取開始，否則第一輪之後只量到查表
+        return [parse_language_requirement(t, k) for t in texts for k in tests]
+    return run, len(texts), None
+
+
+STAGES = {
+    'extract_school_links': stage_extract_school_links,
+    'extract_school_links_v2': stage_extract_school_links_v2,
+    'extract_common_fields': stage_extract_common_fields,
+    'english_names': stage_english_names,
+    'standardize_colleges': stage_standardize_colleges,
+    'parse_language_requirement': stage_parse_language_requirement,
+}
+
+
+# ── 量測 ─────────────────────────────────────────────────────
+
+def _calibration_workload():
+    # 與各階段相近的純 Python 工作（regex、dict、字串），用來估計機器當下的速度
+    import re
+    pattern = re.compile(r'(\d+)\s*名')
+    counts = {}
+    for i in range(2000):
+        text = f'第{i}校 全學年{i % 7}名 GPA 3.{i % 10}'
+        m = pattern.search(text)
+        counts[m.group(1)] = counts.get(m.group(1), 0) + len(text.split())
+    return counts
+
+
+def measure(fn, items: int, repeat: int) -> dict:
+    """
+    每輪先跑一次校正工作、再跑一次階段，記錄兩者耗時比（relative_cost）；
+    共用一顆 CPU 的機器上速度忽快忽慢，比值比絕對耗時穩定得多，退步判定以它為準
+    """
+    calibration = timeit.Timer(_calibration_workload)
+    calibration_loops, _ = calibration.autorange()
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+
+    times, ratios = [], []
+    for _ in range(repeat):
+        c = calibration.timeit(calibration_loops) / calibration_loops
+        t = timer.timeit(loops) / loops
+        times.append(t)
+        ratios.append(t / c)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'items': items,
+        'seconds': best,
+        'items_per_sec': items / best,
+        'relative_cost': statistics.median(ratios),
+        'peak_kb': peak / 1024,
+    }
+
+
+def run_stages(names: list[str], repeat: int) -> dict[str, dict]:
+    results = {}
+    for name in names:
+        try:
+            fn, items, cleanup = STAGES[name]()
+        except Exception as e:
+            print(f'{name:<28} 略過（{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ""}）')
+            continue
+        try:
+            results[name] = measure(fn, items, repeat)
+        finally:
+            if cleanup:
+                cleanup()
+        r = results[name]
+        print(f'{name:<28} {r["items"]:>6} 筆 {r["seconds"] * 1000:>10.2f} ms '
+              f'{r["items_per_sec"]:>12,.0f} items/s {r["peak_kb"]:>10,.0f} KB')
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """
+    回傳退步的階段說明（空 list 表示沒有退步）
+    throughput 以 relative_cost 換算（相對校正工作的速度），不受機器當下負載影響
+    """
+    regressions = []
+    print('-' * 78)
+    print(f'{"與基準比較":<26} {"throughput":>14} {"memory":>14}')
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f'{name:<28} {"(無基準)":>14}')
+            continue
+        speed = base['relative_cost'] / r['relative_cost'] - 1
+        memory = r['peak_kb'] / base['peak_kb'] - 1 if base['peak_kb'] else 0.0
+        slow = speed < -threshold
+        heavy = memory > threshold and r['peak_kb'] - base['peak_kb'] > MEMORY_SLACK_KB
+        flag = '  ✗' if slow or heavy else '  ✓'
+        print(f'{name:<28} {speed:>+13.1%} {memory:>+13.1%}{flag}')
+        if slow:
+            regressions.append(f'{name}: throughput {speed:+.1%}')
+        if heavy:
+            regressions.append(f'{name}: memory {memory:+.1%}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬蟲各階段效能測試')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=7, help='每個階段量測輪數（取最快）')
+    parser.add_argument('--threshold', type=float, default=0.25, help='允許的退步比例（0.25 = 25%%）')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='基準檔')
+    parser.add_argument('--save-baseline', action='store_true', help='把這次結果寫入基準檔')
+    args = parser.parse_args()
+
+    print(f'Python {platform.python_version()}  {platform.machine()}  repeat={args.repeat}')
+    print('-' * 78)
+    results = run_stages(args.stages, args.repeat)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        stored = {}
+        if baseline_path.exists():
+            with open(baseline_path, encoding='utf-8') as f:
+                stored = json.load(f).get('stages', {})
+        stored.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'stages': stored,
+            }, f, ensure_ascii=False, indent=2)
+        print(f'基準已寫入: {baseline_path}')
+        return
+
+    if not baseline_path.exists():
+        print(f'找不到基準檔 {baseline_path}，以 --save-baseline 建立')
+        return
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['stages']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print('-' * 78)
+        print(f'✗ 超過 {args.threshold:.0%} 的退步:')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    print(f'✓ 沒有超過 {args.threshold:.0%} 的退步')
+
+
+if __name__ == '__main__':
+    main()
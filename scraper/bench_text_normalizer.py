@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+文字正規化效能 / 命中率測試：原始文字 + 寬鬆 regex（舊版）vs 正規化後的文字 + 標準寫法 regex（新版）
+
+樣本為所有學期的申請資格（raw_schools_v2*.json 的 sections、raw_schools.json 的 text_content）；
+另外把每段文字改寫成常見變體（全形英數、全形空白、多益 / 雅思、TOEFL-iBT、日檢）再測一次，
+新版在變體上的結果應與原文相同。
+
+用法:
+  python bench_text_normalizer.py
+  python bench_text_normalizer.py --rounds 10
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import fetch_schools_v2 as v2
+from language_requirements import parse as parse_language_requirements
+from records import Section
+from text_normalizer import normalize
+
+BASE_DIR = Path(__file__).parent
+FIELDS = ('gpa_min', 'toefl_ibt', 'ielts', 'toeic', 'gept', 'language_cefr', 'jlpt', 'grade_requirement')
+
+
+# ── 舊版實作（原始文字），僅供比較 ───────────────────────────
+
+def legacy_fields(text: str) -> dict:
+    fields = {}
+    m = re.search(r'GPA\s*[達到需]\s*(\d+\.?\d*)', text)
+    fields['gpa_min'] = float(m.group(1)) if m else None
+    m = re.search(r'TOEFL\s*iBT\s*(\d+)', text, re.IGNORECASE)
+    fields['toefl_ibt'] = int(m.group(1)) if m else None
+    m = re.search(r'IELTS\s*(\d+\.?\d*)', text, re.IGNORECASE)
+    fields['ielts'] = float(m.group(1)) if m else None
+    m = re.search(r'(?:TOEIC|多益)\s*[:：]?\s*(\d+)', text, re.IGNORECASE)
+    fields['toeic'] = int(m.group(1)) if m else None
+    m = re.search(r'全民英檢\s*(初級|中級(?!以下)|中高級|高級|優級)', text)
+    fields['gept'] = m.group(1) if m else None
+    m = re.search(
+        r'(?:法[語文]|德[語文]|西班牙[語文]?|葡萄牙[語文]|韓[語文]|日[語文]|中文)'
+        r'\s*(?:檢定|能力|CEFR)?\s*(?:成績\s*)?([ABC]\d)', text
+    ) or re.search(r'CEFR\s+([ABC]\d)', text)
+    fields['language_cefr'] = m.group(1) if m else None
+    m = re.search(r'(?:日語?(?:能力)?檢定|JLPT)\s*(?:成績\s*)?(?:N(\d)|(\d)\s*級)', text, re.IGNORECASE)
+    fields['jlpt'] = f'N{m.group(1) or m.group(2)}' if m else None
+    m = re.search(r'本校\s*([^\n。]+?)(?=\s*學生)', text)
+    fields['grade_requirement'] = re.sub(r'[\s，。；;,]+$', '', m.group(1).strip()) if m else None
+    return fields
+
+
+def normalized_fields(text: str) -> dict:
+    """fetch_schools_v2 的 pattern 與 language_requirements（正規化後的文字）"""
+    fields = {}
+    m = v2.GPA_PATTERN.search(text)
+    fields['gpa_min'] = float(m.group(1)) if m else None
+    requirements = parse_language_requirements(text)
+    for test in v2.LANGUAGE_TESTS:
+        fields[test] = requirements.first(test)
+    m = v2.GRADE_PATTERN.search(text)
+    fields['grade_requirement'] = m.group(1).strip().rstrip(' ,。;') if m else None
+    return fields
+
+
+# ── 測試資料 ─────────────────────────────────────────────────
+
+def eligibility_texts() -> list[str]:
+    texts = []
+    for path in sorted(BASE_DIR.glob('raw_schools_v2*.json')):
+        with open(path, encoding='utf-8') as f:
+            for school in json.load(f):
+                texts += [e['text'] for e in school.get('sections_ordered') or [] if e['label'] == '申請資格']
+    raw = BASE_DIR / 'raw_schools.json'
+    if raw.exists():
+        with open(raw, encoding='utf-8') as f:
+            texts += [s['text_content'] for s in json.load(f) if s.get('text_content')]
+    return [t for t in texts if t]
+
+
+_FULL_WIDTH = {c: c + 0xFEE0 for c in range(0x21, 0x7F)}
+_VARIANTS = [('TOEIC', '多益'), ('IELTS', '雅思'), ('TOEFL iBT', 'TOEFL-iBT'), ('日語檢定', '日檢'), (' ', '　')]
+
+
+def variant(text: str, i: int) -> str:
+    """常見的不同寫法；奇數筆再整段轉全形英數"""
+    for old, new in _VARIANTS:
+        text = text.replace(old, new)
+    return text.translate(_FULL_WIDTH) if i % 2 else text
+
+
+# ── 量測 ─────────────────────────────────────────────────────
+
+def best_of(fn, rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def hits(results: list[dict]) -> dict[str, int]:
+    return {f: sum(r[f] is not None for r in results) for f in FIELDS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文字正規化效能 / 命中率測試')
+    parser.add_argument('--rounds', type=int, default=5, help='重複次數（取最快）')
+    args = parser.parse_args()
+
+    texts = eligibility_texts()
+    variants = [variant(t, i) for i, t in enumerate(texts)]
+    n = len(texts)
+
+    # ── 命中率 ──────────────────────────────────────────
+    legacy = [legacy_fields(t) for t in texts]
+    legacy_variant = [legacy_fields(t) for t in variants]
+    new = [normalized_fields(normalize(t)) for t in texts]
+    new_variant = [normalized_fields(normalize(t)) for t in variants]
+
+    # ── 速度 ────────────────────────────────────────────
+    legacy_time = best_of(lambda: [legacy_fields(t) for t in texts], args.rounds)
+    normalize_time = best_of(lambda: [normalize(t) for t in texts], args.rounds)
+    cached = [Section('申請資格', t) for t in texts]
+    for s in cached:
+        s.normalized
+    warm_time = best_of(lambda: [normalized_fields(s.normalized) for s in cached], args.rounds)
+    cold_time = best_of(
+        lambda: [normalized_fields(s.normalized) for s in [Section('申請資格', t) for t in texts]], args.rounds
+    )
+
+    print(f'申請資格文字: {n:,} 段（{sum(map(len, texts)) / 1024:.0f} KB）')
+    print('-' * 72)
+    print(f'{"命中筆數":<18} {"舊版":>8} {"舊版(變體)":>12} {"新版":>8} {"新版(變體)":>12}')
+    h = [hits(r) for r in (legacy, legacy_variant, new, new_variant)]
+    for f in FIELDS:
+        print(f'{f:<18} {h[0][f]:>8} {h[1][f]:>12} {h[2][f]:>8} {h[3][f]:>12}')
+    print('-' * 72)
+    print(f'{"舊版 (原始文字)":<28} {legacy_time / n * 1e6:>10.1f} µs/段')
+    print(f'{"正規化":<28} {normalize_time / n * 1e6:>10.1f} µs/段')
+    print(f'{"新版 (含正規化)":<28} {cold_time / n * 1e6:>10.1f} µs/段')
+    print(f'{"新版 (已快取在 Section)":<28} {warm_time / n * 1e6:>10.1f} µs/段')
+    print('-' * 72)
+    print(f'新版與舊版不一致: {sum(a != b for a, b in zip(legacy, new))} / {n}')
+    print(f'新版變體與原文不一致: {sum(a != b for a, b in zip(new, new_variant))} / {n}')
+
+
+if __name__ == '__main__':
+    main()
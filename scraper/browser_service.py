@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+常駐瀏覽器：開一次 Chromium，讓各爬蟲直接連上去，省掉每次啟動瀏覽器的數秒
+
+  python browser_service.py serve            # 啟動並常駐（Ctrl-C 結束）
+  python browser_service.py status           # 檢查是否可連線
+
+serve 之後，fetch_schools.py / fetch_schools_v2.py / experiences/fetch_experiences.py
+以 browser_service.launch(p) 取得瀏覽器：
+  - 有常駐瀏覽器就連上（connect），沒有或連不上就照舊在本機 launch，不需要改指令
+  - 每個工作仍各自 new_context()，cookie / storage / 分頁互不影響；
+    結束時 browser.close() 對連上的瀏覽器只會關掉自己的 context 並斷線，不會關掉常駐瀏覽器
+
+連線位址:
+  SCRAPER_BROWSER_ENDPOINT=ws://... 或 http://...   指定位址（off 為停用，一律本機 launch）
+  未設定時讀 serve 寫出的 .browser_service.json
+
+Playwright 1.5x 以後以 Browser.bind 開 WebSocket 給其他 client connect（Python 沒有 launch_server）；
+舊版改用 Chromium 的 --remote-debugging-port，client 以 connect_over_cdp 連線。
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path(__file__).parent / '.browser_service.json'
+DEFAULT_PORT = 9333
+CONNECT_TIMEOUT_MS = 3000
+
+
+def endpoint() -> str | None:
+    """常駐瀏覽器的位址；沒有則回傳 None"""
+    env = os.environ.get('SCRAPER_BROWSER_ENDPOINT')
+    if env:
+        return None if env == 'off' else env
+    if STATE_FILE.exists():
+        try:
+            return json.loads(STATE_FILE.read_text(encoding='utf-8'))['endpoint']
+        except (ValueError, KeyError):
+            return None
+    return None
+
+
+def _connect(browser_type, url: str):
+    # http(s):// 為 --remote-debugging-port（CDP），ws:// 為 Browser.bind
+    if url.startswith('http'):
+        return browser_type.connect_over_cdp(url, timeout=CONNECT_TIMEOUT_MS)
+    return browser_type.connect(url, timeout=CONNECT_TIMEOUT_MS)
+
+
+def launch(playwright, **launch_kwargs):
+    """sync API：連上常駐瀏覽器，失敗則本機 launch(headless=True)"""
+    url = endpoint()
+    if url:
+        start = time.time()
+        try:
+            browser = _connect(playwright.chromium, url)
+            logger.info(f"使用常駐瀏覽器 {url}（{(time.time() - start) * 1000:.0f} ms）")
+            return browser
+        except Exception as e:
+            logger.warning(f"無法連線常駐瀏覽器 {url}，改為本機啟動: {str(e).splitlines()[0]}")
+    return playwright.chromium.launch(headless=True, **launch_kwargs)
+
+
+async def launch_async(playwright, **launch_kwargs):
+    """async API 版本的 launch()"""
+    url = endpoint()
+    if url:
+        start = time.time()
+        try:
+            browser = await _connect(playwright.chromium, url)
+            logger.info(f"使用常駐瀏覽器 {url}（{(time.time() - start) * 1000:.0f} ms）")
+            return browser
+        except Exception as e:
+            logger.warning(f"無法連線常駐瀏覽器 {url}，改為本機啟動: {str(e).splitlines()[0]}")
+    return await playwright.chromium.launch(headless=True, **launch_kwargs)
+
+
+# ── 常駐端 ───────────────────────────────────────────────────
+
+def serve(host: str, port: int):
+    from playwright.sync_api import Browser, sync_playwright
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    with sync_playwright() as p:
+        browser = None
+        try:
+            if hasattr(Browser, 'bind'):
+                browser = p.chromium.launch(headless=True)
+                url = browser.bind('ntu-exchange-scraper', host=host, port=port)['endpoint']
+            else:
+                browser = p.chromium.launch(headless=True, args=[
+                    f'--remote-debugging-address={host}', f'--remote-debugging-port={port}',
+                ])
+                url = f'http://{host}:{port}'
+
+            STATE_FILE.write_text(json.dumps({
+                'endpoint': url,
+                'pid': os.getpid(),
+                'version': browser.version,
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+            }, indent=2), encoding='utf-8')
+            logger.info("=" * 60)
+            logger.info(f"常駐瀏覽器 Chromium {browser.version}")
+            logger.info(f"位址: {url}（已寫入 {STATE_FILE.name}）")
+            logger.info("=" * 60)
+
+            while not stop.is_set() and browser.is_connected():
+                stop.wait(5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if STATE_FILE.exists() and json.loads(STATE_FILE.read_text(encoding='utf-8')).get('pid') == os.getpid():
+                STATE_FILE.unlink()
+            if browser:
+                browser.close()
+            logger.info("常駐瀏覽器已關閉")
+
+
+def status() -> bool:
+    url = endpoint()
+    if not url:
+        print("沒有常駐瀏覽器（python browser_service.py serve 啟動）")
+        return False
+    start = time.time()
+    if url.startswith('http'):
+        try:
+            with urllib.request.urlopen(f'{url}/json/version', timeout=2) as resp:
+                version = json.loads(resp.read())['Browser']
+        except OSError as e:
+            print(f"✗ {url} 無法連線: {e}")
+            return False
+    else:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            try:
+                browser = _connect(p.chromium, url)
+            except Exception as e:
+                print(f"✗ {url} 無法連線: {str(e).splitlines()[0]}")
+                return False
+            version = browser.version
+            browser.close()
+    print(f"✓ {url}  {version}（{(time.time() - start) * 1000:.0f} ms）")
+    return True
+
+
+def main():
+    # 各爬蟲 import 本模組時沿用它們自己的 logging 設定，只有直接執行時才設定
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='爬蟲共用的常駐瀏覽器')
+    sub = parser.add_subparsers(dest='command', required=True)
+    srv = sub.add_parser('serve', help='啟動常駐瀏覽器')
+    srv.add_argument('--host', default='127.0.0.1')
+    srv.add_argument('--port', type=int, default=DEFAULT_PORT)
+    sub.add_parser('status', help='檢查常駐瀏覽器')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port)
+    else:
+        sys.exit(0 if status() else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,24 @@
 """
 清理和標準化爬取的學校資料
 輸出為標準 CSV 格式
+
+流程（皆為欄位運算，不逐列 apply / iterrows）：
+  1. transform  - 學院（text_matcher 單次掃描）、地區（categorical map）、缺失值
+  2. geocode    - 只對 unique (name, city, country) 查座標，持久快取，再依 key join 回去
+  3. write      - 欄位排序後輸出 CSV，以及 Parquet / Arrow（見 columnar.py）
 """
 
 import json
+import numpy as np
 import pandas as pd
-import re
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from pathlib import Path
 import time
 import logging
+import profiling
+from columnar import write_columnar
+from countries import DEFAULT_REGION, REGIONS, bounds, resolve_series, to_region
+from text_matcher import ELIGIBILITY_MATCHER
+from language_requirements import parse_text as parse_requirements
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,114 +27,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 學院標準化對照表
-COLLEGE_MAPPING = {
-    '文學院': ['文學院', '中文系', '外文系', '歷史系', '哲學系', '人類學系', '圖資系', '日文系', '戲劇系', '語言學研究所'],
-    '理學院': ['理學院', '數學系', '物理系', '化學系', '地質系', '心理系', '地理系', '大氣系'],
-    '社會科學院': ['社會科學院', '政治系', '經濟系', '社會系', '社工系', '新聞所', '國發所'],
-    '醫學院': ['醫學院', '醫學系', '牙醫系', '藥學系','護理系', '醫技系', '物治系', '職治系'],
-    '工學院': ['工學院', '土木系', '機械系', '化工系', '材料系', '工海系', '醫工系', '應力所'],
-    '生農學院': ['生農學院', '農藝系', '生工系', '農化系', '森林系', '動科系', '農經系', '園藝系', '獸醫系', '生傳系', '生機系', '昆蟲系', '植微系'],
-    '管理學院': ['管理學院', '工管系', '會計系', '財金系', '國企系', '資管系', 'MBA', 'EMBA', 'GMBA'],
-    '公衛學院': ['公衛學院', '公衛系'],
-    '電資學院': ['電資學院', '電機系', '資工系', '光電所', '電信所', '電子所', '網媒所'],
-    '法律學院': ['法律學院', '法律系', '科法所'],
-    '生科學院': ['生科學院', '生化科技學系', '生命科學系'],
-}
-
-# 國家地區對照表
-REGION_MAPPING = {
-    '北美洲': ['美國', '加拿大', '墨西哥'],
-    '歐洲': [
-        '英國', '法國', '德國', '義大利', '西班牙', '荷蘭', '比利時', '瑞士', '奧地利',
-        '瑞典', '挪威', '丹麥', '芬蘭', '波蘭', '捷克', '匈牙利', '葡萄牙', '希臘',
-        '愛爾蘭', '冰島', '盧森堡', '愛沙尼亞', '拉脫維亞', '立陶宛', '斯洛伐克',
-        '斯洛維尼亞', '克羅埃西亞', '羅馬尼亞', '保加利亞', '塞爾維亞', '烏克蘭'
-    ],
-    '亞洲': [
-        '日本', '韓國', '中國', '香港', '新加坡', '泰國', '馬來西亞', '印尼', '菲律賓',
-        '越南', '印度', '以色列', '土耳其', '阿聯酋', '沙烏地阿拉伯', '台灣'
-    ],
-    '大洋洲': ['澳洲', '澳大利亞', '紐西蘭', '新西蘭', '斐濟'],
-    '南美洲': ['巴西', '阿根廷', '智利', '哥倫比亞', '秘魯', '委內瑞拉'],
-    '非洲': ['南非', '埃及', '肯亞', '奈及利亞', '摩洛哥']
-}
+GEOCODE_CACHE_FILE = Path(__file__).parent / 'clean_geocode_cache.json'
+GEOCODE_DELAY = 1   # 秒（Nominatim policy: max 1 req/sec），快取命中不等待
 
 def standardize_colleges(college_text):
-    """標準化學院欄位"""
+    """標準化學院欄位（學院 / 系所關鍵字由 text_matcher 一次掃描取得）"""
     if not college_text or pd.isna(college_text):
         return None
 
+    hits = ELIGIBILITY_MATCHER.find_all(college_text, ('college', 'department', 'restriction'))
+
     # 檢查是否為全校
-    if '全校' in college_text or '所有學院' in college_text:
+    if any(h.label == 'all_colleges' for h in hits):
         return '全校'
 
     # 提取學院名稱
-    matched_colleges = set()
-
-    for standard_college, keywords in COLLEGE_MAPPING.items():
-        for keyword in keywords:
-            if keyword in college_text:
-                matched_colleges.add(standard_college)
-                break
+    matched_colleges = {h.label for h in hits if h.category in ('college', 'department')}
 
     if matched_colleges:
         return '|'.join(sorted(matched_colleges))
 
     return None
 
+def standardize_colleges_series(texts: pd.Series) -> pd.Series:
+    """
+    standardize_colleges 的向量化版本
+    相同文字只處理一次（factorize），再依代碼展開回原本的列
+    """
+    codes, uniques = pd.factorize(texts.astype('string'))
+    labels = [standardize_colleges(text) for text in uniques]
+
+    # factorize 以 -1 表示缺失值，對應到最後補上的 None
+    lookup = np.array(labels + [None], dtype=object)
+    return pd.Series(lookup[codes], index=texts.index, dtype=object)
+
 def standardize_region(country):
-    """根據國家判斷地區"""
+    """根據國家判斷地區（查 countries 對照表）"""
     if not country or pd.isna(country):
-        return '其他'
-
-    for region, countries in REGION_MAPPING.items():
-        if any(c in country for c in countries):
-            return region
+        return DEFAULT_REGION
+    return to_region(country)
+
+# parse_language_requirement 的測驗類型 → language_requirements 的項目（TOEFL 不限 iBT）
+LANGUAGE_TESTS = {
+    'toefl': ('toefl_ibt', 'toefl'),
+    'ielts': ('ielts',),
+    'toeic': ('toeic',),
+}
 
-    return '其他'
 
 def parse_language_requirement(text, test_type):
-    """解析語言成績要求"""
-    if not text or pd.isna(text):
-        return None
-
-    text = str(text)
-
-    # 根據測驗類型使用不同的正則表達式
-    if test_type == 'toefl':
-        patterns = [
-            r'TOEFL\s*iBT\s*[:：]?\s*(\d+)',
-            r'TOEFL\s*[:：]?\s*(\d+)',
-            r'托福\s*[:：]?\s*(\d+)'
-        ]
-        max_score = 120
-    elif test_type == 'ielts':
-        patterns = [r'IELTS\s*[:：]?\s*(\d+\.?\d*)']
-        max_score = 9
-    elif test_type == 'toeic':
-        patterns = [
-            r'TOEIC\s*[:：]?\s*(\d+)',
-            r'多益\s*[:：]?\s*(\d+)'
-        ]
-        max_score = 990
-    else:
+    """解析語言成績要求（文字中第一個該測驗的分數；超出範圍者已由 language_requirements 略過）"""
+    if not text or pd.isna(text) or test_type not in LANGUAGE_TESTS:
         return None
 
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                score = float(match.group(1))
-                if 0 <= score <= max_score:
-                    return int(score) if test_type != 'ielts' else score
-            except ValueError:
-                continue
+    # 同一段文字會依序查 TOEFL / IELTS / TOEIC，解析結果快取
+    tests = LANGUAGE_TESTS[test_type]
+    for requirement in parse_requirements(str(text)).items:
+        if requirement.test in tests:
+            return requirement.value
 
     return None
 
 def get_coordinates(school_name, city, country, geolocator, cache):
     """使用 geopy 取得經緯度座標"""
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     # 檢查快取
     cache_key = f"{school_name}|{city}|{country}"
     if cache_key in cache:
@@ -143,8 +108,12 @@ def get_coordinates(school_name, city, country, geolocator, cache):
 
         query = ', '.join(query_parts)
 
+        # 以國家範圍作為 bias（非硬性限制，找不到仍可回傳範圍外結果）
+        bbox = bounds(country)
+        viewbox = [(bbox[0], bbox[1]), (bbox[2], bbox[3])] if bbox else None
+
         # 查詢座標
-        location = geolocator.geocode(query, timeout=10)
+        location = geolocator.geocode(query, timeout=10, viewbox=viewbox)
 
         if location:
             result = (location.latitude, location.longitude)
@@ -155,7 +124,7 @@ def get_coordinates(school_name, city, country, geolocator, cache):
             # 嘗試只用城市和國家
             if city and country:
                 query = f"{city}, {country}"
-                location = geolocator.geocode(query, timeout=10)
+                location = geolocator.geocode(query, timeout=10, viewbox=viewbox)
                 if location:
                     result = (location.latitude, location.longitude)
                     cache[cache_key] = result
@@ -166,29 +135,35 @@ def get_coordinates(school_name, city, country, geolocator, cache):
             cache[cache_key] = (None, None)
             return (None, None)
 
+    # 暫時性錯誤不寫入快取，下次執行會重查
     except (GeocoderTimedOut, GeocoderServiceError) as e:
         logger.warning(f"  ✗ 查詢座標失敗: {school_name} - {e}")
-        cache[cache_key] = (None, None)
         return (None, None)
     except Exception as e:
         logger.error(f"  ✗ 查詢座標時發生錯誤: {school_name} - {e}")
-        cache[cache_key] = (None, None)
         return (None, None)
 
-def clean_data():
-    """主要資料清理函式"""
-    logger.info("=" * 60)
-    logger.info("開始清理資料")
-    logger.info("=" * 60)
+def load_geocode_cache() -> dict:
+    if GEOCODE_CACHE_FILE.exists():
+        with open(GEOCODE_CACHE_FILE, encoding='utf-8') as f:
+            return {k: tuple(v) for k, v in json.load(f).items()}
+    return {}
 
-    # 讀取原始資料
-    with open('raw_schools.json', 'r', encoding='utf-8') as f:
-        raw_data = json.load(f)
+def save_geocode_cache(cache: dict):
+    with open(GEOCODE_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
 
-    logger.info(f"載入 {len(raw_data)} 筆原始資料")
+def _text_column(df, column):
+    """取得文字欄位；欄位不存在時回傳全空的 Series"""
+    if column in df.columns:
+        return df[column].astype('string').replace('', pd.NA)
+    return pd.Series(pd.NA, index=df.index, dtype='string')
+
+# ── 各階段 ───────────────────────────────────────────────────
 
-    # 建立 DataFrame
-    df = pd.DataFrame(raw_data)
+def transform(df: pd.DataFrame) -> pd.DataFrame:
+    """純欄位運算的清理階段（不含網路查詢）"""
+    df = df.copy()
 
     # 如果 id 欄位存在，先移除再重新建立流水號
     if 'id' in df.columns:
@@ -197,16 +172,17 @@ def clean_data():
     # 建立流水號 id
     df.insert(0, 'id', range(1, len(df) + 1))
 
-    # 標準化學院
+    # 標準化學院（colleges 為空時改用 departments）
     logger.info("正在標準化學院資訊...")
-    df['colleges'] = df.apply(
-        lambda row: standardize_colleges(row.get('colleges') or row.get('departments')),
-        axis=1
+    df['colleges'] = standardize_colleges_series(
+        _text_column(df, 'colleges').fillna(_text_column(df, 'departments'))
     )
 
-    # 標準化地區
+    # 標準化地區：每個 unique 國家只查一次表，結果存成 categorical
     logger.info("正在標準化地區分類...")
-    df['region'] = df['country'].apply(standardize_region)
+    df['region'] = resolve_series(df['country'], 'region', default=DEFAULT_REGION).astype(
+        pd.CategoricalDtype(REGIONS)
+    )
 
     # 處理缺失值
     logger.info("正在處理缺失值...")
@@ -233,30 +209,72 @@ def clean_data():
     else:
         df['semesters'] = 'Fall,Spring'
 
-    # 取得地理座標
-    logger.info("正在查詢地理座標...")
-    geolocator = Nominatim(user_agent="ntu_oia_scraper")
-    coord_cache = {}
+    return df
 
-    coordinates = []
-    for idx, row in df.iterrows():
-        if idx > 0 and idx % 10 == 0:
-            logger.info(f"  進度: {idx}/{len(df)}")
+def geocode(df: pd.DataFrame, geolocator, cache: dict) -> pd.DataFrame:
+    """
+    座標查詢階段：只查 unique (name, city, country)，結果依 key join 回 df
+    快取命中不呼叫 API、也不等待
+    """
+    keys = pd.DataFrame({
+        'geo_name': _text_column(df, 'name_en').fillna(_text_column(df, 'name_zh')),
+        'geo_city': _text_column(df, 'city'),
+        'geo_country': _text_column(df, 'country'),
+    }, index=df.index)
+    unique_keys = keys.drop_duplicates()
+    logger.info(f"  {len(df)} 筆資料，{len(unique_keys)} 個不重複地點")
+
+    coords = []
+    queried = 0
+    for name, city, country in unique_keys.itertuples(index=False, name=None):
+        name, city, country = (None if pd.isna(v) else v for v in (name, city, country))
+        cache_key = f"{name}|{city}|{country}"
+        cached = cache_key in cache
+        coords.append(get_coordinates(name, city, country, geolocator, cache))
+        if not cached:
+            queried += 1
+            if queried % 10 == 0:
+                logger.info(f"  已查詢 {queried} 個地點")
+                save_geocode_cache(cache)
+            # 延遲避免超過 API 限制
+            time.sleep(GEOCODE_DELAY)
+
+    unique_keys = unique_keys.assign(
+        latitude=[c[0] for c in coords],
+        longitude=[c[1] for c in coords],
+    )
+    logger.info(f"  API 查詢 {queried} 次，快取命中 {len(unique_keys) - queried} 次")
 
-        lat, lon = get_coordinates(
-            row.get('name_en') or row.get('name_zh'),
-            row.get('city'),
-            row.get('country'),
-            geolocator,
-            coord_cache
-        )
-        coordinates.append({'latitude': lat, 'longitude': lon})
+    merged = keys.merge(unique_keys, on=['geo_name', 'geo_city', 'geo_country'], how='left')
+    df = df.copy()
+    df['latitude'] = merged['latitude'].to_numpy()
+    df['longitude'] = merged['longitude'].to_numpy()
+    return df
 
-        # 延遲避免超過 API 限制
-        time.sleep(1)
+def clean_data():
+    """主要資料清理函式"""
+    logger.info("=" * 60)
+    logger.info("開始清理資料")
+    logger.info("=" * 60)
 
-    df['latitude'] = [c['latitude'] for c in coordinates]
-    df['longitude'] = [c['longitude'] for c in coordinates]
+    # 讀取原始資料
+    with open('raw_schools.json', 'r', encoding='utf-8') as f:
+        raw_data = json.load(f)
+
+    logger.info(f"載入 {len(raw_data)} 筆原始資料")
+
+    # 建立 DataFrame 並清理
+    with profiling.stage('extract'):
+        df = transform(pd.DataFrame(raw_data))
+
+    # 取得地理座標
+    logger.info("正在查詢地理座標...")
+    from geopy.geocoders import Nominatim
+    geolocator = Nominatim(user_agent="ntu_oia_scraper")
+    coord_cache = load_geocode_cache()
+    with profiling.stage('geocode'):
+        df = geocode(df, geolocator, coord_cache)
+    save_geocode_cache(coord_cache)
 
     # 確保欄位順序
     column_order = [
@@ -276,11 +294,17 @@ def clean_data():
 
     # 儲存 CSV
     output_path = '../hw3/public/data/schools.csv'
-    df.to_csv(output_path, index=False, encoding='utf-8')
+    with profiling.stage('write'):
+        df.to_csv(output_path, index=False, encoding='utf-8')
+
+        # 同時輸出 Parquet / Arrow（型別正確、可 memory-map 讀取）
+        columnar_paths = write_columnar(df, output_path)
 
     logger.info("=" * 60)
     logger.info("資料清理完成！")
     logger.info(f"輸出檔案: {output_path}")
+    for path in columnar_paths:
+        logger.info(f"輸出檔案: {path}")
     logger.info(f"總計: {len(df)} 筆資料")
     logger.info("=" * 60)
 
@@ -288,7 +312,8 @@ def clean_data():
     logger.info("\n統計資訊:")
     logger.info(f"各地區分布:")
     for region, count in df['region'].value_counts().items():
-        logger.info(f"  {region}: {count}")
+        if count:
+            logger.info(f"  {region}: {count}")
 
     logger.info(f"\n有座標的學校: {df['latitude'].notna().sum()}")
     logger.info(f"無座標的學校: {df['latitude'].isna().sum()}")
@@ -296,4 +321,4 @@ def clean_data():
     return df
 
 if __name__ == '__main__':
-    clean_data()
+    profiling.run(clean_data)
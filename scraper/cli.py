@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+爬蟲統一入口：scraper <子命令> [目標] [該腳本的參數...]
+
+子命令與目標（第一個為預設目標）:
+  crawl    schools      fetch_schools_v2.py（結構化爬取）
+           text         fetch_schools.py（text_content，--engine http 不開瀏覽器）
+           experiences  experiences/fetch_experiences.py
+  geocode  nominatim    add_coordinates.py
+           google       geocode_google.py
+  clean    schools      clean_data.py
+  enrich   names        final_extract.py（英文校名 / 國家名）
+           pdfs         experiences/extract_pdfs.py
+           images       experiences/process_images.py
+  upload   images       experiences/upload_to_supabase.py
+  migrate  cloudinary   experiences/migrate_images_to_cloudinary.py
+  pipeline run          pipeline.py（crawl → diff → coordinates → google → import，輸入沒變的跳過）
+
+本檔只用標準庫：pandas / geopy / playwright / supabase 等只在對應腳本執行時才載入，
+scraper --help 不需要載入任何一個。選定的腳本在它自己的目錄下以 __main__ 執行，
+與直接 cd 進去跑 python xxx.py 完全相同（相對路徑、sys.argv 解析、--profile 都照舊）。
+
+用法:
+  python -m scraper --help                          # 在 repo 根目錄
+  python cli.py crawl --list-only                   # 在 scraper/ 目錄
+  python cli.py crawl --semester 1 --changed-only
+  python cli.py crawl text --engine http --workers 8
+  python cli.py geocode google --key YOUR_API_KEY
+  python cli.py enrich pdfs --workers 8
+  python cli.py upload --local-storage /tmp/bucket
+  python cli.py pipeline --dry-run
+  python cli.py crawl schools --help                # 顯示該腳本的參數 / 用法
+"""
+
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# 子命令 → {目標: (腳本, 說明)}，第一個目標為預設
+COMMANDS = {
+    'crawl': {
+        'schools': ('fetch_schools_v2.py', '結構化爬取學校列表與詳細頁'),
+        'text': ('fetch_schools.py', '爬取詳細頁 text_content'),
+        'experiences': ('experiences/fetch_experiences.py', '爬取交換心得列表'),
+    },
+    'geocode': {
+        'nominatim': ('add_coordinates.py', 'Nominatim 補上缺少的經緯度'),
+        'google': ('geocode_google.py', 'Google Geocoding API 重查經緯度'),
+    },
+    'clean': {
+        'schools': ('clean_data.py', '清理、標準化並輸出 schools.csv / parquet / arrow'),
+    },
+    'enrich': {
+        'names': ('final_extract.py', '補上英文校名與國家名'),
+        'pdfs': ('experiences/extract_pdfs.py', '萃取心得 PDF 的文字與圖片'),
+        'images': ('experiences/process_images.py', '心得圖片去重、縮圖'),
+    },
+    'upload': {
+        'images': ('experiences/upload_to_supabase.py', '上傳心得圖片到 Supabase Storage'),
+    },
+    'migrate': {
+        'cloudinary': ('experiences/migrate_images_to_cloudinary.py', '圖片從 Supabase 遷移到 Cloudinary'),
+    },
+    'pipeline': {
+        'run': ('pipeline.py', '依相依關係執行整個流程，輸入沒變的階段跳過'),
+    },
+}
+HELP_FLAGS = ('-h', '--help')
+
+
+def _usage() -> str:
+    lines = ['用法: scraper <子命令> [目標] [參數...]', '', '子命令:']
+    for command, targets in COMMANDS.items():
+        for i, (target, (script, description)) in enumerate(targets.items()):
+            name = command if i == 0 else ''
+            default = '（預設）' if i == 0 and len(targets) > 1 else ''
+            lines.append(f'  {name:<8} {target:<12} {description}{default}')
+    lines += ['', '各目標的參數: scraper <子命令> <目標> --help']
+    return '\n'.join(lines)
+
+
+def _script_help(path: Path) -> str | None:
+    """
+    不用 argparse 的腳本（直接讀 sys.argv）看不懂 --help，會照常開始執行；
+    這類腳本改為印出模組 docstring（各腳本開頭的用法說明），不執行
+    """
+    source = path.read_text(encoding='utf-8')
+    if 'argparse.ArgumentParser' in source:
+        return None
+    import ast
+    return ast.get_docstring(ast.parse(source)) or f'{path.name} 沒有用法說明'
+
+
+def resolve(argv: list[str]) -> tuple[Path, list[str]]:
+    """argv（不含程式名）→ (腳本路徑, 傳給腳本的參數)；無法解析時印出用法並結束"""
+    if not argv or argv[0] in HELP_FLAGS:
+        print(__doc__.strip() if argv else _usage())
+        sys.exit(0 if argv else 2)
+
+    command, rest = argv[0], argv[1:]
+    targets = COMMANDS.get(command)
+    if targets is None:
+        print(f'未知的子命令: {command}\n\n{_usage()}', file=sys.stderr)
+        sys.exit(2)
+
+    if rest and rest[0] in targets:
+        target, rest = rest[0], rest[1:]
+    elif rest and not rest[0].startswith('-'):
+        print(f'{command} 沒有目標 {rest[0]}（可用: {", ".join(targets)}）', file=sys.stderr)
+        sys.exit(2)
+    else:
+        target = next(iter(targets))
+    return BASE_DIR / targets[target][0], rest
+
+
+def main(argv: list[str] | None = None):
+    script, args = resolve(sys.argv[1:] if argv is None else argv)
+
+    if any(a in HELP_FLAGS for a in args):
+        text = _script_help(script)
+        if text is not None:
+            print(text)
+            return
+
+    # 與 cd <腳本目錄> && python <腳本> <參數> 相同：相對路徑、同層 import、sys.argv 解析都不需要改
+    import runpy
+    os.chdir(script.parent)
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *args]
+    runpy.run_path(str(script), run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+清理後學校資料的欄位式輸出（Parquet / Arrow IPC）與讀取
+
+- schools.parquet：zstd 壓縮、欄位型別正確，體積最小，適合存檔 / 傳輸
+- schools.arrow  ：未壓縮 Arrow IPC，可 memory-map，讀取幾乎不需複製
+
+需要 pyarrow（pip install pyarrow）；未安裝時 clean_data 只輸出 CSV。
+
+用法:
+  python columnar.py ../hw3/public/data/schools.csv    # 將既有 CSV 轉成 Parquet + Arrow
+  python columnar.py ../hw3/public/data/schools.arrow  # 顯示欄位型別與筆數
+
+  from columnar import load_schools
+  df = load_schools('../hw3/public/data/schools.arrow', columns=['name_zh', 'toefl_ibt'])
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from countries import REGIONS
+
+logger = logging.getLogger(__name__)
+
+# 欄位 → pandas dtype（nullable 整數、float、categorical）
+SCHEMA = {
+    'id':                'Int32',
+    'name_zh':           'string',
+    'name_en':           'string',
+    'country':           'category',
+    'city':              'string',
+    'region':            pd.CategoricalDtype(REGIONS),
+    'latitude':          'float64',
+    'longitude':         'float64',
+    'colleges':          'string',
+    'departments':       'string',
+    'language_group':    'category',
+    'grade_requirement': 'string',
+    'gpa_min':           'float64',
+    'toefl_ibt':         'Int16',
+    'ielts':             'float64',
+    'toeic':             'Int16',
+    'other_language':    'string',
+    'quota':             'Int16',
+    'semesters':         'category',
+    'tuition':           'string',
+    'notes':             'string',
+    'url':               'string',
+}
+
+
+def to_typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """依 SCHEMA 轉換欄位型別（只處理存在的欄位）"""
+    df = df.copy()
+    for column, dtype in SCHEMA.items():
+        if column not in df.columns:
+            continue
+        if dtype in ('Int16', 'Int32', 'float64'):
+            # 空字串 / 非數字 → NA，避免整欄轉型失敗
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+            if dtype.startswith('Int'):
+                df[column] = df[column].round()
+        df[column] = df[column].astype(dtype)
+    return df
+
+
+def write_columnar(df: pd.DataFrame, base_path) -> list[Path]:
+    """
+    輸出 <base>.parquet 與 <base>.arrow，回傳實際寫出的檔案
+    未安裝 pyarrow 時記錄警告並回傳空 list
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.warning("未安裝 pyarrow，略過 Parquet / Arrow 輸出（pip install pyarrow）")
+        return []
+
+    base_path = Path(base_path)
+    table = pa.Table.from_pandas(to_typed_frame(df), preserve_index=False)
+
+    parquet_path = base_path.with_suffix('.parquet')
+    arrow_path = base_path.with_suffix('.arrow')
+    pq.write_table(table, parquet_path, compression='zstd')
+    feather.write_feather(table, arrow_path, compression='uncompressed')
+    return [parquet_path, arrow_path]
+
+
+def load_schools(path, columns=None) -> pd.DataFrame:
+    """
+    讀取欄位式輸出
+    .arrow 以 memory-map 開啟（不複製整個檔案）；.parquet 以 memory_map 讀取後解壓
+    columns: 只讀指定欄位
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if path.suffix == '.arrow':
+        with pa.memory_map(str(path), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns:
+            table = table.select(columns)
+    else:
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    path = Path(sys.argv[1])
+
+    if path.suffix == '.csv':
+        df = pd.read_csv(path, encoding='utf-8')
+        written = write_columnar(df, path)
+        logger.info(f"CSV: {path.stat().st_size / 1024:.1f} KB")
+        for p in written:
+            logger.info(f"{p.suffix[1:]}: {p.stat().st_size / 1024:.1f} KB → {p}")
+        return
+
+    df = load_schools(path)
+    logger.info(f"{path}: {len(df)} 筆")
+    for column, dtype in df.dtypes.items():
+        logger.info(f"  {column:<18} {dtype}")
+
+
+if __name__ == '__main__':
+    main()
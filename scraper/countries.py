@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+國家 / 地區對照表（離線、單一來源）
+
+取代散落在各腳本的對照 dict：
+- geocode_google.py 的 COUNTRY_ZH_TO_EN
+- extract_english_names.py / final_extract.py 的 get_country_english_name
+- clean_data.py 的 REGION_MAPPING（原本每列都要巢狀掃描所有地區）
+
+每個國家一筆：中文名、別名（如 大陸地區 / 中國）、英文名、ISO 代碼、地區、
+bounding box。模組載入時預先建好索引，查詢為 O(1) dict lookup。
+
+用法:
+  from countries import resolve, to_english, to_region, bounds
+  resolve('大陸地區').name_en          # 'China'
+  to_region('南韓')                    # '亞洲'
+  resolve_series(df['country'], 'region', default='其他')   # pandas 向量化
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class Country(NamedTuple):
+    iso: str                                    # ISO 3166-1 alpha-2
+    name_zh: str                                # OIA 網站上使用的中文名
+    name_en: str
+    region: str                                 # 與前端地區分類一致的中文地區名
+    aliases: tuple[str, ...]                    # 其他寫法（繁簡、舊稱）
+    bbox: tuple[float, float, float, float]     # (south, west, north, east)
+
+
+# ── 對照表 ───────────────────────────────────────────────────
+# bbox 為概略範圍，僅供地理查詢的 bias 使用，不需精確
+
+COUNTRIES: tuple[Country, ...] = (
+    # 北美洲
+    Country('US', '美國', 'United States', '北美洲', ('美利堅',), (18.9, -179.2, 71.4, -66.9)),
+    Country('CA', '加拿大', 'Canada', '北美洲', (), (41.7, -141.0, 83.1, -52.6)),
+    Country('MX', '墨西哥', 'Mexico', '北美洲', (), (14.5, -118.4, 32.7, -86.7)),
+
+    # 歐洲
+    Country('GB', '英國', 'United Kingdom', '歐洲', ('UK', 'Great Britain'), (49.9, -8.6, 60.9, 1.8)),
+    Country('FR', '法國', 'France', '歐洲', (), (41.3, -5.1, 51.1, 9.6)),
+    Country('DE', '德國', 'Germany', '歐洲', (), (47.3, 5.9, 55.1, 15.0)),
+    Country('IT', '義大利', 'Italy', '歐洲', ('意大利',), (35.5, 6.6, 47.1, 18.5)),
+    Country('ES', '西班牙', 'Spain', '歐洲', (), (36.0, -9.3, 43.8, 3.3)),
+    Country('NL', '荷蘭', 'Netherlands', '歐洲', (), (50.8, 3.4, 53.6, 7.2)),
+    Country('BE', '比利時', 'Belgium', '歐洲', (), (49.5, 2.5, 51.5, 6.4)),
+    Country('CH', '瑞士', 'Switzerland', '歐洲', (), (45.8, 6.0, 47.8, 10.5)),
+    Country('AT', '奧地利', 'Austria', '歐洲', (), (46.4, 9.5, 49.0, 17.2)),
+    Country('SE', '瑞典', 'Sweden', '歐洲', (), (55.3, 11.1, 69.1, 24.2)),
+    Country('NO', '挪威', 'Norway', '歐洲', (), (58.0, 4.6, 71.2, 31.1)),
+    Country('DK', '丹麥', 'Denmark', '歐洲', (), (54.6, 8.1, 57.8, 15.2)),
+    Country('FI', '芬蘭', 'Finland', '歐洲', (), (59.8, 20.6, 70.1, 31.6)),
+    Country('PL', '波蘭', 'Poland', '歐洲', (), (49.0, 14.1, 54.9, 24.1)),
+    Country('CZ', '捷克', 'Czech Republic', '歐洲', ('Czechia',), (48.6, 12.1, 51.1, 18.9)),
+    Country('HU', '匈牙利', 'Hungary', '歐洲', (), (45.7, 16.1, 48.6, 22.9)),
+    Country('PT', '葡萄牙', 'Portugal', '歐洲', (), (36.9, -9.5, 42.2, -6.2)),
+    Country('GR', '希臘', 'Greece', '歐洲', (), (34.8, 19.4, 41.8, 28.2)),
+    Country('IE', '愛爾蘭', 'Ireland', '歐洲', (), (51.4, -10.5, 55.4, -6.0)),
+    Country('IS', '冰島', 'Iceland', '歐洲', (), (63.3, -24.5, 66.6, -13.5)),
+    Country('LU', '盧森堡', 'Luxembourg', '歐洲', (), (49.4, 5.7, 50.2, 6.5)),
+    Country('EE', '愛沙尼亞', 'Estonia', '歐洲', (), (57.5, 21.8, 59.7, 28.2)),
+    Country('LV', '拉脫維亞', 'Latvia', '歐洲', (), (55.7, 21.0, 58.1, 28.2)),
+    Country('LT', '立陶宛', 'Lithuania', '歐洲', (), (53.9, 21.0, 56.4, 26.8)),
+    Country('SK', '斯洛伐克', 'Slovakia', '歐洲', (), (47.7, 16.8, 49.6, 22.6)),
+    Country('SI', '斯洛維尼亞', 'Slovenia', '歐洲', ('斯洛文尼亞',), (45.4, 13.4, 46.9, 16.6)),
+    Country('HR', '克羅埃西亞', 'Croatia', '歐洲', (), (42.4, 13.5, 46.6, 19.4)),
+    Country('RO', '羅馬尼亞', 'Romania', '歐洲', (), (43.6, 20.3, 48.3, 29.7)),
+    Country('BG', '保加利亞', 'Bulgaria', '歐洲', (), (41.2, 22.4, 44.2, 28.6)),
+    Country('RS', '塞爾維亞', 'Serbia', '歐洲', (), (42.2, 18.8, 46.2, 23.0)),
+    Country('UA', '烏克蘭', 'Ukraine', '歐洲', (), (44.4, 22.1, 52.4, 40.2)),
+    Country('XK', '科索沃', 'Kosovo', '歐洲', (), (41.9, 20.0, 43.3, 21.8)),
+    Country('RU', '俄羅斯', 'Russia', '歐洲', (), (41.2, 19.6, 81.9, 180.0)),
+
+    # 亞洲
+    Country('JP', '日本', 'Japan', '亞洲', (), (24.0, 122.9, 45.6, 145.8)),
+    Country('KR', '南韓', 'South Korea', '亞洲', ('韓國', '大韓民國', 'Korea'), (33.1, 124.6, 38.6, 131.9)),
+    Country('CN', '大陸地區', 'China', '亞洲', ('中國', '中國大陸', '大陸'), (18.2, 73.5, 53.6, 134.8)),
+    Country('HK', '香港', 'Hong Kong', '亞洲', (), (22.15, 113.8, 22.6, 114.45)),
+    Country('MO', '澳門', 'Macau', '亞洲', ('Macao',), (22.1, 113.5, 22.22, 113.6)),
+    Country('MN', '蒙古', 'Mongolia', '亞洲', (), (41.6, 87.7, 52.2, 119.9)),
+    Country('SG', '新加坡', 'Singapore', '亞洲', (), (1.16, 103.6, 1.48, 104.1)),
+    Country('TH', '泰國', 'Thailand', '亞洲', (), (5.6, 97.3, 20.5, 105.6)),
+    Country('MY', '馬來西亞', 'Malaysia', '亞洲', (), (0.85, 99.6, 7.4, 119.3)),
+    Country('ID', '印尼', 'Indonesia', '亞洲', ('印度尼西亞',), (-11.0, 95.0, 6.1, 141.0)),
+    Country('PH', '菲律賓', 'Philippines', '亞洲', (), (4.6, 116.9, 21.1, 126.6)),
+    Country('VN', '越南', 'Vietnam', '亞洲', ('Viet Nam',), (8.4, 102.1, 23.4, 109.5)),
+    Country('IN', '印度', 'India', '亞洲', (), (6.7, 68.1, 35.7, 97.4)),
+    Country('IL', '以色列', 'Israel', '亞洲', (), (29.5, 34.2, 33.3, 35.9)),
+    Country('TR', '土耳其', 'Turkey', '亞洲', ('Türkiye',), (35.8, 26.0, 42.1, 44.8)),
+    Country('AE', '阿聯酋', 'United Arab Emirates', '亞洲', ('阿拉伯聯合大公國', 'UAE'), (22.6, 51.6, 26.1, 56.4)),
+    Country('SA', '沙烏地阿拉伯', 'Saudi Arabia', '亞洲', (), (16.3, 34.5, 32.2, 55.7)),
+    Country('TW', '台灣', 'Taiwan', '亞洲', ('臺灣',), (21.9, 119.3, 25.3, 122.0)),
+
+    # 大洋洲
+    Country('AU', '澳大利亞', 'Australia', '大洋洲', ('澳洲',), (-43.7, 113.2, -10.7, 153.6)),
+    Country('NZ', '紐西蘭', 'New Zealand', '大洋洲', ('新西蘭',), (-47.3, 166.4, -34.4, 178.6)),
+    Country('FJ', '斐濟', 'Fiji', '大洋洲', (), (-21.0, 176.8, -12.5, 180.0)),
+
+    # 南美洲
+    Country('BR', '巴西', 'Brazil', '南美洲', (), (-33.8, -74.0, 5.3, -34.8)),
+    Country('AR', '阿根廷', 'Argentina', '南美洲', (), (-55.1, -73.6, -21.8, -53.6)),
+    Country('CL', '智利', 'Chile', '南美洲', (), (-56.0, -75.7, -17.5, -66.4)),
+    Country('CO', '哥倫比亞', 'Colombia', '南美洲', (), (-4.2, -79.0, 12.5, -66.9)),
+    Country('PE', '秘魯', 'Peru', '南美洲', (), (-18.4, -81.4, 0.0, -68.7)),
+    Country('VE', '委內瑞拉', 'Venezuela', '南美洲', (), (0.6, -73.4, 12.2, -59.8)),
+
+    # 非洲
+    Country('ZA', '南非', 'South Africa', '非洲', (), (-34.8, 16.5, -22.1, 32.9)),
+    Country('EG', '埃及', 'Egypt', '非洲', (), (22.0, 24.7, 31.7, 36.9)),
+    Country('KE', '肯亞', 'Kenya', '非洲', (), (-4.7, 33.9, 5.0, 41.9)),
+    Country('NG', '奈及利亞', 'Nigeria', '非洲', (), (4.3, 2.7, 13.9, 14.7)),
+    Country('MA', '摩洛哥', 'Morocco', '非洲', (), (27.7, -13.2, 35.9, -1.0)),
+)
+
+DEFAULT_REGION = '其他'
+
+# 所有地區（依對照表順序），供 pandas Categorical 使用
+REGIONS: tuple[str, ...] = tuple(dict.fromkeys(c.region for c in COUNTRIES)) + (DEFAULT_REGION,)
+
+
+# ── 索引（模組載入時建一次）─────────────────────────────────
+
+def _normalize_key(name: str) -> str:
+    """查詢用 key：去空白、英文不分大小寫"""
+    return re.sub(r'\s+', '', name).casefold()
+
+
+_INDEX: dict[str, Country] = {}
+for _c in COUNTRIES:
+    for _name in (_c.name_zh, _c.name_en, _c.iso, *_c.aliases):
+        _INDEX.setdefault(_normalize_key(_name), _c)
+
+# 備援：名稱嵌在較長字串中（如「美國紐約州」）時，用單一 alternation 掃一次
+# 長名稱排前面，避免「中國大陸」被「中國」搶先匹配
+_EMBEDDED_PATTERN = re.compile('|'.join(
+    re.escape(k) for k in sorted(
+        # ISO 代碼、UK / UAE 等短縮寫太容易誤中，不做子字串比對
+        (k for k in _INDEX if not (k.isascii() and len(k) <= 3)),
+        key=len, reverse=True,
+    )
+))
+
+
+# ── 查詢 API ─────────────────────────────────────────────────
+
+@lru_cache(maxsize=1024)
+def resolve(name: str | None) -> Country | None:
+    """中文名 / 別名 / 英文名 / ISO 代碼 → Country，找不到回傳 None"""
+    if not name or not isinstance(name, str):
+        return None
+    key = _normalize_key(name)
+    country = _INDEX.get(key)
+    if country is None:
+        m = _EMBEDDED_PATTERN.search(key)
+        if m:
+            country = _INDEX[m.group(0)]
+    return country
+
+
+def to_english(name: str | None) -> str | None:
+    """中文國名 → 英文國名；找不到時原樣回傳"""
+    country = resolve(name)
+    return country.name_en if country else name
+
+
+def to_region(name: str | None) -> str:
+    """國名 → 地區（北美洲 / 歐洲 / 亞洲 / ...），找不到回傳「其他」"""
+    country = resolve(name)
+    return country.region if country else DEFAULT_REGION
+
+
+def to_iso(name: str | None) -> str | None:
+    country = resolve(name)
+    return country.iso if country else None
+
+
+def bounds(name: str | None) -> tuple[float, float, float, float] | None:
+    """國名 → (south, west, north, east)，供地理查詢 bias 使用"""
+    country = resolve(name)
+    return country.bbox if country else None
+
+
+def resolve_series(series, field: str = 'name_en', default=None):
+    """
+    pandas 向量化版本：只對 unique 值查一次表，再用 Series.map 套回
+    field: Country 的欄位名（name_en / iso / region / ...）
+    """
+    if field not in Country._fields:
+        raise ValueError(f'未知欄位: {field}（可用: {", ".join(Country._fields)}）')
+    mapping = {}
+    for value in series.dropna().unique():
+        country = resolve(value)
+        mapping[value] = getattr(country, field) if country else default
+    result = series.map(mapping)
+    return result if default is None else result.fillna(default)
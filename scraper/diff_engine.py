@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+兩次爬取結果（raw_schools_v2_sem{N}.json）的差異比對，直接輸出 diff_report_sem{N}.json
+
+每筆學校先轉成與 scripts/sync-schools.ts toPatchRecord 相同的 DB 欄位，
+再計算每個欄位的 hash 與整筆的 hash：
+  - 整筆 hash 相同 → 無變更，不再逐欄比較
+  - 不同 → 只比較欄位 hash，報告中只放有變更的欄位
+兩份資料各建一個 {id: hashes} 的 dict，整體 O(n)，不需要連 DB。
+
+報告格式與 sync-schools.ts 相同（new_schools / changed_schools / summary），
+可直接給 `sync-schools.ts --apply` 使用；新學校的 country_id 由 apply 時依 country 查表補上。
+
+也可只比較列表頁欄位，決定哪些學校的詳細頁需要重爬（refetch_ids，fetch_schools_v2.py --changed-only 使用）。
+
+用法:
+  python diff_engine.py --semester 2 --old old.json             # 與舊檔比較（新檔預設 raw_schools_v2_sem2.json）
+  python diff_engine.py --semester 2                            # 與 snapshots/sem2 的前一次快照比較
+  python diff_engine.py --semester 2 --refetch                  # 列出 _list_only.json 中列表欄位有變的 id
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import profiling
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+
+# DB 欄位 → (raw 欄位, 預設值)，與 sync-schools.ts toPatchRecord 相同
+PATCH_FIELDS = {
+    'name_zh': ('name_zh', None),
+    'name_en': ('name_en', None),
+    'url': ('url', None),
+    'contract_quota': ('contract_quota', None),
+    'selection_quota': ('selection_quota', None),
+    'selection_count': ('selection_count', None),
+    'is_updated': ('is_updated', False),
+    'second_exchange_eligible': ('second_exchange_eligible', False),
+    'no_fail_required': ('no_fail_required', False),
+    'language_group': ('language_group', '一般組'),
+    'gpa_min': ('gpa_min', None),
+    'toefl_ibt': ('toefl_ibt', None),
+    'ielts': ('ielts', None),
+    'toeic': ('toeic', None),
+    'gept': ('gept', None),
+    'language_cefr': ('language_cefr', None),
+    'jlpt': ('jlpt', None),
+    'sections': ('sections_ordered', None),
+    'quota': ('quota_text', None),
+    'grade_requirement': ('grade_requirement', None),
+    'restricted_colleges': ('restricted_colleges', '無'),
+    'latitude': ('latitude', None),
+    'longitude': ('longitude', None),
+}
+# 空字串也視為缺值的欄位（TS 用 `||`）
+FALSY_DEFAULT = {'name_en', 'url', 'language_group', 'quota', 'restricted_colleges'}
+# 不列入差異比對（與 sync-schools.ts IGNORE_FIELDS 相同）
+IGNORE_FIELDS = {'id', 'latitude', 'longitude'}
+# 列表頁就有的欄位：有變才需要重爬詳細頁
+LIST_FIELDS = ['url', 'contract_quota', 'selection_quota', 'selection_count', 'is_updated']
+
+
+def to_patch_record(school: dict) -> dict:
+    """raw 學校資料 → DB 欄位（不含 country_id）"""
+    record = {'id': int(school['id'])}
+    for column, (field, default) in PATCH_FIELDS.items():
+        value = school.get(field)
+        if value is None or (column in FALSY_DEFAULT and not value):
+            value = default
+        record[column] = value
+    return record
+
+
+# 共用一個 encoder（json.dumps 帶參數時每次都會重建 encoder）
+_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def field_hash(value) -> str:
+    # 3.0 與 3 視為相同（TS 以數值比較）；sections 內只有字串，不需逐層正規化
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    payload = _ENCODER.encode(value)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def record_hashes(record: dict, fields) -> tuple[str, dict[str, str]]:
+    """(整筆 hash, {欄位: hash})"""
+    hashes = {field: field_hash(record.get(field)) for field in fields}
+    digest = hashlib.blake2b(''.join(hashes.values()).encode('ascii'), digest_size=8).hexdigest()
+    return digest, hashes
+
+
+class HashedSnapshot:
+    """一份爬取結果的 {id: (整筆 hash, 欄位 hash)}，以及對應的 DB 欄位資料"""
+
+    def __init__(self, schools: list[dict], fields=None, patch: bool = True):
+        self.fields = [f for f in (fields or PATCH_FIELDS) if f not in IGNORE_FIELDS]
+        self.schools = {str(s['id']): s for s in schools}
+        self.records = {i: to_patch_record(s) if patch else s for i, s in self.schools.items()}
+        self.hashes = {i: record_hashes(r, self.fields) for i, r in self.records.items()}
+
+
+def diff_snapshots(old: list[dict], new: list[dict], semester: int) -> dict:
+    """比較兩次爬取結果，回傳 sync-schools.ts 格式的差異報告"""
+    before, after = HashedSnapshot(old), HashedSnapshot(new)
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'semester': semester,
+        'summary': {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0},
+        'new_schools': [],
+        'changed_schools': [],
+        'removed_ids': [],
+    }
+
+    for school_id, (digest, hashes) in after.hashes.items():
+        school = after.schools[school_id]
+        record = after.records[school_id]
+        previous = before.hashes.get(school_id)
+
+        if previous is None:
+            report['new_schools'].append({
+                'id': record['id'], 'name_zh': record['name_zh'],
+                'country': school.get('country', ''), 'record': record,
+            })
+            report['summary']['new'] += 1
+            continue
+
+        old_digest, old_hashes = previous
+        if digest == old_digest:
+            report['summary']['unchanged'] += 1
+            continue
+
+        old_record = before.records[school_id]
+        changes = {
+            field: {'old': old_record[field], 'new': record[field]}
+            for field, h in hashes.items() if old_hashes[field] != h
+        }
+        report['changed_schools'].append({
+            'id': record['id'], 'name_zh': record['name_zh'],
+            'country': school.get('country', ''), 'changes': changes,
+        })
+        report['summary']['changed'] += 1
+
+    report['removed_ids'] = [int(i) for i in before.hashes if i not in after.hashes]
+    report['summary']['removed'] = len(report['removed_ids'])
+    return report
+
+
+def refetch_ids(list_schools: list[dict], previous: list[dict]) -> list[str]:
+    """
+    列表頁資料與上次完整爬取比較，回傳需要重爬詳細頁的 id：
+    新出現的學校、列表欄位（名額、is_updated…）有變的學校、上次沒抓到詳細頁的學校
+    """
+    before = HashedSnapshot(previous, LIST_FIELDS, patch=False)
+    after = HashedSnapshot(list_schools, LIST_FIELDS, patch=False)
+    ids = []
+    for school_id, (digest, _) in after.hashes.items():
+        old = before.hashes.get(school_id)
+        if old is None or old[0] != digest or 'sections_ordered' not in before.schools[school_id]:
+            ids.append(school_id)
+    return ids
+
+
+def report_path(semester: int) -> Path:
+    return BASE_DIR / f'diff_report_sem{semester}.json'
+
+
+def _load(path) -> list[dict]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _previous_snapshot(semester: int) -> list[dict]:
+    """snapshots/sem{N} 中倒數第二次快照（最後一次即目前的 JSON）"""
+    from snapshot_store import SnapshotStore
+    store = SnapshotStore.for_semester(semester)
+    times = store.timeline()
+    if len(times) < 2:
+        raise SystemExit(f"snapshots/sem{semester} 少於兩次快照，請以 --old 指定舊檔")
+    logger.info(f"舊資料: 快照 {times[-2]}")
+    return store.at(times[-2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較兩次爬取結果，輸出差異報告')
+    parser.add_argument('--semester', type=int, default=2)
+    parser.add_argument('--old', help='舊的 raw_schools_v2 JSON（預設為前一次快照）')
+    parser.add_argument('--new', help='新的 raw_schools_v2 JSON（預設 raw_schools_v2_sem{N}.json）')
+    parser.add_argument('--output', help='報告檔（預設 diff_report_sem{N}.json）')
+    parser.add_argument('--refetch', action='store_true',
+                        help='以 _list_only.json 比較列表欄位，印出需要重爬詳細頁的 id')
+    args = parser.parse_args()
+
+    current_file = BASE_DIR / f'raw_schools_v2_sem{args.semester}.json'
+
+    if args.refetch:
+        list_file = Path(args.new or current_file.with_name(current_file.stem + '_list_only.json'))
+        previous = _load(args.old or current_file)
+        ids = refetch_ids(_load(list_file), previous)
+        logger.info(f"需要重爬 {len(ids)} 所")
+        print(','.join(ids))
+        return
+
+    new = _load(args.new or current_file)
+    old = _load(args.old) if args.old else _previous_snapshot(args.semester)
+
+    start = time.perf_counter()
+    report = diff_snapshots(old, new, args.semester)
+    elapsed = time.perf_counter() - start
+
+    output = Path(args.output or report_path(args.semester))
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    summary = report['summary']
+    logger.info("=" * 60)
+    logger.info(f"差異報告 Semester {args.semester}（{len(new)} 筆，{elapsed * 1000:.1f} ms）")
+    for school in report['new_schools']:
+        logger.info(f"  新學校 #{school['id']} {school['name_zh']} ({school['country']})")
+    for school in report['changed_schools']:
+        logger.info(f"  有變更 #{school['id']} {school['name_zh']}: {', '.join(school['changes'])}")
+    logger.info(f"新學校 {summary['new']}，有變更 {summary['changed']}，"
+                f"無變更 {summary['unchanged']}，已移除 {summary['removed']}")
+    logger.info(f"報告已存: {output}")
+    logger.info("=" * 60)
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+學校申請資格的預先計算索引
+
+以 fetch_schools_v2 的 _extract_common_fields 結果為輸入，建立：
+- 每種門檻（GPA / TOEFL / IELTS / TOEIC / 全民英檢 / CEFR / JLPT）一組排序後的門檻陣列，
+  搭配「前 k 小門檻的學校」累積 bitset → 一次 bisect 就得到「門檻 ≤ 學生成績」的所有學校
+- 語言組別、學期、地區、年級（大一~博七每格一個）各一組 bitset
+bitset 用 Python int 表示，查詢即為數個 int 的 AND / OR。
+
+語言條件的判定：學校列出的各項語言檢定視為「擇一符合」
+（如「TOEFL iBT 79 或 IELTS 6.0；或葡語 B1」），沒有列任何語言檢定的學校視為不限。
+
+用法:
+  python eligibility_index.py                 # 由 raw_schools_v2_sem2.json 建立索引
+  python eligibility_index.py --semester 1
+  python eligibility_index.py --query gpa=3.6 ielts=6.5 jlpt=N2 grade=大三
+
+  from eligibility_index import EligibilityIndex
+  index = EligibilityIndex.load('eligibility_index_sem2.json')
+  index.query(gpa=3.6, ielts=6.5, jlpt='N2')   # → 學校 id list
+"""
+
+import argparse
+import json
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+
+import profiling
+from countries import to_region
+
+BASE_DIR = Path(__file__).parent
+
+# ── 等級量表（字串 → 可比較的數值，越大越高）──────────────────
+
+GEPT_LEVELS = {'初級': 1, '中級': 2, '中高級': 3, '高級': 4, '優級': 5}
+CEFR_LEVELS = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
+JLPT_LEVELS = {'N5': 1, 'N4': 2, 'N3': 3, 'N2': 4, 'N1': 5}
+
+# 門檻欄位 → (學校欄位, 字串轉數值)
+THRESHOLD_FIELDS = {
+    'gpa':   ('gpa_min',       float),
+    'toefl': ('toefl_ibt',     float),
+    'ielts': ('ielts',         float),
+    'toeic': ('toeic',         float),
+    'gept':  ('gept',          GEPT_LEVELS.get),
+    'cefr':  ('language_cefr', CEFR_LEVELS.get),
+    'jlpt':  ('jlpt',          JLPT_LEVELS.get),
+}
+LANGUAGE_TESTS = ('toefl', 'ielts', 'toeic', 'gept', 'cefr', 'jlpt')
+
+# 年級：學制 → 最高年級
+DEGREES = {'大': 7, '碩': 4, '博': 7}
+CHINESE_NUMERALS = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7}
+GRADE_PATTERN = re.compile(r'([大碩博])([一二三四五六七])(以上)?')
+
+
+def parse_grade_cells(grade_requirement: str | None) -> set[str] | None:
+    """
+    '大一以上/碩一/碩二' → {'大1', ..., '大7', '碩1', '碩2'}
+    沒有可辨識的年級（或欄位為空）回傳 None，代表不限
+    """
+    if not grade_requirement:
+        return None
+    cells = set()
+    for degree, numeral, and_above in GRADE_PATTERN.findall(grade_requirement):
+        year = CHINESE_NUMERALS[numeral]
+        last = DEGREES[degree] if and_above else year
+        cells.update(f'{degree}{y}' for y in range(year, last + 1))
+    return cells or None
+
+
+def _parse_student_grade(grade: str) -> str:
+    """'大三' / '大3' → '大3'"""
+    m = re.fullmatch(r'([大碩博])([一二三四五六七1-7])', grade.strip())
+    if not m:
+        raise ValueError(f'無法辨識年級: {grade}（例：大三、碩一）')
+    year = CHINESE_NUMERALS.get(m.group(2)) or int(m.group(2))
+    return f'{m.group(1)}{year}'
+
+
+# ── 門檻索引 ─────────────────────────────────────────────────
+
+class ThresholdIndex:
+    """
+    排序後的門檻陣列 + 累積 bitset
+    at_most(v)：門檻 ≤ v 的學校；required：有設定此門檻的學校
+    """
+
+    def __init__(self, thresholds: list[float], order: list[int]):
+        self.thresholds = thresholds      # 已排序的門檻
+        self.order = order                # 對應的學校位置
+        # prefix_bits[k] = 前 k 個門檻的學校聯集（載入時重建，存檔只需 thresholds + order）
+        self.prefix_bits = [0]
+        for i in order:
+            self.prefix_bits.append(self.prefix_bits[-1] | (1 << i))
+        self.required = self.prefix_bits[-1]
+
+    @classmethod
+    def build(cls, values: list[float | None]) -> 'ThresholdIndex':
+        pairs = sorted((v, i) for i, v in enumerate(values) if v is not None)
+        return cls([v for v, _ in pairs], [i for _, i in pairs])
+
+    def at_most(self, value: float) -> int:
+        return self.prefix_bits[bisect_right(self.thresholds, value)]
+
+
+# ── 主索引 ───────────────────────────────────────────────────
+
+class EligibilityIndex:
+
+    def __init__(self, ids, thresholds, groups, semesters, regions, grades, no_fail):
+        self.ids: list[str] = ids
+        self.all_bits = (1 << len(ids)) - 1
+        self.thresholds: dict[str, ThresholdIndex] = thresholds
+        self.groups: dict[str, int] = groups          # 語言組別 → bitset
+        self.semesters: dict[str, int] = semesters    # Fall / Spring → bitset
+        self.regions: dict[str, int] = regions        # 地區 → bitset
+        self.grades: dict[str, int] = grades          # '大3' → bitset（不限年級的學校在每一格都有）
+        self.no_fail: int = no_fail                   # 要求無不及格科目的學校
+
+    @classmethod
+    def build(cls, schools: list[dict]) -> 'EligibilityIndex':
+        ids = [str(s['id']) for s in schools]
+
+        thresholds = {}
+        for name, (field, convert) in THRESHOLD_FIELDS.items():
+            values = [convert(s[field]) if s.get(field) is not None else None for s in schools]
+            thresholds[name] = ThresholdIndex.build(values)
+
+        groups: dict[str, int] = {}
+        semesters: dict[str, int] = {}
+        regions: dict[str, int] = {}
+        grades = {f'{d}{y}': 0 for d, last in DEGREES.items() for y in range(1, last + 1)}
+        no_fail = 0
+
+        for i, s in enumerate(schools):
+            bit = 1 << i
+            for group in (s.get('language_group') or '一般組').split('/'):
+                groups[group] = groups.get(group, 0) | bit
+            for semester in (s.get('semesters') or 'Fall,Spring').split(','):
+                semesters[semester] = semesters.get(semester, 0) | bit
+            region = to_region(s.get('country'))
+            regions[region] = regions.get(region, 0) | bit
+            cells = parse_grade_cells(s.get('grade_requirement'))
+            for cell in grades:
+                if cells is None or cell in cells:
+                    grades[cell] |= bit
+            if s.get('no_fail_required'):
+                no_fail |= bit
+
+        return cls(ids, thresholds, groups, semesters, regions, grades, no_fail)
+
+    # ── 查詢 ────────────────────────────────────────────────
+
+    def query_bits(self, gpa=None, toefl=None, ielts=None, toeic=None, gept=None, cefr=None,
+                   jlpt=None, grade=None, language_groups=None, semesters=None, regions=None,
+                   has_failed_courses=False) -> int:
+        """回傳符合條件的學校 bitset；未提供的條件不限制"""
+        bits = self.all_bits
+
+        # GPA：未設門檻，或門檻 ≤ 學生 GPA
+        if gpa is not None:
+            gpa_index = self.thresholds['gpa']
+            bits &= ~gpa_index.required | gpa_index.at_most(gpa)
+
+        # 語言：任一項檢定達標即可；學校沒有列任何語言檢定則不限
+        student = {
+            'toefl': toefl, 'ielts': ielts, 'toeic': toeic,
+            'gept': GEPT_LEVELS.get(gept) if gept else None,
+            'cefr': CEFR_LEVELS.get(cefr.upper()) if cefr else None,
+            'jlpt': JLPT_LEVELS.get(jlpt.upper()) if jlpt else None,
+        }
+        if any(v is not None for v in student.values()):
+            any_required = 0
+            language_ok = 0
+            for test in LANGUAGE_TESTS:
+                index = self.thresholds[test]
+                any_required |= index.required
+                if student[test] is not None:
+                    language_ok |= index.at_most(student[test])
+            bits &= ~any_required | language_ok
+
+        if grade:
+            bits &= self.grades[_parse_student_grade(grade)]
+        if has_failed_courses:
+            bits &= ~self.no_fail
+        if language_groups:
+            bits &= self._union(self.groups, language_groups)
+        if semesters:
+            bits &= self._union(self.semesters, semesters)
+        if regions:
+            bits &= self._union(self.regions, regions)
+
+        return bits & self.all_bits
+
+    def query(self, **criteria) -> list[str]:
+        """回傳符合條件的學校 id（依原始順序）"""
+        return self.bits_to_ids(self.query_bits(**criteria))
+
+    def bits_to_ids(self, bits: int) -> list[str]:
+        # 反轉後的二進位字串：第 i 個字元即第 i 所學校
+        flags = bin(bits)[:1:-1]
+        ids = []
+        pos = flags.find('1')
+        while pos != -1:
+            ids.append(self.ids[pos])
+            pos = flags.find('1', pos + 1)
+        return ids
+
+    @staticmethod
+    def _union(table: dict[str, int], keys) -> int:
+        bits = 0
+        for key in ([keys] if isinstance(keys, str) else keys):
+            bits |= table.get(key, 0)
+        return bits
+
+    # ── 存檔 / 載入（bitset 以 hex 字串存放）───────────────────
+
+    def to_json(self) -> dict:
+        return {
+            'ids': self.ids,
+            'thresholds': {
+                name: {'values': idx.thresholds, 'order': idx.order}
+                for name, idx in self.thresholds.items()
+            },
+            'groups': {k: format(v, 'x') for k, v in self.groups.items()},
+            'semesters': {k: format(v, 'x') for k, v in self.semesters.items()},
+            'regions': {k: format(v, 'x') for k, v in self.regions.items()},
+            'grades': {k: format(v, 'x') for k, v in self.grades.items()},
+            'no_fail': format(self.no_fail, 'x'),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'EligibilityIndex':
+        def bitmap(table):
+            return {k: int(v, 16) for k, v in table.items()}
+        thresholds = {
+            name: ThresholdIndex(t['values'], t['order'])
+            for name, t in data['thresholds'].items()
+        }
+        return cls(data['ids'], thresholds, bitmap(data['groups']), bitmap(data['semesters']),
+                   bitmap(data['regions']), bitmap(data['grades']), int(data['no_fail'], 16))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path) -> 'EligibilityIndex':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+
+def index_path(semester: int) -> Path:
+    return BASE_DIR / f'eligibility_index_sem{semester}.json'
+
+
+def build_index_file(schools: list[dict], semester: int) -> Path:
+    """fetch_schools_v2 存檔後呼叫：只納入有詳細頁資料的學校"""
+    detailed = [s for s in schools if 'eligibility_text' in s]
+    path = index_path(semester)
+    EligibilityIndex.build(detailed).save(path)
+    return path
+
+
+# ── CLI ──────────────────────────────────────────────────────
+
+def _parse_criteria(pairs: list[str]) -> dict:
+    criteria = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        if key in ('gpa', 'toefl', 'ielts', 'toeic'):
+            criteria[key] = float(value)
+        elif key in ('language_groups', 'semesters', 'regions'):
+            criteria[key] = value.split(',')
+        elif key == 'has_failed_courses':
+            criteria[key] = value.lower() in ('1', 'true', 'yes')
+        else:
+            criteria[key] = value
+    return criteria
+
+
+def main():
+    parser = argparse.ArgumentParser(description='建立 / 查詢學校申請資格索引')
+    parser.add_argument('--semester', type=int, default=2)
+    parser.add_argument('--input', help='學校 JSON（預設 raw_schools_v2_sem{N}.json）')
+    parser.add_argument('--query', nargs='+', metavar='KEY=VALUE',
+                        help='查詢條件，例：gpa=3.6 ielts=6.5 jlpt=N2 grade=大三')
+    args = parser.parse_args()
+
+    if args.query:
+        index = EligibilityIndex.load(index_path(args.semester))
+        ids = index.query(**_parse_criteria(args.query))
+        print(f'符合條件: {len(ids)} / {len(index.ids)} 所')
+        print(','.join(ids))
+        return
+
+    input_file = Path(args.input) if args.input else BASE_DIR / f'raw_schools_v2_sem{args.semester}.json'
+    if not input_file.exists():
+        print(f'找不到 {input_file}')
+        sys.exit(1)
+    with open(input_file, encoding='utf-8') as f:
+        schools = json.load(f)
+    path = build_index_file(schools, args.semester)
+    print(f'已建立索引: {path}（{path.stat().st_size / 1024:.1f} KB）')
+
+
+if __name__ == '__main__':
+    profiling.run(main)
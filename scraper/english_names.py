@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+英文校名萃取（extract_english_names.py / final_extract.py / test_extract.py 共用）
+
+raw_schools.json 的 text_content 中，校名區塊固定在「主選單」那一行之後：
+  主選單
+  聖保羅大學
+  Universidade de São Paulo (USP)
+fetch_schools.py 只保留主要內容區塊後，校名區塊則是全文的前兩行。
+以預先編譯的錨點 regex 直接定位這兩行，不必把整頁切行逐行掃描；
+全部學校以 pandas 的 str.extract 一次處理。
+
+fetch_schools_v2.py 已直接從 <h2 class="university-title"> 取得結構化的 name_en，
+有 v2 資料時以 v2 為準（name_map 的 v2_schools 參數，load_v2_schools 載入所有學期）。
+
+用法:
+  python english_names.py      # 以 raw_schools_v2.json 的 name_en 為標準，計算 precision / recall
+"""
+
+import json
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import profiling
+
+BASE_DIR = Path(__file__).parent
+
+# 舊版 text_content（整個 body）：「主選單」之後的兩行
+ANCHORED_TITLE = re.compile(r'(?:^|\n)[ \t]*主選單[ \t]*\n(?P<name_zh>[^\n]*)\n(?P<name_en>[^\n]*)')
+# 只含主要內容的 text_content：開頭兩行
+LEADING_TITLE = re.compile(r'\A\s*(?P<name_zh>[^\n]*)\n(?P<name_en>[^\n]*)')
+# 英文校名至少要有拉丁字母，且不是臺大自己的頁首
+LATIN = re.compile(r'[A-Za-zÀ-ÿ]')
+NTU_HEADER = ('Office of International Affairs', 'National Taiwan University')
+
+
+def _valid(name: str) -> bool:
+    return bool(name) and bool(LATIN.search(name)) and not any(h in name for h in NTU_HEADER)
+
+
+def extract_english_name(text_content: str) -> str:
+    """從單一學校的 text_content 取出英文校名，找不到回傳空字串"""
+    if not text_content:
+        return ''
+    m = ANCHORED_TITLE.search(text_content)
+    if not m and '主選單' not in text_content:
+        m = LEADING_TITLE.match(text_content)
+    name = m['name_en'].strip() if m else ''
+    return name if _valid(name) else ''
+
+
+def extract_english_names(texts: pd.Series) -> pd.Series:
+    """一次處理所有學校（與 extract_english_name 結果相同）"""
+    texts = texts.fillna('').astype(str)
+    names = texts.str.extract(ANCHORED_TITLE)['name_en']
+
+    # 沒有「主選單」的新版 text_content 改取開頭兩行
+    leading = names.isna() & ~texts.str.contains('主選單', regex=False)
+    if leading.any():
+        names[leading] = texts[leading].str.extract(LEADING_TITLE)['name_en']
+
+    names = names.fillna('').str.strip()
+    valid = names.str.contains(LATIN) & ~names.str.contains('|'.join(NTU_HEADER))
+    return names.where(valid, '')
+
+
+def name_map(raw_schools: list[dict], v2_schools: list[dict] | None = None) -> dict[str, str]:
+    """
+    學校 id → 英文校名
+    v2_schools 有 name_en 時優先使用，其餘由 raw_schools 的 text_content 萃取
+    """
+    df = pd.DataFrame(raw_schools, columns=['id', 'text_content'])
+    names = extract_english_names(df['text_content'])
+    result = {str(i): n for i, n in zip(df['id'], names) if n}
+    for school in v2_schools or []:
+        if school.get('name_en'):
+            result[str(school['id'])] = school['name_en'].strip()
+    return result
+
+
+def load_v2_schools(directory: Path = BASE_DIR) -> list[dict]:
+    """所有學期的 raw_schools_v2*.json（不含 --list-only 的暫存檔），給 name_map 的 v2_schools"""
+    schools = []
+    for path in sorted(directory.glob('raw_schools_v2*.json')):
+        if path.stem.endswith('_list_only'):
+            continue
+        with open(path, encoding='utf-8') as f:
+            schools += json.load(f)
+    return schools
+
+
+def evaluate(raw_schools: list[dict], v2_schools: list[dict]) -> dict:
+    """以 v2 的 name_en 為標準答案，計算 text_content 萃取的 precision / recall"""
+    raw_ids = {str(s['id']) for s in raw_schools}
+    truth = {str(s['id']): s.get('name_en', '').strip() for s in v2_schools if str(s['id']) in raw_ids}
+    predicted = name_map([s for s in raw_schools if str(s['id']) in truth])
+    labelled = [i for i, t in truth.items() if t]
+    correct = sum(1 for i in labelled if predicted.get(i) == truth[i])
+    return {
+        'schools': len(labelled),
+        'predicted': len(predicted),
+        'correct': correct,
+        'precision': correct / len(predicted) if predicted else 0.0,
+        'recall': correct / len(labelled) if labelled else 0.0,
+        'mismatches': [(i, predicted.get(i, ''), truth[i]) for i in labelled if predicted.get(i) != truth[i]],
+    }
+
+
+def main():
+    with open(BASE_DIR / 'raw_schools.json', encoding='utf-8') as f:
+        raw_schools = json.load(f)
+    with open(BASE_DIR / 'raw_schools_v2.json', encoding='utf-8') as f:
+        v2_schools = json.load(f)
+
+    start = time.perf_counter()
+    result = evaluate(raw_schools, v2_schools)
+    elapsed = time.perf_counter() - start
+
+    print(f"有 v2 name_en 的學校: {result['schools']}")
+    print(f"萃取到英文校名: {result['predicted']}，正確 {result['correct']}")
+    print(f"precision: {result['precision']:.3f}  recall: {result['recall']:.3f}  ({elapsed * 1000:.1f} ms)")
+    for school_id, got, expected in result['mismatches']:
+        print(f"  {school_id}: {got!r} ≠ {expected!r}")
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+從心得 PDF 萃取文字與圖片，產生 pdf_extracts/<student_id>/content.json
+
+輸入為 fetch_experiences.py 輸出的 experiences_data.json（每位學生的 pdf_links）：
+1. 下載 PDF 到 pdfs/<URL 的 SHA-256 前 16 碼>.pdf（thread pool，同一個 URL 只抓一次）
+   已下載過的以 pdfs/<同名>.json 記錄的 ETag / Last-Modified 發條件式請求：304 沿用本機檔案，
+   200 則重新下載（伺服器沒給 ETag / Last-Modified 時每次都重抓）；下載失敗時沿用本機檔案
+2. 以 PDF 內容的 SHA-256 判斷是否需要重做：與 content.json 記錄的 pdf_sha256 相同就跳過
+3. 需要處理的學生丟進 process pool，各自萃取文字與內嵌圖片並寫出 content.json
+
+content.json 格式（upload_to_supabase.py / migrate_images_to_cloudinary.py 使用）：
+  {
+    "student_id": "12894",
+    "student_info": {"name", "school", "country", "college", "department", "degree", "year_info"},
+    "pdfs": [{"url", "text", "sha256", "pages"}],
+    "pdf_sha256": [...],
+    "text": "全部 PDF 的文字",
+    "images": [{"id", "local_path", "filename", "format", "width", "height", "page"}]
+  }
+
+需要 PyMuPDF（pip install pymupdf）。
+
+用法:
+  python extract_pdfs.py
+  python extract_pdfs.py --input experiences_data.json --workers 8
+  python extract_pdfs.py --student-id 12894 --force
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scraper/profiling.py
+import profiling  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EXTRACTS_DIR = Path("pdf_extracts")
+PDF_DIR = Path("pdfs")
+MIN_IMAGE_SIDE = 64   # 小於此尺寸的內嵌圖片（icon、線條、logo 碎片）不輸出
+STUDENT_INFO_FIELDS = ['name', 'school', 'country', 'college', 'department', 'degree', 'year_info']
+
+
+def student_id_of(student: dict) -> str | None:
+    """從心得頁 URL 取出學生 ID（網址中最後一段數字）"""
+    numbers = re.findall(r'\d+', student.get('detail_url', ''))
+    return numbers[-1] if numbers else None
+
+
+# ── 下載 ─────────────────────────────────────────────────────
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """每個 thread 一個 Session（requests.Session 不保證 thread-safe）"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def pdf_path(url: str) -> Path:
+    """本機檔名由 URL 決定（不依連結順序），URL 與內容不會錯配"""
+    return PDF_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}.pdf"
+
+
+def _load_meta(meta_file: Path) -> dict:
+    try:
+        with open(meta_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def download_pdf(url: str) -> tuple[Path, str] | None:
+    """
+    下載（或重新驗證）一個 PDF，回傳 (本機路徑, 內容 SHA-256)
+    本機已有檔案時帶 If-None-Match / If-Modified-Since，304 才沿用本機檔案
+    """
+    target = pdf_path(url)
+    meta_file = target.with_suffix('.json')
+    meta = _load_meta(meta_file) if target.exists() else {}
+    cached = (target, meta['sha256']) if meta.get('url') == url and meta.get('sha256') else None
+
+    headers = {}
+    if cached and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if cached and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        with get_session().get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 304 and cached:
+                return cached
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            tmp = target.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                for chunk in response.iter_content(64 * 1024):
+                    digest.update(chunk)
+                    f.write(chunk)
+            tmp.replace(target)
+            meta = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest.hexdigest(),
+            }
+        with open(meta_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return target, meta['sha256']
+    except Exception as e:
+        if cached:
+            logger.warning(f"⚠ 無法重新驗證 {url}，沿用本機檔案: {e}")
+            return cached
+        logger.error(f"✗ 下載失敗 {url}: {e}")
+        return None
+
+
+# ── 萃取（子行程）────────────────────────────────────────────
+
+def extract_student(student_id: str, student_info: dict, pdfs: list[tuple[str, str, str, str]]) -> dict:
+    """
+    萃取一位學生所有 PDF 的文字與圖片並寫出 content.json
+    pdfs: [(url, 連結文字, 本機路徑, sha256)]
+    """
+    import pymupdf
+
+    out_dir = EXTRACTS_DIR / student_id
+    image_dir = out_dir / 'images'
+    image_dir.mkdir(parents=True, exist_ok=True)
+
+    texts = []
+    pdf_records = []
+    images = []
+    for url, link_text, local, sha in pdfs:
+        with pymupdf.open(local) as doc:
+            pages = [page.get_text() for page in doc]
+            texts.append('\n'.join(pages).strip())
+            pdf_records.append({'url': url, 'text': link_text, 'sha256': sha, 'pages': doc.page_count})
+
+            seen = set()
+            for page_no, page in enumerate(doc, 1):
+                for info in page.get_images(full=True):
+                    xref = info[0]
+                    if xref in seen:
+                        continue
+                    seen.add(xref)
+                    extracted = doc.extract_image(xref)
+                    if not extracted or min(extracted['width'], extracted['height']) < MIN_IMAGE_SIDE:
+                        continue
+                    fmt = 'jpeg' if extracted['ext'] in ('jpg', 'jpeg') else extracted['ext']
+                    n = len(images) + 1
+                    filename = f"{n:03d}.{extracted['ext']}"
+                    (image_dir / filename).write_bytes(extracted['image'])
+                    images.append({
+                        'id': f"{student_id}_img_{n:03d}",
+                        'local_path': f"{student_id}/images/{filename}",
+                        'filename': filename,
+                        'format': fmt,
+                        'width': extracted['width'],
+                        'height': extracted['height'],
+                        'page': page_no,
+                    })
+
+    content = {
+        'student_id': student_id,
+        'student_info': student_info,
+        'pdfs': pdf_records,
+        'pdf_sha256': [p['sha256'] for p in pdf_records],
+        'text': '\n\n'.join(texts),
+        'images': images,
+    }
+    tmp = out_dir / 'content.json.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(content, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out_dir / 'content.json')
+    return {'student_id': student_id, 'images': len(images), 'chars': len(content['text'])}
+
+
+# ── 主流程 ───────────────────────────────────────────────────
+
+def already_extracted(student_id: str, hashes: list[str]) -> bool:
+    content_file = EXTRACTS_DIR / student_id / 'content.json'
+    if not content_file.exists():
+        return False
+    with open(content_file, encoding='utf-8') as f:
+        recorded = json.load(f).get('pdf_sha256')
+    # 舊版萃取結果沒有 hash 記錄（圖片可能已上傳），除非 --force 否則保留
+    return recorded is None or recorded == hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='從心得 PDF 萃取文字與圖片')
+    parser.add_argument('--input', default='experiences_data.json', help='fetch_experiences.py 的輸出')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='萃取用 process 數')
+    parser.add_argument('--download-workers', type=int, default=8, help='下載用 thread 數')
+    parser.add_argument('--student-id', help='只處理指定的學生 ID')
+    parser.add_argument('--force', action='store_true', help='忽略 content hash，全部重新萃取')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.input, encoding='utf-8') as f:
+        experiences = json.load(f)
+
+    students = {}
+    for student in experiences:
+        student_id = student_id_of(student)
+        if not student_id or not student.get('pdf_links'):
+            continue
+        if args.student_id and student_id != args.student_id:
+            continue
+        students[student_id] = student
+
+    logger.info("=" * 60)
+    logger.info(f"心得 PDF 萃取：{len(students)} 位學生")
+    logger.info("=" * 60)
+
+    # 1. 下載（同一個 URL 只抓一次）
+    PDF_DIR.mkdir(exist_ok=True)
+    urls = {link['url'] for student in students.values() for link in student['pdf_links']}
+    with ThreadPoolExecutor(max_workers=args.download_workers) as pool:
+        downloads = dict(zip(urls, pool.map(download_pdf, urls)))
+
+    # 2. 依內容 hash 決定要處理的學生
+    jobs = []
+    skipped = 0
+    for student_id, student in students.items():
+        pdfs = [(link['url'], link.get('text', ''), str(downloads[link['url']][0]), downloads[link['url']][1])
+                for link in student['pdf_links'] if downloads[link['url']]]
+        if not pdfs:
+            continue
+        if not args.force and already_extracted(student_id, [p[3] for p in pdfs]):
+            skipped += 1
+            continue
+        info = {k: student.get(k, '') for k in STUDENT_INFO_FIELDS}
+        jobs.append((student_id, info, pdfs))
+    logger.info(f"需要萃取 {len(jobs)} 位，內容未變略過 {skipped} 位")
+
+    # 3. 萃取
+    done = failed = images = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(extract_student, *job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            student_id = futures[future]
+            try:
+                result = future.result()
+                done += 1
+                images += result['images']
+                logger.info(f"  ✓ [{done}/{len(jobs)}] {student_id}: {result['chars']} 字, {result['images']} 張圖片")
+            except Exception as e:
+                failed += 1
+                logger.error(f"  ✗ {student_id} 萃取失敗: {e}")
+
+    logger.info("=" * 60)
+    logger.info(f"完成 {done} 位（{images} 張圖片），略過 {skipped} 位，失敗 {failed} 位")
+    logger.info(f"耗時 {time.perf_counter() - start:.1f} 秒")
+    logger.info("=" * 60)
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -2,6 +2,10 @@
 """
 爬取台大 OIA 網站交換學生心得
 URL: https://oia.ntu.edu.tw/students/outgoing.students.experience.do/
+
+用法:
+  python fetch_experiences.py
+  python fetch_experiences.py --base-url http://127.0.0.1:8765  # 改爬本機替身（../oia_replay_server.py）
 """
 
 import json
@@ -11,6 +15,11 @@ from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 import logging
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scraper/profiling.py、browser_service.py
+import browser_service  # noqa: E402
+import profiling  # noqa: E402
 
 # 設定日誌：同時輸出到終端和檔案
 log_file = 'fetch_log.txt'
@@ -25,6 +34,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://oia.ntu.edu.tw"
+if '--base-url' in sys.argv:
+    url_idx = sys.argv.index('--base-url')
+    if url_idx + 1 < len(sys.argv):
+        BASE_URL = sys.argv[url_idx + 1].rstrip('/')
 EXPERIENCE_URL = f"{BASE_URL}/students/outgoing.students.experience.do/"
 DELAY_BETWEEN_REQUESTS = 1  # 秒
 YEARS = ["113"]  # 要爬取的年度（測試用：只處理 113 年度）
@@ -277,8 +290,8 @@ def main():
     all_experiences = []
 
     with sync_playwright() as p:
-        # 啟動瀏覽器
-        browser = p.chromium.launch(headless=True)
+        # 啟動瀏覽器（有常駐瀏覽器時直接連上，見 ../browser_service.py）
+        browser = browser_service.launch(p)
         context = browser.new_context(
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         )
@@ -323,7 +336,8 @@ def main():
                 time.sleep(2)
 
                 # 提取學生列表
-                students = extract_student_list(page)
+                with profiling.stage('list'):
+                    students = extract_student_list(page)
                 logger.info(f"年度 {year}: 找到 {len(students)} 位學生")
 
                 # 對每位學生提取心得詳細資訊
@@ -331,7 +345,8 @@ def main():
                     logger.info(f"[{idx}/{len(students)}] 處理: {student['name']} - {student['school']}")
 
                     try:
-                        details = extract_experience_details(page, student['detail_url'])
+                        with profiling.stage('detail'):
+                            details = extract_experience_details(page, student['detail_url'])
 
                         if details:
                             student.update(details)
@@ -353,7 +368,7 @@ def main():
 
             # 儲存資料
             output_file = 'experiences_data.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
+            with profiling.stage('write'), open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(all_experiences, f, ensure_ascii=False, indent=2)
 
             logger.info("=" * 60)
@@ -371,4 +386,4 @@ def main():
             browser.close()
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
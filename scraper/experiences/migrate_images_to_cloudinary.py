@@ -10,16 +10,29 @@
    export SUPABASE_SERVICE_ROLE_KEY="your_service_role_key"
 
 2. 執行: python migrate_images_to_cloudinary.py
+
+選項:
+  --workers N        同時進行的傳輸數（預設 6）
+  --rate R           每秒最多啟動幾個傳輸（預設 5，0 為不限）
+  --checkpoint PATH  進度檔（預設 pdf_extracts/migrate_checkpoint.json），中斷後重跑會從這裡接續
+  --legacy           使用舊的逐張下載 + base64 上傳模式
 """
 
 import json
 import os
+import re
 import requests
+import sys
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from supabase import create_client, Client
 import logging
 
+from streaming_migrate import migrate_all
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scraper/profiling.py
+import profiling  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -32,17 +45,28 @@ STORAGE_BUCKET = "experience-images"
 CLOUDINARY_CLOUD_NAME = os.getenv("NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_UPLOAD_PRESET = os.getenv("CLOUDINARY_UPLOAD_PRESET")
 
-if not all([SUPABASE_URL, SUPABASE_KEY, CLOUDINARY_CLOUD_NAME, CLOUDINARY_UPLOAD_PRESET]):
-    raise ValueError("請設定所有必要的環境變數: SUPABASE_URL, SUPABASE_KEY, CLOUDINARY_CLOUD_NAME, CLOUDINARY_UPLOAD_PRESET")
+supabase = None
+
+
+def check_env():
+    if not all([SUPABASE_URL, SUPABASE_KEY, CLOUDINARY_CLOUD_NAME, CLOUDINARY_UPLOAD_PRESET]):
+        raise ValueError("請設定所有必要的環境變數: SUPABASE_URL, SUPABASE_KEY, CLOUDINARY_CLOUD_NAME, CLOUDINARY_UPLOAD_PRESET")
 
-# 初始化 Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def get_supabase():
+    """第一次使用時才建立 Supabase client"""
+    global supabase
+    if supabase is None:
+        check_env()
+        from supabase import create_client
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase
 
 def download_from_supabase(storage_path: str) -> bytes:
     """從 Supabase Storage 下載圖片"""
     try:
         # 注意：get_public_url 不需要前導斜線，但下載需要
-        download_url = supabase.storage.from_(STORAGE_BUCKET).get_public_url(storage_path)
+        download_url = get_supabase().storage.from_(STORAGE_BUCKET).get_public_url(storage_path)
 
         response = requests.get(download_url)
         response.raise_for_status()
@@ -181,7 +205,7 @@ def update_supabase_posts(student_id: str, content_data: dict):
         # 分別搜尋學生姓名和學校名稱，避免因空格或換行導致搜尋失敗
 
         # 在 Supabase 中搜索匹配的 Post (同時包含學生姓名和學校名稱)
-        response = supabase.table('Post').select('id, content, title').ilike('content', f'%{student_name}%').ilike('content', f'%{school_name}%').eq('status', 'published').execute()
+        response = get_supabase().table('Post').select('id, content, title').ilike('content', f'%{student_name}%').ilike('content', f'%{school_name}%').eq('status', 'published').execute()
 
         if response.data and len(response.data) > 0:
             logger.info(f"✓ 找到 {len(response.data)} 個匹配的 Post 記錄")
@@ -207,7 +231,7 @@ def update_supabase_posts(student_id: str, content_data: dict):
 
                 if url_replacements > 0:
                     # 更新 Post
-                    update_response = supabase.table('Post').update({
+                    update_response = get_supabase().table('Post').update({
                         'content': updated_content,
                         'updatedAt': 'now()'
                     }).eq('id', post['id']).execute()
@@ -228,6 +252,92 @@ def update_supabase_posts(student_id: str, content_data: dict):
         logger.error(f"更新 Supabase Post 失敗 {student_id}: {e}")
         return False
 
+POST_PAGE_SIZE = 500
+UPSERT_BATCH_SIZE = 100
+
+
+def build_url_mapping(pdf_extracts_dir: Path, student_ids=None) -> dict[str, str]:
+    """從所有 content.json 建立 舊 Supabase URL → Cloudinary URL 對照表"""
+    mapping = {}
+    for content_file in sorted(pdf_extracts_dir.glob('*/content.json')):
+        student_id = content_file.parent.name
+        if student_ids and student_id not in student_ids:
+            continue
+        with open(content_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for img in data.get('images', []):
+            if img.get('migrated_from') != 'supabase':
+                continue
+            old_url = img.get('migrated_from_url') or (
+                f"{SUPABASE_URL}/storage/v1/object/public/{STORAGE_BUCKET}/{student_id}/{img['filename']}"
+            )
+            mapping[old_url] = img['url']
+    return mapping
+
+
+def compile_replacer(mapping: dict[str, str]):
+    """所有舊 URL 編成一個 regex（長的優先），一次掃過文字完成全部替換"""
+    pattern = re.compile('|'.join(re.escape(url) for url in sorted(mapping, key=len, reverse=True)))
+
+    def replace(text: str) -> tuple[str, int]:
+        return pattern.subn(lambda m: mapping[m.group(0)], text)
+
+    return replace
+
+
+def bulk_update_supabase_posts(mapping: dict[str, str], dry_run: bool = False) -> dict:
+    """
+    一次處理所有 Post：分頁讀取含 Supabase Storage URL 的文章，
+    以單一 regex 替換所有圖片 URL，再分批 upsert 寫回
+    """
+    stats = {'scanned': 0, 'changed': 0, 'replacements': 0, 'round_trips': 0}
+    if not mapping:
+        logger.info("沒有已遷移的圖片 URL，略過 Post 更新")
+        return stats
+
+    client = get_supabase()
+    replace = compile_replacer(mapping)
+    marker = f"%/storage/v1/object/public/{STORAGE_BUCKET}/%"
+
+    # 1. 分頁讀取候選文章（只取 id 與 content）
+    changed = {}
+    offset = 0
+    while True:
+        response = (client.table('Post').select('id, content')
+                    .eq('status', 'published').ilike('content', marker)
+                    .order('id').range(offset, offset + POST_PAGE_SIZE - 1).execute())
+        stats['round_trips'] += 1
+        page = response.data or []
+        for post in page:
+            content, n = replace(post['content'] or '')
+            if n:
+                changed[post['id']] = content
+                stats['replacements'] += n
+        stats['scanned'] += len(page)
+        if len(page) < POST_PAGE_SIZE:
+            break
+        offset += POST_PAGE_SIZE
+
+    stats['changed'] = len(changed)
+    logger.info(f"掃描 {stats['scanned']} 篇 Post，{stats['changed']} 篇需要更新（{stats['replacements']} 個 URL）")
+    if dry_run or not changed:
+        return stats
+
+    # 2. 分批寫回；upsert 需要完整的資料列（NOT NULL 欄位），所以先取回整列再改 content
+    now = datetime.now(timezone.utc).isoformat()
+    ids = list(changed)
+    for i in range(0, len(ids), UPSERT_BATCH_SIZE):
+        batch_ids = ids[i:i + UPSERT_BATCH_SIZE]
+        rows = client.table('Post').select('*').in_('id', batch_ids).execute().data or []
+        for row in rows:
+            row['content'] = changed[row['id']]
+            row['updatedAt'] = now
+        client.table('Post').upsert(rows, on_conflict='id').execute()
+        stats['round_trips'] += 2
+        logger.info(f"  ✓ 已更新 {min(i + UPSERT_BATCH_SIZE, len(ids))}/{len(ids)} 篇 Post")
+
+    return stats
+
 def main():
     """遷移所有學生的圖片"""
 
@@ -236,8 +346,15 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help='只顯示會被遷移的圖片，不實際執行')
     parser.add_argument('--update-supabase', action='store_true', help='同時更新 Supabase 中的 Post 記錄')
     parser.add_argument('--student-id', help='只處理指定的學生 ID')
+    parser.add_argument('--workers', type=int, default=6, help='同時進行的傳輸數')
+    parser.add_argument('--rate', type=float, default=5, help='每秒最多啟動幾個傳輸（0 為不限）')
+    parser.add_argument('--checkpoint', help='進度檔路徑')
+    parser.add_argument('--legacy', action='store_true', help='使用舊的逐張下載 + base64 上傳模式')
+    parser.add_argument('--rewrite-posts', action='store_true',
+                        help='不遷移圖片，只依 content.json 的 URL 對照表批次更新 Post')
 
     args = parser.parse_args()
+    check_env()
 
     pdf_extracts_dir = Path("pdf_extracts")
 
@@ -255,6 +372,39 @@ def main():
         logger.info("將同時更新 Supabase 中的 Post 記錄")
     logger.info("=" * 60)
 
+    student_ids = {args.student_id} if args.student_id else None
+
+    if args.rewrite_posts:
+        mapping = build_url_mapping(pdf_extracts_dir, student_ids)
+        stats = bulk_update_supabase_posts(mapping, dry_run=args.dry_run)
+        logger.info(f"{len(mapping)} 個 URL 對照，更新 {stats['changed']} 篇 Post，"
+                    f"共 {stats['round_trips']} 次資料庫請求")
+        return
+
+    if not args.legacy:
+        stats = migrate_all(
+            pdf_extracts_dir, CLOUDINARY_CLOUD_NAME, CLOUDINARY_UPLOAD_PRESET,
+            workers=args.workers, rate=args.rate, checkpoint_path=args.checkpoint,
+            student_ids=student_ids, dry_run=args.dry_run,
+        )
+
+        if args.update_supabase and not args.dry_run and stats['updated']:
+            # 所有學生的 URL 對照一起處理，不再逐位學生搜尋 Post
+            mapping = build_url_mapping(pdf_extracts_dir, student_ids)
+            bulk_update_supabase_posts(mapping)
+
+        logger.info("\n" + "=" * 60)
+        if args.dry_run:
+            logger.info(f"DRY RUN 完成 - 會遷移 {stats['migrated']} 張圖片")
+        else:
+            mb = stats['bytes'] / 1024 / 1024
+            logger.info(f"遷移完成 - 成功遷移 {stats['migrated']} 張圖片（{mb:.1f} MB），"
+                        f"從 checkpoint 恢復 {stats['resumed']} 張，失敗 {stats['failed']} 張")
+            logger.info(f"更新 {len(stats['updated'])} 個文件，耗時 {stats['seconds']:.1f} 秒"
+                        f"（{mb / max(stats['seconds'], 1e-9):.2f} MB/s）")
+        logger.info("=" * 60)
+        return
+
     # 遍歷所有學生目錄
     student_dirs = [d for d in pdf_extracts_dir.iterdir() if d.is_dir()]
 
@@ -307,4 +457,4 @@ def main():
     logger.info("=" * 60)
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
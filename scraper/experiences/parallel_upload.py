@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+平行上傳心得圖片（upload_to_supabase.py 使用的上傳引擎）
+
+- 一次掃描所有 pdf_extracts/*/content.json，所有圖片丟進同一個 thread pool
+- 以「同時上傳中的位元組數」設上限，避免大圖同時佔滿記憶體 / 頻寬
+- 檔案以串流方式上傳（傳入 file handle，不先整個讀進記憶體）
+- 以內容 SHA-256 作為儲存路徑（by-hash/<sha256>.<ext>），bucket 中已存在的直接跳過，
+  不同學生的重複圖片也只會上傳一次
+- 所有上傳完成後，每個 content.json 只重寫一次（且只在有變更時）
+- 經過 process_images.py 處理的圖片，縮圖等其他版本也一併上傳，URL 寫回 variants
+
+儲存後端只需實作 list_names / upload / public_url，
+LocalStorage 用本機資料夾模擬 bucket，不需網路即可測試整個流程。
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+HASH_PREFIX = 'by-hash'
+CHUNK_SIZE = 1024 * 1024
+
+
+# ── 儲存後端 ─────────────────────────────────────────────────
+
+class SupabaseStorage:
+    """Supabase Storage bucket"""
+
+    def __init__(self, client, bucket: str, base_url: str):
+        self.bucket = client.storage.from_(bucket)
+        # 公開 URL 格式固定，算一次前綴即可，不必每張圖呼叫 get_public_url
+        self.public_prefix = f"{base_url.rstrip('/')}/storage/v1/object/public/{bucket}/"
+
+    def list_names(self, prefix: str) -> set[str]:
+        names = set()
+        offset = 0
+        while True:
+            page = self.bucket.list(prefix, {'limit': 1000, 'offset': offset})
+            names.update(item['name'] for item in page)
+            if len(page) < 1000:
+                return names
+            offset += 1000
+
+    def upload(self, path: str, fileobj, content_type: str):
+        self.bucket.upload(
+            path=path,
+            file=fileobj,
+            file_options={'content-type': content_type, 'upsert': 'true'},
+        )
+
+    def public_url(self, path: str) -> str:
+        return self.public_prefix + path
+
+
+class LocalStorage:
+    """以本機資料夾模擬 bucket（測試用）"""
+
+    def __init__(self, root, base_url: str = 'http://localhost/storage/'):
+        self.root = Path(root)
+        self.base_url = base_url
+        self.upload_count = 0
+        self._lock = threading.Lock()
+
+    def list_names(self, prefix: str) -> set[str]:
+        folder = self.root / prefix
+        return {p.name for p in folder.iterdir()} if folder.exists() else set()
+
+    def upload(self, path: str, fileobj, content_type: str):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'wb') as f:
+            shutil.copyfileobj(fileobj, f, CHUNK_SIZE)
+        with self._lock:
+            self.upload_count += 1
+
+    def public_url(self, path: str) -> str:
+        return self.base_url + path
+
+
+# ── 位元組上限 ───────────────────────────────────────────────
+
+class ByteBudget:
+    """限制同時處理中的總位元組數；單一檔案超過上限時，等其他檔案完成後單獨執行"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size: int):
+        with self._cond:
+            while self.in_flight and self.in_flight + size > self.limit:
+                self._cond.wait()
+            self.in_flight += size
+
+    def release(self, size: int):
+        with self._cond:
+            self.in_flight -= size
+            self._cond.notify_all()
+
+
+# ── 上傳工作 ─────────────────────────────────────────────────
+
+class UploadJob(NamedTuple):
+    manifest: Path       # 所屬 content.json
+    index: int           # images[] 中的位置
+    local_path: Path
+    content_type: str
+    variant: str | None = None   # process_images.py 產生的其他版本（如 'thumb'），URL 寫回 variants[variant]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_jobs(extracts_dir: Path, student_ids=None) -> tuple[dict[Path, dict], list[UploadJob]]:
+    """讀取所有 content.json，回傳 (manifest 內容, 上傳工作)"""
+    manifests = {}
+    jobs = []
+    for content_file in sorted(extracts_dir.glob('*/content.json')):
+        if student_ids and content_file.parent.name not in student_ids:
+            continue
+        with open(content_file, encoding='utf-8') as f:
+            data = json.load(f)
+        manifests[content_file] = data
+        for i, img in enumerate(data.get('images', [])):
+            local_path = extracts_dir / img['local_path']
+            if not local_path.exists():
+                logger.warning(f"✗ 找不到圖片: {local_path}")
+                continue
+            content_type = (f"image/{img['format']}" if img.get('format')
+                            else mimetypes.guess_type(local_path.name)[0] or 'application/octet-stream')
+            jobs.append(UploadJob(content_file, i, local_path, content_type))
+            # 顯示用版本就是 local_path，其餘版本（縮圖）另外上傳
+            for name, variant in img.get('variants', {}).items():
+                if name == 'display':
+                    continue
+                variant_path = extracts_dir / variant['local_path']
+                if variant_path.exists():
+                    jobs.append(UploadJob(content_file, i, variant_path, f"image/{variant['format']}", name))
+    return manifests, jobs
+
+
+def upload_all(extracts_dir, storage, workers: int = 8, max_inflight_bytes: int = 64 * 1024 * 1024,
+               student_ids=None) -> dict:
+    """
+    上傳所有圖片並更新 content.json
+    回傳統計：{'uploaded', 'skipped', 'failed', 'bytes', 'manifests_written', 'seconds'}
+    """
+    start = time.perf_counter()
+    extracts_dir = Path(extracts_dir)
+    manifests, jobs = collect_jobs(extracts_dir, student_ids)
+    logger.info(f"{len(manifests)} 個 content.json，{len(jobs)} 張圖片")
+
+    existing = storage.list_names(HASH_PREFIX)
+    logger.info(f"bucket 中已有 {len(existing)} 個檔案（{HASH_PREFIX}/）")
+
+    budget = ByteBudget(max_inflight_bytes)
+    seen_lock = threading.Lock()
+    in_progress: dict[str, threading.Event] = {}
+    stats = {'uploaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+
+    def run(job: UploadJob) -> tuple[UploadJob, str | None]:
+        size = job.local_path.stat().st_size
+        budget.acquire(size)
+        try:
+            sha = file_sha256(job.local_path)
+            name = f"{sha}{job.local_path.suffix.lower()}"
+            path = f"{HASH_PREFIX}/{name}"
+
+            # 同一內容只由一個 thread 上傳，其餘等它完成
+            with seen_lock:
+                owner = name not in existing and name not in in_progress
+                if owner:
+                    in_progress[name] = threading.Event()
+                done = in_progress.get(name)
+            if not owner:
+                if done:
+                    done.wait()
+                    if name not in existing:
+                        raise RuntimeError('同內容圖片上傳失敗')
+                with seen_lock:
+                    stats['skipped'] += 1
+                return job, storage.public_url(path)
+
+            try:
+                with open(job.local_path, 'rb') as f:
+                    storage.upload(path, f, job.content_type)
+                with seen_lock:
+                    existing.add(name)
+                    stats['uploaded'] += 1
+                    stats['bytes'] += size
+                return job, storage.public_url(path)
+            finally:
+                done.set()
+        except Exception as e:
+            logger.error(f"✗ 上傳失敗 {job.local_path}: {e}")
+            with seen_lock:
+                stats['failed'] += 1
+            return job, None
+        finally:
+            budget.release(size)
+
+    changed: set[Path] = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, job) for job in jobs]
+        for n, future in enumerate(as_completed(futures), 1):
+            job, url = future.result()
+            if url:
+                img = manifests[job.manifest]['images'][job.index]
+                if job.variant:
+                    img = img['variants'][job.variant]
+                if img.get('url') != url:
+                    img['url'] = url
+                    changed.add(job.manifest)
+            if n % 50 == 0:
+                logger.info(f"  進度 {n}/{len(jobs)}")
+
+    # 一次寫回所有有變更的 content.json
+    for content_file in sorted(changed):
+        with open(content_file, 'w', encoding='utf-8') as f:
+            json.dump(manifests[content_file], f, ensure_ascii=False, indent=2)
+
+    stats['manifests_written'] = len(changed)
+    stats['seconds'] = time.perf_counter() - start
+    return stats
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+心得圖片前處理：去重 + 重新編碼 + 縮圖（在 upload_to_supabase.py / migrate_images_to_cloudinary.py 之前執行）
+
+1. 每張圖片計算 SHA-256（完全相同）與 dHash（64-bit 感知雜湊，縮放 / 重新壓縮後仍相近）
+2. 跨學生去重：預設只有 SHA-256 相同的圖片共用同一組輸出；
+   --distance N 另外合併近似重複（同一張圖縮放 / 重新壓縮），必須同時符合：
+   - dHash 漢明距離 <= N，且兩者都不是低資訊量的雜湊（純色、水平條紋等 dHash 幾乎全 0 / 全 1 的圖）
+   - 長寬比相差 <= 2%、面積相差不超過 4 倍
+   - 16x16 RGB 縮圖逐像素比對，平均差異 <= 10
+3. 每組圖片只編碼一次（process pool）：
+   - 顯示用：長邊不超過 --max-dim（預設 1600），WebP / AVIF
+   - 縮圖：長邊不超過 --thumb-dim（預設 320）
+   輸出在 pdf_extracts/_variants/<sha 前兩碼>/<sha>.<ext>，已存在就不重做
+4. 更新 content.json：
+   - original_path: 原始檔案；local_path / filename / format 改指向顯示用版本（上傳腳本因此上傳縮小後的檔案）
+   - variants: {'display': {...}, 'thumb': {...}}（local_path、width、height、bytes、format）
+   - sha256、dhash；重複的圖片另記 duplicate_of（第一次出現的 <student_id>/<image id>）
+
+需要 Pillow（pip install Pillow）；AVIF 需要支援 AVIF 的 Pillow（11.2+）或 pillow-avif-plugin。
+
+用法:
+  python process_images.py
+  python process_images.py --format avif --max-dim 1280 --workers 8
+  python process_images.py --distance 4  # 另外合併近似重複的圖片
+  python process_images.py --dry-run     # 只計算去重結果，不寫檔
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scraper/profiling.py
+import profiling  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EXTRACTS_DIR = Path("pdf_extracts")
+VARIANTS_DIR = '_variants'
+BANDS = 5   # dHash 分段數：距離 <= BANDS - 1 的兩個雜湊至少有一段完全相同
+
+# 近似重複的條件（dHash 相近只是候選，以下全部符合才合併）
+MIN_BITS = 8            # dHash 中 1 的個數 < MIN_BITS 或 > 64 - MIN_BITS：資訊量太低，只做完全相同去重
+MAX_ASPECT_DIFF = 0.02  # 長寬比相對差異
+MAX_AREA_RATIO = 4      # 面積比（同一張圖的不同縮放）
+PIXELS = 16             # 逐像素比對的縮圖邊長
+MAX_PIXEL_DIFF = 10     # 縮圖每個通道的平均絕對差異 (0-255)
+
+
+class ImageHash(NamedTuple):
+    sha256: str
+    dhash: int
+    width: int
+    height: int
+    pixels: bytes       # PIXELS x PIXELS RGB
+
+
+# ── 雜湊 ─────────────────────────────────────────────────────
+
+def dhash(img: Image.Image) -> int:
+    """difference hash：縮成 9x8 灰階，比較相鄰像素明暗"""
+    small = img.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def hash_image(path: str) -> ImageHash:
+    with open(path, 'rb') as f:
+        sha = hashlib.sha256(f.read()).hexdigest()
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        pixels = img.convert('RGB').resize((PIXELS, PIXELS), Image.LANCZOS).tobytes()
+        return ImageHash(sha, dhash(img), img.width, img.height, pixels)
+
+
+def _informative(dh: int) -> bool:
+    return MIN_BITS <= dh.bit_count() <= 64 - MIN_BITS
+
+
+def same_picture(a: ImageHash, b: ImageHash, max_distance: int) -> bool:
+    """dHash 相近之外，確認長寬比、大小與縮圖像素也相近（避免不同的圖片被合併）"""
+    if (a.dhash ^ b.dhash).bit_count() > max_distance:
+        return False
+    if not (_informative(a.dhash) and _informative(b.dhash)):
+        return False
+    aspect_a, aspect_b = a.width / a.height, b.width / b.height
+    if abs(aspect_a - aspect_b) > MAX_ASPECT_DIFF * max(aspect_a, aspect_b):
+        return False
+    area_a, area_b = a.width * a.height, b.width * b.height
+    if max(area_a, area_b) > MAX_AREA_RATIO * min(area_a, area_b):
+        return False
+    diff = sum(abs(x - y) for x, y in zip(a.pixels, b.pixels))
+    return diff <= MAX_PIXEL_DIFF * len(a.pixels)
+
+
+def _bands(value: int) -> list[tuple[int, int]]:
+    width = -(-64 // BANDS)
+    return [(i, (value >> (i * width)) & ((1 << width) - 1)) for i in range(BANDS)]
+
+
+def group_duplicates(hashes: list[ImageHash], max_distance: int) -> list[int]:
+    """
+    回傳每張圖片所屬群組的代表索引（第一次出現者）
+    先比 SHA-256；max_distance >= 0 時再以分段索引找 dHash 候選，候選須通過 same_picture
+    """
+    max_distance = min(max_distance, BANDS - 1)
+    canonical = []
+    by_sha: dict[str, int] = {}
+    band_index: dict[tuple[int, int], list[int]] = {}
+
+    for i, h in enumerate(hashes):
+        if h.sha256 in by_sha:
+            canonical.append(by_sha[h.sha256])
+            continue
+        match = None
+        if max_distance >= 0 and _informative(h.dhash):
+            for band in _bands(h.dhash):
+                for j in band_index.get(band, ()):
+                    if same_picture(hashes[j], h, max_distance):
+                        match = j
+                        break
+                if match is not None:
+                    break
+        if match is None:
+            match = i
+            if _informative(h.dhash):
+                for band in _bands(h.dhash):
+                    band_index.setdefault(band, []).append(i)
+        by_sha[h.sha256] = match
+        canonical.append(match)
+    return canonical
+
+
+# ── 編碼 ─────────────────────────────────────────────────────
+
+def _save(img: Image.Image, path: Path, fmt: str, quality: int) -> dict:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        tmp = path.with_name(path.name + '.tmp')
+        options = {'quality': quality}
+        if fmt == 'webp':
+            options['method'] = 6
+        img.save(tmp, fmt.upper(), **options)
+        os.replace(tmp, path)
+    return {
+        'local_path': path.relative_to(EXTRACTS_DIR).as_posix(),
+        'width': img.width,
+        'height': img.height,
+        'bytes': path.stat().st_size,
+        'format': fmt,
+    }
+
+
+def encode_variants(source: str, sha: str, fmt: str, max_dim: int, thumb_dim: int, quality: int) -> dict:
+    """產生顯示用與縮圖兩個版本（在子行程中執行）"""
+    out_dir = EXTRACTS_DIR / VARIANTS_DIR / sha[:2]
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        display = img.copy()
+        display.thumbnail((max_dim, max_dim), Image.LANCZOS)
+        thumb = img.copy()
+        thumb.thumbnail((thumb_dim, thumb_dim), Image.LANCZOS)
+        return {
+            'display': _save(display, out_dir / f"{sha}.{fmt}", fmt, quality),
+            'thumb': _save(thumb, out_dir / f"{sha}_thumb.{fmt}", fmt, quality),
+        }
+
+
+# ── 主流程 ───────────────────────────────────────────────────
+
+def load_images(extracts_dir: Path):
+    """回傳 (manifests, [(content.json, images 索引, 原始檔案)])"""
+    manifests = {}
+    entries = []
+    for content_file in sorted(extracts_dir.glob('*/content.json')):
+        with open(content_file, encoding='utf-8') as f:
+            data = json.load(f)
+        manifests[content_file] = data
+        for i, img in enumerate(data.get('images', [])):
+            source = extracts_dir / img.get('original_path', img['local_path'])
+            if not source.exists():
+                logger.warning(f"✗ 找不到圖片: {source}")
+                continue
+            entries.append((content_file, i, source))
+    return manifests, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='心得圖片去重、重新編碼與縮圖')
+    parser.add_argument('--format', choices=['webp', 'avif'], default='webp', help='輸出格式')
+    parser.add_argument('--max-dim', type=int, default=1600, help='顯示用圖片長邊上限 (px)')
+    parser.add_argument('--thumb-dim', type=int, default=320, help='縮圖長邊上限 (px)')
+    parser.add_argument('--quality', type=int, default=80, help='編碼品質 (0-100)')
+    parser.add_argument('--distance', type=int, default=-1,
+                        help='近似重複的 dHash 漢明距離門檻（預設 -1：只做完全相同去重）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='process 數')
+    parser.add_argument('--dry-run', action='store_true', help='只顯示去重統計，不寫檔')
+    args = parser.parse_args()
+
+    if not EXTRACTS_DIR.exists():
+        logger.error("找不到 pdf_extracts 目錄")
+        return
+
+    start = time.perf_counter()
+    logger.info("=" * 60)
+    logger.info(f"心得圖片前處理（{args.format}，長邊 {args.max_dim}px，縮圖 {args.thumb_dim}px）")
+    logger.info("=" * 60)
+
+    manifests, entries = load_images(EXTRACTS_DIR)
+    sources = [str(source) for _, _, source in entries]
+    original_bytes = sum(os.path.getsize(s) for s in sources)
+    logger.info(f"{len(manifests)} 個 content.json，{len(entries)} 張圖片（{original_bytes / 1024 / 1024:.1f} MB）")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        hashed = list(pool.map(hash_image, sources, chunksize=16))
+        canonical = group_duplicates(hashed, args.distance)
+        groups = sorted(set(canonical))
+        logger.info(f"去重後剩 {len(groups)} 張（重複 {len(entries) - len(groups)} 張）")
+        if args.dry_run:
+            return
+
+        encode = partial(encode_variants, fmt=args.format, max_dim=args.max_dim,
+                         thumb_dim=args.thumb_dim, quality=args.quality)
+        encoded = pool.map(encode, [sources[i] for i in groups], [hashed[i].sha256 for i in groups], chunksize=4)
+        variants_by_group = dict(zip(groups, encoded))
+
+    first_seen = {}
+    for n, (content_file, i, source) in enumerate(entries):
+        img = manifests[content_file]['images'][i]
+        group = canonical[n]
+        variants = variants_by_group[group]
+        h = hashed[n]
+
+        img.setdefault('original_path', img['local_path'])
+        img['sha256'] = h.sha256
+        img['dhash'] = f"{h.dhash:016x}"
+        img['variants'] = variants
+        img['local_path'] = variants['display']['local_path']
+        img['filename'] = f"{Path(img['filename']).stem}.{args.format}"
+        img['format'] = args.format
+        owner = f"{content_file.parent.name}/{img['id']}"
+        if group in first_seen:
+            img['duplicate_of'] = first_seen[group]
+        else:
+            first_seen[group] = owner
+            img.pop('duplicate_of', None)
+
+    for content_file, data in manifests.items():
+        with open(content_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    output_bytes = sum(v['display']['bytes'] + v['thumb']['bytes'] for v in variants_by_group.values())
+    display_bytes = sum(variants_by_group[canonical[n]]['display']['bytes'] for n in range(len(entries)))
+    logger.info("=" * 60)
+    logger.info(f"原始檔案: {original_bytes / 1024 / 1024:.1f} MB")
+    logger.info(f"需儲存（去重後顯示版 + 縮圖）: {output_bytes / 1024 / 1024:.1f} MB "
+                f"({output_bytes / max(original_bytes, 1):.0%})")
+    logger.info(f"每張顯示版總傳輸量: {display_bytes / 1024 / 1024:.1f} MB "
+                f"({display_bytes / max(original_bytes, 1):.0%})")
+    logger.info(f"耗時 {time.perf_counter() - start:.1f} 秒")
+    logger.info("=" * 60)
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Supabase Storage → Cloudinary 串流遷移引擎（migrate_images_to_cloudinary.py 使用）
+
+- 下載的 response body 直接接到 multipart 上傳，不先讀進記憶體、也不轉 base64
+- 每個 worker thread 各自持有一個 requests.Session，重用 TCP / TLS 連線
+- N 個傳輸同時進行，另以每秒啟動次數限制請求頻率（取代每位學生 sleep(0.5)）
+- 每張圖片完成後寫入 checkpoint，中斷後重跑只會補傳未完成的圖片
+- 結束時回報傳輸量與 MB/s
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = 'migrate_checkpoint.json'
+CLOUDINARY_FOLDER = 'experience-images'
+CHUNK_SIZE = 64 * 1024
+
+
+# ── 串流 multipart ───────────────────────────────────────────
+
+class MultipartStream:
+    """
+    multipart/form-data 的 file-like body
+    表單欄位與結尾是固定的 bytes，中間的檔案內容邊讀邊送；
+    已知檔案大小時提供 __len__，requests 會送出 Content-Length，否則用 chunked
+    """
+
+    def __init__(self, fields: dict, filename: str, content_type: str, source, size: int | None = None):
+        self.boundary = uuid.uuid4().hex
+        head = b''.join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+            for k, v in fields.items()
+        )
+        head += (f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f'Content-Type: {content_type}\r\n\r\n').encode()
+        self._head = head
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self._source = source
+        self._size = size
+        self._stage = 0          # 0: head, 1: file, 2: tail, 3: done
+        self.file_bytes = 0
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+    def read(self, size: int = -1) -> bytes:
+        while self._stage < 3:
+            if self._stage == 0:
+                self._stage = 1
+                return self._head
+            if self._stage == 1:
+                chunk = self._source.read(CHUNK_SIZE if size is None or size < 0 else size)
+                if chunk:
+                    self.file_bytes += len(chunk)
+                    return chunk
+                self._stage = 2
+            if self._stage == 2:
+                self._stage = 3
+                return self._tail
+        return b''
+
+    def __iter__(self):
+        while chunk := self.read(CHUNK_SIZE):
+            yield chunk
+
+
+# ── 連線 / 頻率控制 ──────────────────────────────────────────
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """每個 thread 一個 Session（requests.Session 不保證 thread-safe）"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=2)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+class RateLimiter:
+    """限制每秒最多啟動 rate 次傳輸（rate <= 0 表示不限制）"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# ── Checkpoint ───────────────────────────────────────────────
+
+class Checkpoint:
+    """舊 URL → {'url': Cloudinary URL, 'bytes': 大小}；每次記錄都寫回檔案（先寫暫存檔再 rename）"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.done: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                self.done = json.load(f)
+        self._lock = threading.Lock()
+
+    def get(self, old_url: str) -> dict | None:
+        return self.done.get(old_url)
+
+    def record(self, old_url: str, new_url: str, size: int):
+        with self._lock:
+            self.done[old_url] = {'url': new_url, 'bytes': size}
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.done, f, ensure_ascii=False)
+            tmp.replace(self.path)
+
+
+# ── 遷移 ─────────────────────────────────────────────────────
+
+class MigrationJob(NamedTuple):
+    manifest: Path
+    index: int
+    student_id: str
+    image_id: str
+    old_url: str
+    filename: str
+    content_type: str
+
+
+def transfer(job: MigrationJob, upload_url: str, upload_preset: str) -> tuple[str, int]:
+    """把一張圖從 Supabase 串流到 Cloudinary，回傳 (secure_url, 位元組數)"""
+    session = get_session()
+    with session.get(job.old_url, stream=True, timeout=60) as download:
+        download.raise_for_status()
+        download.raw.decode_content = True
+        length = download.headers.get('Content-Length')
+        encoding = download.headers.get('Content-Encoding')
+        size = int(length) if length and not encoding else None
+
+        body = MultipartStream(
+            {
+                'upload_preset': upload_preset,
+                'filename_override': f"exp_{job.student_id}_{Path(job.filename).stem}",
+                'folder': CLOUDINARY_FOLDER,
+            },
+            job.filename, job.content_type, download.raw, size,
+        )
+        # 沒有 Content-Length 時交給 requests 以 chunked 傳送
+        data = body if size is not None else iter(body)
+        response = session.post(upload_url, data=data, headers={'Content-Type': body.content_type}, timeout=300)
+        response.raise_for_status()
+
+    result = response.json()
+    if 'secure_url' not in result:
+        raise RuntimeError(f"Cloudinary 回應缺少 secure_url: {result}")
+    return result['secure_url'], body.file_bytes
+
+
+def collect_jobs(extracts_dir: Path, student_ids=None) -> tuple[dict[Path, dict], list[MigrationJob]]:
+    """讀取所有 content.json，挑出仍指向 Supabase 的圖片"""
+    manifests = {}
+    jobs = []
+    for content_file in sorted(extracts_dir.glob('*/content.json')):
+        student_id = content_file.parent.name
+        if student_ids and student_id not in student_ids:
+            continue
+        with open(content_file, encoding='utf-8') as f:
+            data = json.load(f)
+        manifests[content_file] = data
+        for i, img in enumerate(data.get('images', [])):
+            url = img.get('url', '')
+            if 'supabase.co' not in url:
+                continue
+            jobs.append(MigrationJob(
+                content_file, i, student_id, img['id'], url, img['filename'], f"image/{img['format']}",
+            ))
+    return manifests, jobs
+
+
+def migrate_all(extracts_dir, cloud_name: str, upload_preset: str, workers: int = 6, rate: float = 5,
+                checkpoint_path=None, student_ids=None, dry_run: bool = False) -> dict:
+    """
+    遷移所有仍在 Supabase 的圖片並更新 content.json
+    回傳統計：{'migrated', 'resumed', 'failed', 'bytes', 'seconds', 'updated': {content.json: 更新張數}}
+    """
+    start = time.perf_counter()
+    extracts_dir = Path(extracts_dir)
+    manifests, jobs = collect_jobs(extracts_dir, student_ids)
+    stats = {'migrated': 0, 'resumed': 0, 'failed': 0, 'bytes': 0, 'seconds': 0.0, 'updated': {}}
+    logger.info(f"{len(manifests)} 個 content.json，{len(jobs)} 張圖片需要遷移")
+
+    if dry_run:
+        for job in jobs:
+            logger.info(f"  🔍 [DRY RUN] 會遷移 {job.student_id}/{job.image_id}")
+        stats['migrated'] = len(jobs)
+        return stats
+
+    checkpoint = Checkpoint(checkpoint_path or extracts_dir / CHECKPOINT_FILE)
+    upload_url = f"https://api.cloudinary.com/v1_1/{cloud_name}/image/upload"
+    limiter = RateLimiter(rate)
+    lock = threading.Lock()
+
+    def apply(job: MigrationJob, new_url: str):
+        img = manifests[job.manifest]['images'][job.index]
+        img['migrated_from_url'] = img['url']
+        img['url'] = new_url
+        img['migrated_from'] = 'supabase'
+        img['migrated_at'] = time.time()
+        stats['updated'][job.manifest] = stats['updated'].get(job.manifest, 0) + 1
+
+    pending = []
+    for job in jobs:
+        done = checkpoint.get(job.old_url)
+        if done:
+            apply(job, done['url'])
+            stats['resumed'] += 1
+        else:
+            pending.append(job)
+    if stats['resumed']:
+        logger.info(f"從 checkpoint 恢復 {stats['resumed']} 張，剩 {len(pending)} 張")
+
+    def run(job: MigrationJob):
+        limiter.wait()
+        new_url, size = transfer(job, upload_url, upload_preset)
+        checkpoint.record(job.old_url, new_url, size)
+        return new_url, size
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, job): job for job in pending}
+        for n, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                new_url, size = future.result()
+            except Exception as e:
+                logger.error(f"  ✗ 遷移失敗 {job.student_id}/{job.image_id}: {e}")
+                stats['failed'] += 1
+                continue
+            with lock:
+                apply(job, new_url)
+                stats['migrated'] += 1
+                stats['bytes'] += size
+            if n % 20 == 0:
+                elapsed = time.perf_counter() - start
+                logger.info(f"  進度 {n}/{len(pending)}，{stats['bytes'] / 1024 / 1024 / elapsed:.2f} MB/s")
+
+    for content_file in stats['updated']:
+        with open(content_file, 'w', encoding='utf-8') as f:
+            json.dump(manifests[content_file], f, ensure_ascii=False, indent=2)
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
@@ -8,14 +8,29 @@
    export SUPABASE_URL="your-project-url"
    export SUPABASE_KEY="your-anon-key"
 3. 執行: python upload_to_supabase.py
+
+選項:
+  --workers N          同時上傳的 thread 數（預設 8）
+  --max-inflight-mb M  同時上傳中的檔案總大小上限（預設 64 MB）
+  --local-storage DIR  上傳到本機資料夾（模擬 bucket，不連 Supabase，測試用）
+  --legacy             使用舊的逐一上傳模式（路徑為 <student_id>/<filename>）
+
+預設模式由 parallel_upload.upload_all 處理：以內容 hash 命名（by-hash/<sha256>.<ext>），
+bucket 中已有相同內容的圖片不會重複上傳。
 """
 
+import argparse
 import json
 import os
+import sys
 from pathlib import Path
-from supabase import create_client, Client
 import logging
 
+from parallel_upload import LocalStorage, SupabaseStorage, upload_all
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # scraper/profiling.py
+import profiling  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -26,11 +41,18 @@ SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 STORAGE_BUCKET = "experience-images"  # 你的 bucket 名稱
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("請設定 SUPABASE_URL 和 SUPABASE_SERVICE_ROLE_KEY（或 NEXT_PUBLIC_SUPABASE_ANON_KEY）環境變數")
+supabase = None
 
-# 初始化 Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def get_supabase():
+    """第一次使用時才建立 Supabase client（使用本機 storage 時不需要環境變數）"""
+    global supabase
+    if supabase is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("請設定 SUPABASE_URL 和 SUPABASE_SERVICE_ROLE_KEY（或 NEXT_PUBLIC_SUPABASE_ANON_KEY）環境變數")
+        from supabase import create_client
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase
 
 def upload_images_for_student(student_dir: Path, student_id: str):
     """上傳單個學生的所有圖片到 Supabase"""
@@ -77,7 +99,7 @@ def upload_images_for_student(student_dir: Path, student_id: str):
             # 注意：storage_path 需要以 / 開頭
             storage_path_normalized = storage_path if storage_path.startswith('/') else f"/{storage_path}"
             
-            response = supabase.storage.from_(STORAGE_BUCKET).upload(
+            response = get_supabase().storage.from_(STORAGE_BUCKET).upload(
                 path=storage_path_normalized,
                 file=file_data,
                 file_options={
@@ -88,7 +110,7 @@ def upload_images_for_student(student_dir: Path, student_id: str):
 
             # 獲取公開 URL
             # 注意：get_public_url 不需要前導斜線
-            public_url = supabase.storage.from_(STORAGE_BUCKET).get_public_url(storage_path)
+            public_url = get_supabase().storage.from_(STORAGE_BUCKET).get_public_url(storage_path)
 
             # 更新圖片資訊
             img['url'] = public_url
@@ -110,6 +132,13 @@ def upload_images_for_student(student_dir: Path, student_id: str):
 def main():
     """上傳所有學生的圖片"""
 
+    parser = argparse.ArgumentParser(description='上傳心得圖片到 Supabase Storage')
+    parser.add_argument('--workers', type=int, default=8, help='同時上傳的 thread 數')
+    parser.add_argument('--max-inflight-mb', type=float, default=64, help='同時上傳中的檔案總大小上限 (MB)')
+    parser.add_argument('--local-storage', metavar='DIR', help='上傳到本機資料夾（測試用）')
+    parser.add_argument('--legacy', action='store_true', help='使用舊的逐一上傳模式')
+    args = parser.parse_args()
+
     pdf_extracts_dir = Path("pdf_extracts")
 
     if not pdf_extracts_dir.exists():
@@ -118,20 +147,36 @@ def main():
 
     logger.info("=" * 60)
     logger.info("開始上傳圖片到 Supabase Storage")
-    logger.info(f"Bucket: {STORAGE_BUCKET}")
+    logger.info(f"Bucket: {args.local_storage or STORAGE_BUCKET}")
     logger.info("=" * 60)
 
-    # 遍歷所有學生目錄
-    student_dirs = [d for d in pdf_extracts_dir.iterdir() if d.is_dir()]
-
-    for idx, student_dir in enumerate(student_dirs, 1):
-        student_id = student_dir.name
-        logger.info(f"\n[{idx}/{len(student_dirs)}] 處理學生 {student_id}")
-        upload_images_for_student(student_dir, student_id)
+    if args.legacy:
+        # 遍歷所有學生目錄
+        student_dirs = [d for d in pdf_extracts_dir.iterdir() if d.is_dir()]
+
+        for idx, student_dir in enumerate(student_dirs, 1):
+            student_id = student_dir.name
+            logger.info(f"\n[{idx}/{len(student_dirs)}] 處理學生 {student_id}")
+            upload_images_for_student(student_dir, student_id)
+    else:
+        if args.local_storage:
+            storage = LocalStorage(args.local_storage)
+        else:
+            storage = SupabaseStorage(get_supabase(), STORAGE_BUCKET, SUPABASE_URL)
+        stats = upload_all(
+            pdf_extracts_dir, storage,
+            workers=args.workers,
+            max_inflight_bytes=int(args.max_inflight_mb * 1024 * 1024),
+        )
+        mb = stats['bytes'] / 1024 / 1024
+        logger.info(f"上傳 {stats['uploaded']} 張（{mb:.1f} MB），"
+                    f"已存在略過 {stats['skipped']} 張，失敗 {stats['failed']} 張")
+        logger.info(f"更新 {stats['manifests_written']} 個 content.json，"
+                    f"耗時 {stats['seconds']:.1f} 秒（{mb / max(stats['seconds'], 1e-9):.1f} MB/s）")
 
     logger.info("\n" + "=" * 60)
     logger.info("上傳完成！")
     logger.info("=" * 60)
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
@@ -3,86 +3,15 @@
 
 import json
 import csv
-import re
-
-def extract_english_name(text_content: str) -> str:
-    """
-    從 text_content 中提取英文校名
-    格式：主選單\n大學中文名\n英文校名\n申請資格
-    """
-    lines = text_content.split('\n')
-    
-    # 找到學校名稱後開始解析
-    school_name_found = False
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # 檢查是否為學校名稱行（包含大學）
-        if not school_name_found and '大學' in line and '主選單' not in line:
-            school_name_found = True
-            # 檢查下一行是否為英文校名
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                # 如果下一行包含英文校名特徵，且不是台大的固定內容
-                if (('University' in next_line or 'College' in next_line or 'Institute' in next_line or 
-                    'School' in next_line or 'Academy' in next_line or 'Universidade' in next_line or 
-                    'Université' in next_line or 'Universidad' in next_line) and 
-                    'Office of International Affairs' not in next_line and 
-                    'National Taiwan University' not in next_line):
-                    return next_line
-            continue
-            
-        if not school_name_found:
-            continue
-    
-    return ""
+from countries import to_english
+from english_names import load_v2_schools, name_map
+import profiling
 
 def get_country_english_name(country_zh: str) -> str:
     """
-    將中文國家名稱轉換為英文
+    將中文國家名稱轉換為英文（對照表統一放在 countries.py）
     """
-    country_mapping = {
-        '巴西': 'Brazil',
-        '加拿大': 'Canada',
-        '智利': 'Chile',
-        '中國': 'China',
-        '丹麥': 'Denmark',
-        '芬蘭': 'Finland',
-        '法國': 'France',
-        '德國': 'Germany',
-        '香港': 'Hong Kong',
-        '印度': 'India',
-        '印尼': 'Indonesia',
-        '愛爾蘭': 'Ireland',
-        '以色列': 'Israel',
-        '義大利': 'Italy',
-        '日本': 'Japan',
-        '韓國': 'South Korea',
-        '馬來西亞': 'Malaysia',
-        '墨西哥': 'Mexico',
-        '荷蘭': 'Netherlands',
-        '紐西蘭': 'New Zealand',
-        '挪威': 'Norway',
-        '菲律賓': 'Philippines',
-        '波蘭': 'Poland',
-        '葡萄牙': 'Portugal',
-        '俄羅斯': 'Russia',
-        '新加坡': 'Singapore',
-        '南非': 'South Africa',
-        '西班牙': 'Spain',
-        '瑞典': 'Sweden',
-        '瑞士': 'Switzerland',
-        '泰國': 'Thailand',
-        '土耳其': 'Turkey',
-        '英國': 'United Kingdom',
-        '美國': 'United States',
-        '越南': 'Vietnam'
-    }
-    
-    return country_mapping.get(country_zh, country_zh)
+    return to_english(country_zh)
 
 def main():
     # 讀取 JSON 檔案
@@ -98,13 +27,8 @@ def main():
     
     print(f"開始處理 {len(schools)} 間學校的英文名稱...")
     
-    # 建立 ID 到英文名稱的映射
-    id_to_english_name = {}
-    for school in schools_data:
-        if 'text_content' in school:
-            english_name = extract_english_name(school['text_content'])
-            if english_name:
-                id_to_english_name[school['id']] = english_name
+    # 建立 ID 到英文名稱的映射（v2 爬蟲已有結構化的 name_en，優先使用）
+    id_to_english_name = name_map(schools_data, load_v2_schools())
     
     # 更新每間學校的英文名稱
     for school in schools:
@@ -153,4 +77,4 @@ def main():
     print(f"成功獲取英文校名的學校: {successful}/{len(schools)}")
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -1,107 +1,177 @@
 #!/usr/bin/env python3
 """
 爬取台大 OIA 網站交換學校資料
-使用 Playwright 處理 JavaScript 渲染的頁面
+輸出 raw_schools.json：每間學校的基本資訊 + 詳細頁主要內容的文字（text_content）
+
+text_content 只取頁面主要內容區塊（main.main .main-inner），不含頁首選單、頁尾等共用區塊。
+
+用法:
+  python fetch_schools.py                          # Playwright，一次一頁
+  python fetch_schools.py --workers 6              # Playwright，同時開 6 個分頁
+  python fetch_schools.py --engine http --workers 8  # 不開瀏覽器，直接抓 HTML（較快）
+  python fetch_schools.py --base-url http://127.0.0.1:8765  # 改爬本機替身（oia_replay_server.py）
 """
 
+import argparse
+import asyncio
 import json
-import time
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
+import requests
+from bs4 import BeautifulSoup
 import logging
 
+import browser_service
+import profiling
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://oia.ntu.edu.tw"
 LIST_URL = f"{BASE_URL}/outgoing/school.list"
-DELAY_BETWEEN_REQUESTS = 0.01  # 秒
+DELAY_BETWEEN_REQUESTS = 0.01  # 秒（每個 worker）
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# 頁面主要內容；找不到時依序退回
+CONTENT_SELECTORS = ['main.main .main-inner', 'main.main', 'main', 'body']
+BLOCK_TAGS = ['p', 'div', 'li', 'tr', 'table', 'ul', 'ol', 'section', 'article',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'dt', 'dd']
 
-def extract_school_links(page):
-    """從列表頁面提取所有學校的連結和基本資訊"""
-    logger.info("正在提取學校列表...")
 
-    # 等待表格載入
-    page.wait_for_selector('table', timeout=10000)
-    time.sleep(2)  # 等待 JavaScript 完全執行
+# ── HTML 解析（兩種引擎共用）──────────────────────────────
 
-    # 提取所有學校行
+def parse_school_list(html: str) -> list[dict]:
+    """從列表頁 HTML 提取所有學校的連結和基本資訊"""
+    soup = BeautifulSoup(html, 'lxml')
     schools = []
-    rows = page.query_selector_all('tbody tr')
+    current_country = ""
 
+    rows = soup.select('tbody tr')
     logger.info(f"找到 {len(rows)} 個表格行")
 
-    current_country = ""
-
     for row in rows:
-        try:
-            cells = row.query_selector_all('td')
-
-            # 檢查是否為國家標題行 (只有一個 td 且有 colspan)
-            if len(cells) == 1:
-                country_cell = cells[0]
-                colspan = country_cell.get_attribute('colspan')
-                if colspan and int(colspan) > 1:
-                    current_country = country_cell.inner_text().strip()
-                    logger.debug(f"找到國家: {current_country}")
-                continue
+        cells = row.find_all('td', recursive=False)
 
-            # 必須有5個欄位才是學校資料行
-            if len(cells) != 5:
-                continue
-
-            # 第一欄是學校名稱
-            name_cell = cells[0]
-            name_link = name_cell.query_selector('span.lang a')
-
-            if not name_link:
-                continue
-
-            school_name = name_link.inner_text().strip()
+        # 檢查是否為國家標題行 (只有一個 td 且有 colspan)
+        if len(cells) == 1:
+            colspan = cells[0].get('colspan')
+            if colspan and int(colspan) > 1:
+                current_country = cells[0].get_text().strip()
+            continue
 
-            # 第五欄是「申請資料」連結
-            link_cell = cells[4]
-            detail_link = link_cell.query_selector('a[href*="/outgoing/view/"]')
+        # 必須有5個欄位才是學校資料行
+        if len(cells) != 5:
+            continue
 
-            if not detail_link:
-                continue
+        # 第一欄是學校名稱，第五欄是「申請資料」連結
+        name_link = cells[0].select_one('span.lang a')
+        detail_link = cells[4].select_one('a[href*="/outgoing/view/"]')
+        if not name_link or not detail_link:
+            continue
 
-            href = detail_link.get_attribute('href')
+        href = detail_link.get('href', '')
+        sn_match = re.search(r'/sn/(\d+)', href)
+        if not sn_match:
+            continue
 
-            # 提取學校ID
-            sn_match = re.search(r'/sn/(\d+)', href)
-            if not sn_match:
-                continue
+        schools.append({
+            'id': sn_match.group(1),
+            'name_zh': name_link.get_text().strip(),
+            'country': current_country,
+            'url': f"{BASE_URL}{href}" if href.startswith('/') else href
+        })
 
-            school_id = sn_match.group(1)
+    return schools
 
-            schools.append({
-                'id': school_id,
-                'name_zh': school_name,
-                'country': current_country,
-                'url': f"{BASE_URL}{href}" if href.startswith('/') else href
-            })
 
-        except Exception as e:
-            logger.warning(f"提取學校資訊時出錯: {e}")
-            continue
+def element_text(element) -> str:
+    """
+    近似瀏覽器 innerText：區塊元素與 <br> 換行、行內元素不斷行，
+    並移除空白行
+    """
+    for br in element.find_all('br'):
+        br.replace_with('\n')
+    for tag in element.find_all(BLOCK_TAGS):
+        tag.insert_before('\n')
+        tag.insert_after('\n')
+    lines = (re.sub(r'[ \t\xa0]+', ' ', line).strip() for line in element.get_text().split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_main_content(html: str) -> str:
+    """詳細頁 HTML → 主要內容文字"""
+    soup = BeautifulSoup(html, 'lxml')
+    # 英文校名 <small> 在頁面上顯示在中文名下一行（下游 extract_english_name 依賴此格式）
+    for small in soup.select('.university-title small'):
+        small.insert_before('\n')
+    for selector in CONTENT_SELECTORS:
+        element = soup.select_one(selector)
+        if element:
+            return element_text(element)
+    return ''
+
+
+# ── HTTP 引擎 ────────────────────────────────────────────
+
+def fetch_http(schools: list[dict], workers: int) -> dict[str, dict]:
+    """以 requests 平行抓取詳細頁（每個 thread 共用連線池）"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+
+    def fetch(school):
+        with profiling.stage('detail'):
+            response = session.get(school['url'], timeout=30)
+            response.raise_for_status()
+        time.sleep(DELAY_BETWEEN_REQUESTS)
+        with profiling.stage('extract'):
+            return {'text_content': parse_main_content(response.text)}
+
+    details = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch, school): school for school in schools}
+        for idx, future in enumerate(as_completed(futures), 1):
+            school = futures[future]
+            try:
+                details[school['id']] = future.result()
+                logger.info(f"[{idx}/{len(schools)}] ✓ {school['name_zh']} ({school['country']})")
+            except Exception as e:
+                logger.error(f"[{idx}/{len(schools)}] ✗ {school['name_zh']}: {e}")
+    return details
+
+
+def fetch_list_http() -> list[dict]:
+    response = requests.get(LIST_URL, headers={'User-Agent': USER_AGENT}, timeout=30)
+    response.raise_for_status()
+    return parse_school_list(response.text)
+
+
+# ── Playwright 引擎 ──────────────────────────────────────
+
+async def extract_school_links(page):
+    """從列表頁面提取所有學校的連結和基本資訊"""
+    logger.info("正在提取學校列表...")
+    await page.wait_for_selector('table', timeout=10000)
+    return parse_school_list(await page.content())
 
-    return schools
 
-def extract_detail_info(page, school_url):
-    """從詳細頁面提取完整內容"""
+async def extract_detail_info(page, school_url):
+    """從詳細頁面提取主要內容區塊的文字"""
+    from playwright.async_api import TimeoutError as PlaywrightTimeout
     try:
-        page.goto(school_url, timeout=30000)
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
-
-        # 提取頁面的文字內容（移除 HTML 標籤，保留結構化文字）
-        text_content = page.inner_text('body')
+        await page.goto(school_url, timeout=30000, wait_until='domcontentloaded')
+        await page.wait_for_selector('.uninfo-awall, main', timeout=15000)
 
-        return {
-            'text_content': text_content
-        }
+        for selector in CONTENT_SELECTORS:
+            element = await page.query_selector(selector)
+            if element:
+                return {'text_content': await element.inner_text()}
+        return None
 
     except PlaywrightTimeout:
         logger.error(f"載入頁面超時: {school_url}")
@@ -110,85 +180,92 @@ def extract_detail_info(page, school_url):
         logger.error(f"提取詳細資訊時出錯 ({school_url}): {e}")
         return None
 
-# 所有舊的欄位提取函數已移除
-# 現在只提取完整的頁面內容，交由 LLM 處理
+
+async def fetch_browser(workers: int) -> tuple[list[dict], dict[str, dict]]:
+    """一個瀏覽器、workers 個分頁，從同一個佇列取學校"""
+    # playwright 只有 browser 引擎需要，--engine http 不載入
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        browser = await browser_service.launch_async(p)
+        context = await browser.new_context(user_agent=USER_AGENT)
+        try:
+            page = await context.new_page()
+            logger.info(f"正在載入列表頁面: {LIST_URL}")
+            with profiling.stage('list'):
+                await page.goto(LIST_URL, timeout=30000)
+                schools = await extract_school_links(page)
+            logger.info(f"成功提取 {len(schools)} 個學校連結")
+
+            queue = asyncio.Queue()
+            for idx, school in enumerate(schools, 1):
+                queue.put_nowait((idx, school))
+            details = {}
+
+            async def worker(page):
+                while not queue.empty():
+                    idx, school = queue.get_nowait()
+                    with profiling.stage('detail'):
+                        detail = await extract_detail_info(page, school['url'])
+                    if detail:
+                        details[school['id']] = detail
+                        logger.info(f"[{idx}/{len(schools)}] ✓ {school['name_zh']} ({school['country']})")
+                    else:
+                        logger.warning(f"[{idx}/{len(schools)}] ✗ 無法提取詳細資訊: {school['name_zh']}")
+                    await asyncio.sleep(DELAY_BETWEEN_REQUESTS)
+
+            pages = [page] + [await context.new_page() for _ in range(workers - 1)]
+            await asyncio.gather(*(worker(pg) for pg in pages))
+            return schools, details
+        finally:
+            await browser.close()
+
 
 def main():
     """主程式"""
+    global BASE_URL, LIST_URL
+    parser = argparse.ArgumentParser(description='爬取台大 OIA 交換學校資料（text_content）')
+    parser.add_argument('--engine', choices=['browser', 'http'], default='browser',
+                        help='browser: Playwright；http: 直接抓 HTML 解析')
+    parser.add_argument('--workers', type=int, default=1, help='同時處理的頁面數')
+    parser.add_argument('--output', default='raw_schools.json', help='輸出檔案')
+    parser.add_argument('--base-url', default=BASE_URL, help='網站位址（測試時指向 oia_replay_server.py）')
+    args = parser.parse_args()
+
+    BASE_URL = args.base_url.rstrip('/')
+    LIST_URL = f"{BASE_URL}/outgoing/school.list"
+
     start_time = datetime.now()
     logger.info("=" * 60)
     logger.info("開始爬取台大 OIA 交換學校資料")
-    logger.info(f"開始時間: {start_time}")
+    logger.info(f"開始時間: {start_time}（engine={args.engine}, workers={args.workers}）")
     logger.info("=" * 60)
 
-    all_schools = []
+    if args.engine == 'http':
+        with profiling.stage('list'):
+            schools = fetch_list_http()
+        logger.info(f"成功提取 {len(schools)} 個學校連結")
+        details = fetch_http(schools, args.workers)
+    else:
+        schools, details = asyncio.run(fetch_browser(args.workers))
 
-    with sync_playwright() as p:
-        # 啟動瀏覽器
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        )
-        page = context.new_page()
-
-        try:
-            # Step 1: 提取學校列表
-            logger.info(f"正在載入列表頁面: {LIST_URL}")
-            page.goto(LIST_URL, timeout=30000)
-            schools = extract_school_links(page)
-            logger.info(f"成功提取 {len(schools)} 個學校連結")
-
-            # Step 2: 逐個提取詳細資訊
-            total = len(schools)
-            success_count = 0
-            fail_count = 0
-
-            for idx, school in enumerate(schools, 1):
-                logger.info(f"[{idx}/{total}] 正在處理: {school['name_zh']} ({school['country']})")
+    # 依列表順序合併；失敗的學校仍保留基本資訊
+    all_schools = []
+    for school in schools:
+        school.update(details.get(school['id'], {}))
+        all_schools.append(school)
 
-                try:
-                    detail = extract_detail_info(page, school['url'])
+    with profiling.stage('write'), open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(all_schools, f, ensure_ascii=False, indent=2)
 
-                    if detail:
-                        # 合併基本資訊和詳細資訊
-                        school.update(detail)
-                        all_schools.append(school)
-                        success_count += 1
-                        logger.info(f"  ✓ 成功提取資料")
-                    else:
-                        logger.warning(f"  ✗ 無法提取詳細資訊")
-                        all_schools.append(school)  # 仍保留基本資訊
-                        fail_count += 1
-
-                    # 延遲避免對伺服器造成負擔
-                    time.sleep(DELAY_BETWEEN_REQUESTS)
-
-                except Exception as e:
-                    logger.error(f"  ✗ 處理失敗: {e}")
-                    all_schools.append(school)  # 保留基本資訊
-                    fail_count += 1
-                    time.sleep(DELAY_BETWEEN_REQUESTS)
-
-            # Step 3: 儲存原始資料
-            output_file = 'raw_schools.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(all_schools, f, ensure_ascii=False, indent=2)
-
-            logger.info("=" * 60)
-            logger.info("爬取完成！")
-            logger.info(f"總學校數: {total}")
-            logger.info(f"成功: {success_count}")
-            logger.info(f"失敗: {fail_count}")
-            logger.info(f"耗時: {datetime.now() - start_time}")
-            logger.info(f"資料已儲存至: {output_file}")
-            logger.info("=" * 60)
-
-        except Exception as e:
-            logger.error(f"發生嚴重錯誤: {e}")
-            raise
+    logger.info("=" * 60)
+    logger.info("爬取完成！")
+    logger.info(f"總學校數: {len(schools)}")
+    logger.info(f"成功: {len(details)}")
+    logger.info(f"失敗: {len(schools) - len(details)}")
+    logger.info(f"耗時: {datetime.now() - start_time}")
+    logger.info(f"資料已儲存至: {args.output}")
+    logger.info("=" * 60)
 
-        finally:
-            browser.close()
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
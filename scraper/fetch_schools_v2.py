@@ -3,11 +3,15 @@
 爬取台大 OIA 網站交換學校資料 (v2)
 使用結構化 CSS selector 解析，直接輸出結構化資料
 輸出: raw_schools_v2.json（不覆蓋原有的 raw_schools.json）
+     eligibility_index_sem{N}.json（申請資格查詢索引，見 eligibility_index.py）
+     snapshots/sem{N}/（每次爬取相對上次的差異，見 snapshot_store.py）
 
 用法:
   python fetch_schools_v2.py              # 爬第二學期（預設）
   python fetch_schools_v2.py --semester 1 # 爬第一學期
   python fetch_schools_v2.py --semester 2 # 爬第二學期
+  python fetch_schools_v2.py --base-url http://127.0.0.1:8765  # 改爬本機替身（oia_replay_server.py）
+  python fetch_schools_v2.py --changed-only  # 只重爬列表欄位有變 / 新出現的學校（見 diff_engine.refetch_ids）
 """
 
 import json
@@ -17,6 +21,14 @@ import sys
 from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 import logging
+import browser_service
+import profiling
+from records import Link, Section, Sections
+from text_matcher import ELIGIBILITY_MATCHER
+from language_requirements import parse as parse_language_requirements
+from eligibility_index import build_index_file, index_path
+from snapshot_store import record_snapshot
+from diff_engine import refetch_ids
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +39,12 @@ logger = logging.getLogger(__name__)
 BASE_URL = "https://oia.ntu.edu.tw"
 DELAY_BETWEEN_REQUESTS = 0.5  # 秒
 
+# --base-url http://127.0.0.1:8765  改爬本機替身（oia_replay_server.py）
+if '--base-url' in sys.argv:
+    url_idx = sys.argv.index('--base-url')
+    if url_idx + 1 < len(sys.argv):
+        BASE_URL = sys.argv[url_idx + 1].rstrip('/')
+
 # 從命令列參數取得學期
 SEMESTER = 2  # 預設第二學期
 if '--semester' in sys.argv:
@@ -43,6 +61,9 @@ if '--ids' in sys.argv:
     if ids_idx + 1 < len(sys.argv):
         ONLY_IDS = set(sys.argv[ids_idx + 1].split(','))
 
+# --changed-only  與既有 JSON 比較列表欄位，只爬有變的學校（不需查 DB）
+CHANGED_ONLY = '--changed-only' in sys.argv
+
 LIST_URL = f"{BASE_URL}/outgoing/school.list/semester/{SEMESTER}"
 OUTPUT_FILE = f'raw_schools_v2_sem{SEMESTER}.json'
 
@@ -152,7 +173,7 @@ def extract_detail_info(page, school_url):
     """
     從詳細頁面用 CSS selector 提取結構化資料
     回傳:
-      name_zh, name_en, sections (dict: label -> {text, links}), raw_sections (list)
+      name_zh, name_en, sections (dict: label -> {text, links}), sections_ordered (list)
     """
     try:
         page.goto(school_url, timeout=30000)
@@ -178,10 +199,8 @@ def extract_detail_info(page, school_url):
             result['name_zh_detail'] = ''
             result['name_en'] = ''
 
-        # ── 所有 section（label → {text, links}）────────────
-        sections_dict = {}   # 用於快速查詢
-        sections_list = []   # 保留順序
-
+        # ── 所有 section（依頁面順序，同名 section 可能重複）────
+        entries = []
         blocks = page.query_selector_all('.uninfo-awall')
         for block in blocks:
             label_el = block.query_selector('.uninfo-label span')
@@ -190,24 +209,16 @@ def extract_detail_info(page, school_url):
             label = label_el.inner_text().strip() if label_el else '(no label)'
             text = content_el.inner_text().strip() if content_el else ''
             links = extract_links_from_element(content_el) if content_el else []
+            entries.append(Section(label, text, tuple(Link(l['text'], l['href']) for l in links)))
 
-            entry = {'label': label, 'text': text, 'links': links}
-            sections_list.append(entry)
-
-            # 同名 section 用 list 存（避免覆蓋）
-            if label not in sections_dict:
-                sections_dict[label] = entry
-            else:
-                if isinstance(sections_dict[label], list):
-                    sections_dict[label].append(entry)
-                else:
-                    sections_dict[label] = [sections_dict[label], entry]
-
-        result['sections'] = sections_dict
-        result['sections_ordered'] = sections_list
+        # JSON 格式不變：sections（label → dict，同名為 list）與 sections_ordered 都由 Sections 產生
+        sections = Sections(entries)
+        result['sections'] = sections.to_legacy()
+        result['sections_ordered'] = sections.to_json()
 
         # ── 從 sections 中提取常用欄位（方便後續使用）──────
-        result.update(_extract_common_fields(sections_dict))
+        with profiling.stage('extract'):
+            result.update(_extract_common_fields(sections))
 
         return result
 
@@ -219,27 +230,45 @@ def extract_detail_info(page, school_url):
         return None
 
 
-def _get_section_text(sections, label):
-    """安全取得 section 文字，處理 list 或 dict 的情況"""
-    val = sections.get(label, {})
-    if isinstance(val, dict):
-        return val.get('text', '')
-    if isinstance(val, list):
-        return val[0].get('text', '') if val else ''
-    return ''
+# 以下皆比對正規化後的文字（text_normalizer）：已是半形、單一空白、標準寫法，
+# 多益 / 托福、日語檢定 / 日檢、日文 / 日語、大小寫等變體不必再寫進 pattern
+
+# 「不接受」之後的受限對象（從錨點位置 match，不需整段 findall）
+RESTRICTED_SENTENCE = re.compile(r'(.{5,300}?)(?:之|的)學生申請')
+
+GPA_PATTERN   = re.compile(r'GPA ?[達到需] ?(\d+\.?\d*)')
+QUOTA_PATTERN = re.compile(r'(\d+) ?名')
+GRADE_PATTERN = re.compile(r'本校 ?([^\n。]+?)(?= ?學生)')
+
+# 語言檢定（TOEFL / IELTS / TOEIC / 全民英檢 / CEFR / JLPT）由 language_requirements 一次解析
+LANGUAGE_TESTS = ('toefl_ibt', 'ielts', 'toeic', 'gept', 'language_cefr', 'jlpt')
 
 
 def _extract_common_fields(sections):
-    """從 sections dict 提取常用欄位"""
+    """
+    從 sections 提取常用欄位
+    sections 為 records.Sections；舊格式（sections dict / sections_ordered list）先轉換一次
+    各欄位在正規化後的文字上比對（text_normalizer：半形、單一空白、TOEIC / JLPT 等標準寫法），
+    原始文字只用於 *_text 欄位與注意事項的關鍵字掃描
+    """
+    sections = Sections.coerce(sections)
     fields = {}
 
-    eligibility_text = _get_section_text(sections, '申請資格')
-    quota_text       = _get_section_text(sections, '名額')
-    calendar_text    = _get_section_text(sections, '學校年曆')
+    eligibility = sections.normalized('申請資格')
+    quota       = sections.normalized('名額')
+    calendar    = sections.normalized('學校年曆')
+
+    # 語言組別關鍵字在正規化後的文字上找（西班牙語組→西語組等寫法已統一）；
+    # 限制條件只有中文關鍵字，正規化不會改變結果，直接掃原文——「不接受…之學生申請」要原樣寫入 DB
+    eligibility_raw  = sections.text('申請資格')
+    eligibility_hits = ELIGIBILITY_MATCHER.find_all(eligibility, ('language_group',))
+    restriction_hits = ELIGIBILITY_MATCHER.find_all(eligibility_raw, ('restriction',))
+    notes_hits       = ELIGIBILITY_MATCHER.find_all(sections.text('注意事項'), ('restriction',))
 
     # ── 語言組別（可能多組，以 / 連接，如「日語組/一般組」）──────
-    GROUP_PATTERN = r'(一般組|日語組|法語組|西語組|德語組|葡語組|韓語組|中語組|中文組|英語組)'
-    found_groups: list[str] = list(dict.fromkeys(re.findall(GROUP_PATTERN, eligibility_text)))
+    found_groups: list[str] = list(dict.fromkeys(
+        h.label for h in eligibility_hits
+    ))
     if found_groups:
         # 將「一般組」排到最後（一般組通常是備選條件）
         if '一般組' in found_groups and len(found_groups) > 1:
@@ -250,57 +279,23 @@ def _extract_common_fields(sections):
         fields['language_group'] = '一般組'
 
     # ── GPA ──────────────────────────────────────────────
-    gpa_match = re.search(r'GPA\s*[達到需]\s*(\d+\.?\d*)', eligibility_text)
+    gpa_match = GPA_PATTERN.search(eligibility)
     fields['gpa_min'] = float(gpa_match.group(1)) if gpa_match else None
 
-    # ── 英語檢定 ─────────────────────────────────────────
-    # TOEFL iBT
-    toefl_match = re.search(r'TOEFL\s*iBT\s*(\d+)', eligibility_text, re.IGNORECASE)
-    fields['toefl_ibt'] = int(toefl_match.group(1)) if toefl_match else None
-
-    # IELTS
-    ielts_match = re.search(r'IELTS\s*(\d+\.?\d*)', eligibility_text, re.IGNORECASE)
-    fields['ielts'] = float(ielts_match.group(1)) if ielts_match else None
-
-    # TOEIC / 多益
-    toeic_match = re.search(r'(?:TOEIC|多益)\s*[:：]?\s*(\d+)', eligibility_text, re.IGNORECASE)
-    fields['toeic'] = int(toeic_match.group(1)) if toeic_match else None
-
-    # 全民英檢 GEPT（初級 / 中級 / 中高級 / 高級 / 優級）
-    gept_match = re.search(r'全民英檢\s*(初級|中級(?!以下)|中高級|高級|優級)', eligibility_text)
-    fields['gept'] = gept_match.group(1) if gept_match else None
-
-    # ── 非英語語言檢定 CEFR（B1 / B2 / C1 / C2）────────
-    # 例：法語 B2、德文 B1、葡萄牙文 CEFR B1、西班牙語 B2
-    cefr_match = re.search(
-        r'(?:法[語文]|德[語文]|西班牙[語文]?|葡萄牙[語文]|韓[語文]|日[語文]|中文)'
-        r'\s*(?:檢定|能力|CEFR)?\s*(?:成績\s*)?([ABC]\d)',
-        eligibility_text
-    )
-    if not cefr_match:
-        # 備用：直接找 CEFR Bx / Cx 格式（例：CEFR B1）
-        cefr_match = re.search(r'CEFR\s+([ABC]\d)', eligibility_text)
-    fields['language_cefr'] = cefr_match.group(1) if cefr_match else None
-
-    # 日語能力檢定 JLPT（N1~N5 或 舊制 1~4 級）
-    jlpt_match = re.search(
-        r'(?:日語?(?:能力)?檢定|JLPT)\s*(?:成績\s*)?(?:N(\d)|(\d)\s*級)',
-        eligibility_text,
-        re.IGNORECASE
-    )
-    if jlpt_match:
-        level = jlpt_match.group(1) or jlpt_match.group(2)
-        fields['jlpt'] = f'N{level}'
-    else:
-        fields['jlpt'] = None
+    # ── 語言檢定（英語 / CEFR / JLPT，整段只掃一次）────────
+    # 各欄位為文字中第一個出現的要求；依組別、擇一條件分好的完整結果存在 language_requirements
+    requirements = parse_language_requirements(eligibility)
+    for test in LANGUAGE_TESTS:
+        fields[test] = requirements.first(test)
+    fields['language_requirements'] = requirements.to_json()
 
     # ── 名額 ─────────────────────────────────────────────
-    quota_match = re.search(r'(\d+)\s*名', quota_text)
+    quota_match = QUOTA_PATTERN.search(quota)
     fields['quota'] = int(quota_match.group(1)) if quota_match else None
 
     # ── 學期 ─────────────────────────────────────────────
     semesters = []
-    combined = (calendar_text + ' ' + eligibility_text).lower()
+    combined = (calendar + ' ' + eligibility).lower()
     if any(kw in combined for kw in ['fall', 'winter', 'autumn', '第一學期', 'semester 1', '上學期']):
         semesters.append('Fall')
     if any(kw in combined for kw in ['spring', 'summer', '第二學期', 'semester 2', '下學期']):
@@ -309,26 +304,26 @@ def _extract_common_fields(sections):
 
     # ── 不及格限制 ────────────────────────────────────────
     # 申請資格 或 注意事項 中有任何不及格相關字樣皆算
-    notes_text_for_check = _get_section_text(sections, '注意事項')
-    fields['no_fail_required'] = (
-        '不及格' in eligibility_text or
-        '不及格' in notes_text_for_check
+    fields['no_fail_required'] = any(
+        h.label == 'no_fail' for h in restriction_hits + notes_hits
     )
 
     # ── 年級要求 ─────────────────────────────────────────
-    # 抓 "本校大X.../碩X.../博X...學生" 格式
-    grade_match = re.search(r'本校\s*([^\n。]+?)(?=\s*學生)', eligibility_text)
-    if grade_match:
-        grade_req = grade_match.group(1).strip()
-        # 去掉結尾的標點
-        grade_req = re.sub(r'[\s，。；;,]+$', '', grade_req)
-        fields['grade_requirement'] = grade_req
-    else:
-        fields['grade_requirement'] = None
+    # 抓 "本校大X.../碩X.../博X...學生" 格式，去掉結尾的標點
+    grade_match = GRADE_PATTERN.search(eligibility)
+    fields['grade_requirement'] = grade_match.group(1).strip().rstrip(' ,。;') if grade_match else None
 
     # ── 不接受申請之學院 ──────────────────────────────────
-    # 抓所有 "不接受XXX之學生申請" 句型，以 ；串接
-    restricted_matches = re.findall(r'不接受(.{5,300}?)(?:之|的)學生申請', eligibility_text)
+    # 從「不接受」的位置往後比對 "不接受XXX之學生申請" 句型，以 ；串接（原文，不經正規化）
+    restricted_matches = []
+    scan_from = 0
+    for hit in restriction_hits:
+        if hit.label != 'excluded_applicants' or hit.start < scan_from:
+            continue
+        m = RESTRICTED_SENTENCE.match(eligibility_raw, hit.end)
+        if m:
+            restricted_matches.append(m.group(1))
+            scan_from = m.end()
     if restricted_matches:
         fields['restricted_colleges'] = '；'.join(
             ['不接受' + m.strip() + '之學生申請' for m in restricted_matches]
@@ -341,11 +336,11 @@ def _extract_common_fields(sections):
     fields['second_exchange_eligible'] = '此校開放予第二次出國交換之同學選填' in sections
 
     # ── 原始文字（保留供後續使用）────────────────────────
-    fields['eligibility_text'] = eligibility_text
-    fields['quota_text']       = quota_text
-    fields['calendar_text']    = calendar_text
-    fields['notes_text']       = _get_section_text(sections, '注意事項')
-    fields['housing_text']     = _get_section_text(sections, '住宿資訊')
+    fields['eligibility_text'] = eligibility_raw
+    fields['quota_text']       = sections.text('名額')
+    fields['calendar_text']    = sections.text('學校年曆')
+    fields['notes_text']       = sections.text('注意事項')
+    fields['housing_text']     = sections.text('住宿資訊')
 
     return fields
 
@@ -353,8 +348,10 @@ def _extract_common_fields(sections):
 # ── 主程式 ────────────────────────────────────────────────
 
 def main():
+    global ONLY_IDS
     start_time = datetime.now()
-    mode = "LIST ONLY" if LIST_ONLY else f"IDS {','.join(ONLY_IDS)}" if ONLY_IDS else "FULL"
+    mode = ("LIST ONLY" if LIST_ONLY else f"IDS {','.join(ONLY_IDS)}" if ONLY_IDS
+            else "CHANGED ONLY" if CHANGED_ONLY else "FULL")
     logger.info("=" * 60)
     logger.info("開始爬取台大 OIA 交換學校資料 (v2 - 結構化解析)")
     logger.info(f"學期: Semester {SEMESTER}  模式: {mode}")
@@ -365,7 +362,7 @@ def main():
     all_schools = []
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = browser_service.launch(p)
         context = browser.new_context(
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         )
@@ -374,8 +371,9 @@ def main():
         try:
             # Step 1：取得學校列表
             logger.info(f"正在載入列表頁面: {LIST_URL}")
-            page.goto(LIST_URL, timeout=30000)
-            schools = extract_school_links(page)
+            with profiling.stage('list'):
+                page.goto(LIST_URL, timeout=30000)
+                schools = extract_school_links(page)
             logger.info(f"成功提取 {len(schools)} 個學校連結")
 
             # --list-only: 存到獨立暫存檔，不覆蓋主 JSON
@@ -386,21 +384,30 @@ def main():
                 logger.info(f"✅ 列表模式完成，已存 {len(schools)} 筆 → {list_only_file}")
                 return
 
+            # --changed-only: 與既有 JSON 比較列表欄位，決定要重爬的 ID
+            import os
+            if CHANGED_ONLY and os.path.exists(OUTPUT_FILE):
+                with open(OUTPUT_FILE, encoding='utf-8') as f:
+                    ONLY_IDS = set(refetch_ids(schools, json.load(f)))
+                logger.info(f"列表欄位有變 / 新學校: {len(ONLY_IDS)} 所")
+
             # --ids: 若有指定 ID，載入既有 JSON 並只更新指定學校的詳細頁
-            if ONLY_IDS:
+            if ONLY_IDS or (CHANGED_ONLY and os.path.exists(OUTPUT_FILE)):
                 # 載入既有 JSON 作為基底
-                import os
-                existing = {}
+                previous = {}
                 if os.path.exists(OUTPUT_FILE):
                     with open(OUTPUT_FILE, encoding='utf-8') as f:
                         for s in json.load(f):
-                            existing[s['id']] = s
-                # 用列表頁的最新資料更新基底（列表欄位如 is_updated, selection_quota 等）
-                for s in schools:
-                    if s['id'] in existing:
-                        existing[s['id']].update(s)
-                    else:
-                        existing[s['id']] = s
+                            previous[s['id']] = s
+                # 只保留列表頁上仍有的學校（依列表順序），並用列表頁的最新資料更新（is_updated, selection_quota 等）
+                existing = {s['id']: {**previous.get(s['id'], {}), **s} for s in schools}
+                removed = len(previous.keys() - existing.keys())
+                if removed:
+                    logger.info(f"列表頁已移除 {removed} 所，不再保留")
+                # 列表沒變也沒有移除：既有 JSON / 索引 / 快照都是最新的，不重寫（索引不存在時仍照常建立）
+                if not ONLY_IDS and not removed and index_path(SEMESTER).exists():
+                    logger.info("✅ 沒有需要更新的學校，不重寫 JSON / 快照")
+                    return
 
                 # 只爬指定 ID 的詳細頁
                 targets = [s for s in schools if s['id'] in ONLY_IDS]
@@ -410,7 +417,8 @@ def main():
                 fail_count = 0
                 for idx, school in enumerate(targets, 1):
                     logger.info(f"[{idx}/{len(targets)}] {school['name_zh']} ({school['country']})")
-                    detail = extract_detail_info(page, school['url'])
+                    with profiling.stage('detail'):
+                        detail = extract_detail_info(page, school['url'])
                     if detail:
                         existing[school['id']].update(detail)
                         if detail.get('name_zh_detail'):
@@ -423,8 +431,12 @@ def main():
                     time.sleep(DELAY_BETWEEN_REQUESTS)
 
                 all_schools = list(existing.values())
-                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(all_schools, f, ensure_ascii=False, indent=2)
+                with profiling.stage('write'):
+                    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+                        json.dump(all_schools, f, ensure_ascii=False, indent=2)
+                    index_file = build_index_file(all_schools, SEMESTER)
+                    record_snapshot(all_schools, SEMESTER)
+                logger.info(f"已更新申請資格索引: {index_file}")
                 logger.info(f"✅ 指定 ID 模式完成，更新 {success_count} 所，失敗 {fail_count} 所")
                 return
 
@@ -436,7 +448,8 @@ def main():
             for idx, school in enumerate(schools, 1):
                 logger.info(f"[{idx}/{total}] {school['name_zh']} ({school['country']})")
 
-                detail = extract_detail_info(page, school['url'])
+                with profiling.stage('detail'):
+                    detail = extract_detail_info(page, school['url'])
 
                 if detail:
                     school.update(detail)
@@ -462,15 +475,23 @@ def main():
                 all_schools.append(school)
                 time.sleep(DELAY_BETWEEN_REQUESTS)
 
-            # Step 3：儲存
-            with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                json.dump(all_schools, f, ensure_ascii=False, indent=2)
+            with profiling.stage('write'):
+                # Step 3：儲存
+                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(all_schools, f, ensure_ascii=False, indent=2)
+
+                # Step 4：建立申請資格索引（門檻陣列 + bitset，供快速查詢）
+                index_file = build_index_file(all_schools, SEMESTER)
+
+                # Step 5：記錄歷史快照（只存與上次爬取的差異）
+                record_snapshot(all_schools, SEMESTER)
 
             logger.info("=" * 60)
             logger.info("爬取完成！")
             logger.info(f"總學校數: {total}，成功: {success_count}，失敗: {fail_count}")
             logger.info(f"耗時: {datetime.now() - start_time}")
             logger.info(f"資料已儲存至: {OUTPUT_FILE}")
+            logger.info(f"申請資格索引: {index_file}")
             logger.info("=" * 60)
 
         except Exception as e:
@@ -481,4 +502,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
@@ -21,6 +21,8 @@ import urllib.parse
 import argparse
 from pathlib import Path
 import logging
+from countries import bounds, to_english
+import profiling
 
 # 嘗試從 .env / .env.local 載入環境變數
 for env_file in [Path(__file__).parent.parent / '.env.local', Path(__file__).parent.parent / '.env']:
@@ -40,28 +42,19 @@ JSON_FILE  = BASE_DIR / 'raw_schools_v2_sem2.json'
 CACHE_FILE = BASE_DIR / 'google_coordinates.json'
 DELAY      = 0.05   # Google 限速寬鬆，0.05s 足夠
 
-COUNTRY_ZH_TO_EN = {
-    '美國': 'United States', '加拿大': 'Canada', '英國': 'United Kingdom',
-    '澳洲': 'Australia', '紐西蘭': 'New Zealand', '日本': 'Japan',
-    '南韓': 'South Korea', '大陸地區': 'China', '香港': 'Hong Kong',
-    '新加坡': 'Singapore', '馬來西亞': 'Malaysia', '泰國': 'Thailand',
-    '印尼': 'Indonesia', '越南': 'Vietnam', '印度': 'India',
-    '德國': 'Germany', '法國': 'France', '荷蘭': 'Netherlands',
-    '比利時': 'Belgium', '瑞士': 'Switzerland', '奧地利': 'Austria',
-    '瑞典': 'Sweden', '丹麥': 'Denmark', '挪威': 'Norway', '芬蘭': 'Finland',
-    '西班牙': 'Spain', '葡萄牙': 'Portugal', '義大利': 'Italy',
-    '波蘭': 'Poland', '捷克': 'Czech Republic', '匈牙利': 'Hungary',
-    '俄羅斯': 'Russia', '土耳其': 'Turkey', '以色列': 'Israel',
-    '巴西': 'Brazil', '墨西哥': 'Mexico', '阿根廷': 'Argentina',
-    '智利': 'Chile', '哥倫比亞': 'Colombia',
-    '南非': 'South Africa', '埃及': 'Egypt',
-}
-
-
-def google_geocode(query: str, api_key: str) -> tuple[float, float] | None:
-    """單次 Google Maps Geocoding 查詢，回傳 (lat, lon) 或 None"""
+
+def google_geocode(query: str, api_key: str, country: str | None = None) -> tuple[float, float] | None:
+    """
+    單次 Google Maps Geocoding 查詢，回傳 (lat, lon) 或 None
+    country: 國名（中/英/ISO 皆可），以該國範圍作為 bias，同名學校不會跑到別國
+    """
     try:
-        params = urllib.parse.urlencode({'address': query, 'key': api_key})
+        query_params = {'address': query, 'key': api_key}
+        bbox = bounds(country)
+        if bbox:
+            south, west, north, east = bbox
+            query_params['bounds'] = f'{south},{west}|{north},{east}'
+        params = urllib.parse.urlencode(query_params)
         url = f'https://maps.googleapis.com/maps/api/geocode/json?{params}'
         req = urllib.request.Request(url)
         with urllib.request.urlopen(req, timeout=10) as resp:
@@ -93,7 +86,7 @@ def get_coordinates(school: dict, api_key: str) -> tuple[float, float] | None:
     name_en  = school.get('name_en', '') or ''
     name_zh  = school.get('name_zh', '') or ''
     country_zh = school.get('country', '') or ''
-    country_en = COUNTRY_ZH_TO_EN.get(country_zh, country_zh)
+    country_en = to_english(country_zh)
 
     # 去掉括號備注（如 "（E交換學生計畫、V訪問學生計畫）"）
     name_en_clean = re.sub(r'\s*[（(][^)）]*[)）]', '', name_en).strip()
@@ -115,7 +108,7 @@ def get_coordinates(school: dict, api_key: str) -> tuple[float, float] | None:
         if q in seen:
             continue
         seen.add(q)
-        result = google_geocode(q, api_key)
+        result = google_geocode(q, api_key, country=country_zh)
         time.sleep(DELAY)
         if result:
             return result
@@ -165,7 +158,8 @@ def main():
             continue
 
         logger.info(f'[{idx}/{len(schools)}] {school["name_zh"]} ({school.get("country","")})')
-        result = get_coordinates(school, args.key)
+        with profiling.stage('geocode'):
+            result = get_coordinates(school, args.key)
         queried += 1
 
         if result:
@@ -256,7 +250,7 @@ def main():
                 s.pop('latitude_google', None)
                 s.pop('longitude_google', None)
 
-        with open(JSON_FILE, 'w', encoding='utf-8') as f:
+        with profiling.stage('write'), open(JSON_FILE, 'w', encoding='utf-8') as f:
             json.dump(schools, f, ensure_ascii=False, indent=2)
         print(f'\n✅ 已更新 JSON 座標 {updated} 筆 → {JSON_FILE}')
     else:
@@ -268,4 +262,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+逐筆附加寫入的 CSV（final_extract.py 使用）
+
+- 資料列寫到 <output>.partial，只附加、不重寫已寫過的列
+- 每 checkpoint_every 筆 fsync 一次，並把「已寫幾筆、檔案長度」記到 <output>.checkpoint.json
+- commit() 時 fsync 後以 os.replace 一次換上正式檔案（中途失敗不會留下半個 CSV）
+- 中斷後重跑：partial 截斷回最後一個 checkpoint，rows_written 告訴呼叫端從第幾筆繼續
+
+用法:
+  with IncrementalCSVWriter(output_file, fieldnames) as writer:
+      for row in rows[writer.rows_written:]:
+          writer.write_row(row)
+      writer.commit()
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+
+
+class IncrementalCSVWriter:
+    def __init__(self, path, fieldnames: list[str], checkpoint_every: int = 50, resume: bool = True):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + '.partial')
+        self.checkpoint_path = self.path.with_name(self.path.name + '.checkpoint.json')
+        self.fieldnames = list(fieldnames)
+        self.checkpoint_every = checkpoint_every
+        self.rows_written = 0
+        self.resumed = False
+
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint:
+            # 截掉最後一個 checkpoint 之後、可能只寫了一半的資料
+            self._file = open(self.partial_path, 'r+', newline='', encoding='utf-8')
+            self._file.truncate(checkpoint['bytes'])
+            self._file.seek(checkpoint['bytes'])
+            self.rows_written = checkpoint['rows']
+            self.resumed = True
+        else:
+            self._file = open(self.partial_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if not checkpoint:
+            self._writer.writeheader()
+            self.checkpoint()
+
+    def _load_checkpoint(self) -> dict | None:
+        if not (self.checkpoint_path.exists() and self.partial_path.exists()):
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('fieldnames') != self.fieldnames:
+            return None
+        if self.partial_path.stat().st_size < checkpoint['bytes']:
+            return None
+        return checkpoint
+
+    def write_row(self, row: dict):
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """把目前寫入的資料落盤，並記錄可恢復的位置"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        size = os.fstat(self._file.fileno()).st_size
+        state = {'rows': self.rows_written, 'bytes': size, 'fieldnames': self.fieldnames}
+        tmp = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def commit(self):
+        """完成寫入：換上正式檔案並刪除 checkpoint"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+        self.checkpoint_path.unlink(missing_ok=True)
+
+    def close(self):
+        # 不在這裡記 checkpoint：中斷時最後幾筆可能不完整，下次從上一個 checkpoint 重寫
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 未 commit 就離開（例外 / 中斷）時保留 partial 與 checkpoint 供下次恢復
+        self.close()
+        return False
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+語言檢定要求解析（fetch_schools_v2._extract_common_fields 與 clean_data.parse_language_requirement 共用）
+
+所有檢定寫成同一個 regex，申請資格文字只掃一次，依出現順序得到每一項要求：
+  toefl_ibt / toefl   TOEFL iBT 79、TOEFL 80（非 iBT 的 TOEFL 分數只給 clean_data 用）
+  ielts / toeic       IELTS 6.5、TOEIC 750
+  gept                全民英檢中高級
+  language_cefr       法語 B2、德語 CEFR B1、CEFR B1（language 為語言，通用寫法為 None）
+  jlpt                JLPT N2、JLPT成績 2 級（舊制級數轉為 N）
+分數超出該檢定範圍的（如紙本 TOEFL 550）略過。
+
+分組：行首的「日語組」「一般組」等為組別標題，之後各行的要求屬於該組（沒有標題時為一般組）；
+同一行內的要求為擇一（OIA 一律寫成「TOEFL iBT 79 或 IELTS 6.0」），不同行為各自的條件。
+
+輸入為 text_normalizer 正規化後的文字（parse）；原始文字用 parse_text（正規化 + 解析，有快取）。
+
+用法:
+  from language_requirements import parse_text
+  reqs = parse_text(eligibility_text)
+  reqs.first('toefl_ibt')          # 79（文字中第一個）
+  reqs.groups                      # {'日語組': [(Requirement(jlpt N2),)], '一般組': [(TOEFL iBT 79, IELTS 6.0)]}
+  reqs.to_json()                   # 寫入 raw_schools_v2.json 的 language_requirements
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from text_matcher import LANGUAGE_GROUPS
+from text_normalizer import normalize
+
+DEFAULT_GROUP = '一般組'
+
+# 合理範圍（超出者視為其他檢定或誤判）
+MAX_SCORE = {'toefl_ibt': 120, 'toefl': 120, 'ielts': 9, 'toeic': 990}
+
+# CEFR 前面的語言（正規化後皆為「X語」）
+CEFR_LANGUAGES = ['法語', '德語', '西班牙語', '西班牙', '葡萄牙語', '韓語', '日語', '中文']
+
+
+class Requirement(NamedTuple):
+    test: str                       # toefl_ibt / toefl / ielts / toeic / gept / language_cefr / jlpt
+    value: int | float | str
+    language: str | None            # language_cefr 的語言，其他為 None
+    start: int
+    end: int
+
+
+# 每個 alternative 以固定字開頭（regex 引擎可先以字元集跳過不相關的位置，比整段 alternation 快約 4 倍），
+# 最後一個 named group 即為種類（m.lastgroup）。CEFR 每種語言各一個 alternative，group 名稱 cefr0、cefr1… 對應 CEFR_LANGUAGES
+_TOKEN = re.compile(
+    r'TOEFL(?P<ibt> iBT)? ?:? ?(?P<toefl>\d+)'
+    r'|IELTS ?:? ?(?P<ielts>\d+\.?\d*)'
+    r'|TOEIC ?:? ?(?P<toeic>\d+)'
+    r'|全民英檢 ?(?P<gept>初級|中級(?!以下)|中高級|高級|優級)'
+    + ''.join(f'|{language} ?(?:檢定|能力|CEFR)? ?(?:成績 ?)?(?P<cefr{i}>[ABC]\\d)'
+              for i, language in enumerate(CEFR_LANGUAGES)) +
+    r'|CEFR (?P<cefr>[ABC]\d)'
+    r'|JLPT ?(?:成績 ?)?(?:[Nn](?P<jlpt>\d)|(?P<jlpt_level>\d) ?級)'
+)
+_CEFR_GROUPS = {f'cefr{i}': language for i, language in enumerate(CEFR_LANGUAGES)}
+# 組別標題：行首的組別名稱（文字開頭另外以 match 判斷）
+_HEADER = re.compile('\n(' + '|'.join(LANGUAGE_GROUPS) + ')')
+_GROUP = re.compile('|'.join(LANGUAGE_GROUPS))
+
+
+class LanguageRequirements(NamedTuple):
+    items: tuple[Requirement, ...]                          # 依出現順序
+    groups: dict[str, list[tuple[Requirement, ...]]]        # 組別 → 條件（每個條件為擇一的要求）
+
+    def first(self, test: str):
+        """某項檢定在文字中第一次出現的值；language_cefr 以有標明語言的優先"""
+        fallback = None
+        for r in self.items:
+            if r.test == test:
+                if test != 'language_cefr' or r.language:
+                    return r.value
+                if fallback is None:
+                    fallback = r.value
+        return fallback
+
+    def to_json(self) -> dict:
+        return {
+            group: [[_requirement_json(r) for r in alternatives] for alternatives in clauses]
+            for group, clauses in self.groups.items()
+        }
+
+
+def _requirement_json(r: Requirement) -> dict:
+    result = {'test': r.test, 'value': r.value}
+    if r.language:
+        result['language'] = r.language
+    return result
+
+
+def _requirement(m: re.Match) -> Requirement | None:
+    kind = m.lastgroup
+    language = None
+    if kind == 'toefl':
+        test, value = ('toefl_ibt' if m.group('ibt') else 'toefl'), int(m.group('toefl'))
+    elif kind == 'ielts':
+        test, value = 'ielts', float(m.group('ielts'))
+    elif kind == 'toeic':
+        test, value = 'toeic', int(m.group('toeic'))
+    elif kind == 'gept':
+        test, value = 'gept', m.group('gept')
+    elif kind == 'cefr':
+        test, value = 'language_cefr', m.group('cefr')
+    elif kind in _CEFR_GROUPS:
+        test, value, language = 'language_cefr', m.group(kind), _CEFR_GROUPS[kind]
+    elif kind in ('jlpt', 'jlpt_level'):
+        test, value = 'jlpt', f'N{m.group(kind)}'
+    else:
+        return None
+    if test in MAX_SCORE and not 0 <= value <= MAX_SCORE[test]:
+        return None
+    return Requirement(test, value, language, m.start(), m.end())
+
+
+def parse(text: str) -> LanguageRequirements:
+    """解析正規化後的文字（text_normalizer.normalize 的結果）"""
+    # 組別標題的位置（通常只有 0~2 個），要求依位置歸入前一個標題
+    headers = [(m.start(), m.group(1)) for m in _HEADER.finditer(text)]
+    first = _GROUP.match(text)
+    group = first.group(0) if first else DEFAULT_GROUP
+
+    items: list[Requirement] = []
+    groups: dict[str, list[tuple[Requirement, ...]]] = {}
+    line: list[Requirement] = []
+    next_header = 0
+    line_end = -1          # 目前這一行的結尾（換行位置）
+
+    for m in _TOKEN.finditer(text):
+        requirement = _requirement(m)
+        if requirement is None:
+            continue
+        if m.start() > line_end:
+            # 換到新的一行：上一行的要求為一個條件
+            if line:
+                groups.setdefault(group, []).append(tuple(line))
+                line = []
+            while next_header < len(headers) and headers[next_header][0] < m.start():
+                group = headers[next_header][1]
+                next_header += 1
+            line_end = text.find('\n', m.end())
+            if line_end == -1:
+                line_end = len(text)
+        items.append(requirement)
+        line.append(requirement)
+
+    if line:
+        groups.setdefault(group, []).append(tuple(line))
+    return LanguageRequirements(tuple(items), groups)
+
+
+@lru_cache(maxsize=4096)
+def parse_text(text: str) -> LanguageRequirements:
+    """原始文字：正規化後解析（clean_data 同一段文字會依序查 TOEFL / IELTS / TOEIC，結果快取）"""
+    return parse(normalize(text))
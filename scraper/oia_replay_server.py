@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+本機的 OIA 網站替身：以 repo 內的 fixture 回應爬蟲的請求，測試並行、重試、限速時不必打正式站
+
+路徑:
+  /outgoing/school.list[/semester/N]          列表頁（page_source.html，連結改成第 N 學期）
+  /outgoing/view/semester/N/sn/SN             詳細頁（--fixtures/detail/SN.html；沒有則由 raw_schools_v2.json 的 sections_ordered 產生）
+  /students/outgoing.students.experience.do/  心得查詢頁（交換類型、年度、僅顯示有心得、分頁，與正式站相同的 selector）
+  /students/outgoing.students.experience.view/ID   心得頁（一個 PDF 連結 + 一張 photo）
+  /__stats                                    請求數、各狀態碼、注入的錯誤 / 限流次數、最大同時連線數
+  /__reset                                    清除統計
+
+故障注入（每個請求各自計算，server 為多執行緒，延遲不會互相阻塞）:
+  --latency 0.2 --jitter 0.1   每個請求延遲 0.2~0.3 秒
+  --error-rate 0.05            5% 的請求回 503
+  --rate 10 --burst 20         token bucket 限流，超過回 429（Retry-After: 1）
+
+用法:
+  python oia_replay_server.py --port 8765 --latency 0.1 --error-rate 0.02 --rate 20
+  python fetch_schools.py --engine http --workers 8 --base-url http://127.0.0.1:8765
+  python fetch_schools_v2.py --base-url http://127.0.0.1:8765
+  cd experiences && python fetch_experiences.py --base-url http://127.0.0.1:8765
+
+  from oia_replay_server import OIAReplayServer
+  with OIAReplayServer(latency=0.05) as server:
+      requests.get(f'{server.base_url}/outgoing/school.list')
+"""
+
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+BASE_DIR = Path(__file__).parent
+
+LIST_PATH = re.compile(r'^/outgoing/school\.list(?:/semester/(\d+))?/?$')
+DETAIL_PATH = re.compile(r'^/outgoing/view/semester/(\d+)/sn/(\d+)/?$')
+EXPERIENCE_PATH = '/students/outgoing.students.experience.do/'
+EXPERIENCE_VIEW_PATH = re.compile(r'^/students/outgoing\.students\.experience\.view/(\d+)/?$')
+EXPERIENCE_FILE_PATH = re.compile(r'^/uploads/experience/(\d+)/(report\.pdf|photo_1\.png)$')
+# 離線時外部 script（Google Analytics 等）會讓 networkidle 一直等，直接拿掉
+EXTERNAL_SCRIPT = re.compile(r'<script[^>]*\bsrc="https?://[^"]*"[^>]*>\s*</script>', re.IGNORECASE)
+
+EXPERIENCE_YEARS = ['111', '112', '113']
+EXPERIENCE_PAGE_SIZE = 10
+COLLEGES = [('工學院', '機械工程學系'), ('文學院', '外國語文學系'), ('管理學院', '財務金融學系'),
+            ('電機資訊學院', '資訊工程學系'), ('社會科學院', '經濟學系'), ('理學院', '物理學系')]
+
+# 1x1 透明 PNG
+PHOTO_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+def minimal_pdf(text: str) -> bytes:
+    """一頁、一行文字的 PDF（extract_pdfs.py 可解析）"""
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('latin-1')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# ── 頁面產生 ─────────────────────────────────────────────────
+
+def _section_html(entry: dict) -> str:
+    label = html.escape(entry['label'])
+    if not entry['text'] and not entry['links']:
+        return f'<div class="uninfo-awall"><div class="uninfo-label"><span>{label}</span></div></div>'
+    body = html.escape(entry['text'])
+    for link in entry['links']:
+        anchor = f'<a href="{html.escape(link["href"], quote=True)}">{html.escape(link["text"])}</a>'
+        escaped = html.escape(link['text'])
+        if escaped and escaped in body:
+            body = body.replace(escaped, anchor, 1)
+        else:
+            body += ' ' + anchor
+    body = body.replace('\n', '<br>\n')
+    return (f'<div class="uninfo-awall"><div class="uninfo-label"><span>{label}</span></div>'
+            f'<div class="uninfo-content">{body}</div></div>')
+
+
+def render_detail(school: dict) -> str:
+    name_zh = html.escape(school.get('name_zh_detail') or school.get('name_zh', ''))
+    name_en = html.escape(school.get('name_en', ''))
+    sections = '\n'.join(_section_html(e) for e in school.get('sections_ordered', []))
+    return f"""<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>{name_zh}</title></head>
+<body>
+<header><nav>主選單</nav></header>
+<main class="main"><div class="main-inner">
+<h2 class="university-title">{name_zh}<small>{name_en}</small></h2>
+{sections}
+</div></main>
+<footer>National Taiwan University Office of International Affairs</footer>
+</body></html>"""
+
+
+def build_experiences(schools: list[dict], per_year: int) -> list[dict]:
+    """由學校清單產生固定的心得資料（同樣的輸入每次結果相同）"""
+    rng = random.Random(113)
+    experiences = []
+    for year in EXPERIENCE_YEARS:
+        for i in range(per_year):
+            school = rng.choice(schools)
+            college, department = rng.choice(COLLEGES)
+            experiences.append({
+                'id': len(experiences) + 1,
+                'year': year,
+                'year_info': f'{year}學年度第{i % 2 + 1}學期',
+                'country': school.get('country', ''),
+                'school': school.get('name_zh', ''),
+                'college': college,
+                'department': department,
+                'degree': rng.choice(['學士', '碩士']),
+                'name': f'{"王李張陳林"[i % 5]}○{"明華安平文"[(i // 5) % 5]}',
+            })
+    return experiences
+
+
+def render_experience_search(experiences: list[dict], query: dict[str, str], base_url: str) -> str:
+    year = query.get('year', '')
+    exchange = query.get('identity') == '3'
+    only_experience = query.get('have_experience') == '1'
+    page = max(int(query.get('page', '1') or 1), 1)
+
+    rows_html = ''
+    pager = ''
+    if exchange and year:
+        # 假資料每筆都有心得，have_experience 只影響表單狀態
+        matched = [e for e in experiences if e['year'] == year]
+        pages = max((len(matched) + EXPERIENCE_PAGE_SIZE - 1) // EXPERIENCE_PAGE_SIZE, 1)
+        page = min(page, pages)
+        for e in matched[(page - 1) * EXPERIENCE_PAGE_SIZE:page * EXPERIENCE_PAGE_SIZE]:
+            url = f'{base_url}/students/outgoing.students.experience.view/{e["id"]}'
+            cells = ''.join(f'<td>{html.escape(e[k])}</td>' for k in
+                            ('year_info', 'country', 'school', 'college', 'department', 'degree', 'name'))
+            rows_html += (f'<tr>{cells}<td><a href="javascript:void(0)" '
+                          f'onclick="window.open(\'{url}\')">查看心得</a></td></tr>\n')
+        next_query = urlencode({**query, 'page': page + 1})
+        disabled = ' disabled' if page >= pages else ''
+        pager = (f'<ul class="pagination"><li class="page-item{disabled}">'
+                 f'<a class="page-link" aria-label="Next" href="?{next_query}">Next</a></li></ul>')
+
+    options = ''.join(f'<option value="{y}"{" selected" if y == year else ""}>{y}</option>'
+                      for y in EXPERIENCE_YEARS)
+    return f"""<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>出國交換心得</title></head>
+<body>
+<form id="search">
+<label><input type="checkbox" id="identityExchange" name="identity" value="3"{" checked" if exchange else ""}>交換</label>
+<label><input type="checkbox" name="have_experience" value="1"{" checked" if only_experience else ""}>僅顯示有繳交心得之結果</label>
+<select id="select2" name="year" multiple>{options}</select>
+</form>
+<table><thead><tr><th>年度</th><th>國家</th><th>學校</th><th>學院</th><th>系所</th><th>學位</th><th>姓名</th><th>心得</th></tr></thead>
+<tbody>
+{rows_html}</tbody></table>
+{pager}
+<script>
+// 正式站以 jQuery + Select2 送出查詢；這裡只需要 $(select).trigger('change')
+window.$ = el => ({{ trigger: type => el.dispatchEvent(new Event(type)) }});
+const form = document.getElementById('search');
+function submit() {{
+  const params = new URLSearchParams();
+  if (form.identity.checked) params.set('identity', '3');
+  if (form.have_experience.checked) params.set('have_experience', '1');
+  const year = Array.from(form.year.selectedOptions).map(o => o.value)[0];
+  if (year) params.set('year', year);
+  location.search = params.toString();
+}}
+form.identity.addEventListener('click', submit);
+form.have_experience.addEventListener('click', submit);
+form.year.addEventListener('change', submit);
+</script>
+</body></html>"""
+
+
+def render_experience_view(experience: dict) -> str:
+    base = f'/uploads/experience/{experience["id"]}'
+    return f"""<!DOCTYPE html>
+<html lang="zh-Hant"><head><meta charset="utf-8"><title>心得</title></head>
+<body>
+<h3>{html.escape(experience['school'])} {html.escape(experience['name'])}</h3>
+<a href="{base}/report.pdf">心得報告.pdf</a>
+<img src="{base}/photo_1.png" alt="交換照片">
+</body></html>"""
+
+
+# ── 限流 / 統計 ──────────────────────────────────────────────
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.status = Counter()
+            self.injected_errors = 0
+            self.throttled = 0
+            self.in_flight = 0
+            self.max_concurrent = 0
+
+    def enter(self):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_concurrent = max(self.max_concurrent, self.in_flight)
+
+    def leave(self, status: int):
+        with self.lock:
+            self.in_flight -= 1
+            self.status[status] += 1
+
+    def to_json(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'status': {str(k): v for k, v in sorted(self.status.items())},
+                'injected_errors': self.injected_errors,
+                'throttled': self.throttled,
+                'in_flight': self.in_flight,
+                'max_concurrent': self.max_concurrent,
+            }
+
+
+# ── Server ───────────────────────────────────────────────────
+
+class OIAReplayServer:
+    def __init__(self, host='127.0.0.1', port=0, fixtures=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate=None, burst=10, experiences_per_year=25, seed=None):
+        self.fixtures = Path(fixtures) if fixtures else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = Stats()
+
+        self.list_html = EXTERNAL_SCRIPT.sub('', (BASE_DIR / 'page_source.html').read_text(encoding='utf-8'))
+        with open(BASE_DIR / 'raw_schools_v2.json', encoding='utf-8') as f:
+            self.schools = {str(s['id']): s for s in json.load(f)}
+        self.experiences = build_experiences(list(self.schools.values()), experiences_per_year)
+        self.pdf_bytes = minimal_pdf('NTU OIA exchange report (replay fixture)')
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.stats.enter()
+                status = 500
+                try:
+                    status = server.handle(self)
+                finally:
+                    server.stats.leave(status)
+
+        return Handler
+
+    def _send(self, request, status: int, body: bytes, content_type='text/html; charset=utf-8', headers=None):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
+        return status
+
+    def handle(self, request) -> int:
+        url = urlparse(request.path)
+        path = url.path
+
+        if path == '/__stats':
+            return self._send(request, 200, json.dumps(self.stats.to_json()).encode(), 'application/json')
+        if path == '/__reset':
+            self.stats.reset()
+            return self._send(request, 200, b'{}', 'application/json')
+
+        if self.bucket and not self.bucket.take():
+            with self.stats.lock:
+                self.stats.throttled += 1
+            return self._send(request, 429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * self._random())
+
+        if self.error_rate and self._random() < self.error_rate:
+            with self.stats.lock:
+                self.stats.injected_errors += 1
+            return self._send(request, 503, b'Service Unavailable', 'text/plain')
+
+        base_url = f'http://{request.headers.get("Host") or self.base_url[len("http://"):]}'
+
+        m = LIST_PATH.match(path)
+        if m:
+            semester = m.group(1) or '1'
+            body = self.list_html.replace('/outgoing/view/semester/1/', f'/outgoing/view/semester/{semester}/')
+            return self._send(request, 200, body.encode('utf-8'))
+
+        m = DETAIL_PATH.match(path)
+        if m:
+            sn = m.group(2)
+            recorded = self.fixtures / 'detail' / f'{sn}.html' if self.fixtures else None
+            if recorded and recorded.exists():
+                return self._send(request, 200, recorded.read_bytes())
+            school = self.schools.get(sn)
+            if school is None:
+                return self._send(request, 404, b'Not Found', 'text/plain')
+            return self._send(request, 200, render_detail(school).encode('utf-8'))
+
+        if path == EXPERIENCE_PATH:
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            return self._send(request, 200, render_experience_search(self.experiences, query, base_url).encode('utf-8'))
+
+        m = EXPERIENCE_VIEW_PATH.match(path)
+        if m and 0 < int(m.group(1)) <= len(self.experiences):
+            return self._send(request, 200, render_experience_view(self.experiences[int(m.group(1)) - 1]).encode('utf-8'))
+
+        m = EXPERIENCE_FILE_PATH.match(path)
+        if m:
+            if m.group(2) == 'report.pdf':
+                return self._send(request, 200, self.pdf_bytes, 'application/pdf')
+            return self._send(request, 200, PHOTO_BYTES, 'image/png')
+
+        return self._send(request, 404, b'Not Found', 'text/plain')
+
+    # ── 啟動 / 關閉 ─────────────────────────────────────────
+
+    def start(self) -> 'OIAReplayServer':
+        """在背景執行緒啟動（測試 / benchmark 用）"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本機 OIA 網站替身（以 fixture 回應）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', help='錄製的詳細頁目錄（detail/<sn>.html），沒有的學校由 JSON 產生')
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的固定延遲（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='額外的隨機延遲上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回 503 的比例（0~1）')
+    parser.add_argument('--rate', type=float, help='每秒最多幾個請求（超過回 429）')
+    parser.add_argument('--burst', type=int, default=10, help='限流的 burst 大小')
+    parser.add_argument('--experiences-per-year', type=int, default=25, help='每個年度的心得筆數')
+    parser.add_argument('--seed', type=int, help='故障注入的亂數種子')
+    args = parser.parse_args()
+
+    server = OIAReplayServer(
+        args.host, args.port, args.fixtures, args.latency, args.jitter,
+        args.error_rate, args.rate, args.burst, args.experiences_per_year, args.seed,
+    )
+    print(f'OIA replay server: {server.base_url}  （統計: {server.base_url}/__stats）')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
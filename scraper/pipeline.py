@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+爬蟲資料流程的 DAG 執行器：宣告每個階段的輸入 / 輸出，輸入沒變的階段直接跳過
+
+學校（每學期）:
+  crawl ─→ diff ─→ coordinates ─→ google ─→ import
+  crawl       fetch_schools_v2.py --changed-only   輸入：列表頁（遠端）→ raw_schools_v2_sem{N}.json
+  diff        diff_engine.py                       → diff_report_sem{N}.json
+  coordinates add_coordinates.py                   原地補上經緯度（Nominatim）
+  google      geocode_google.py --update-json      只在第 2 學期且有 GOOGLE_MAPS_API_KEY 時執行
+  import      scripts/import-schools-v2.ts         寫入 DB，只在加上 --import 時執行
+心得（與學校分支互不相依，同時執行）:
+  pdfs ─→ images
+  pdfs        experiences/extract_pdfs.py          experiences_data.json → pdf_extracts/
+  images      experiences/process_images.py        原地去重 / 縮圖
+
+判斷方式（類似 make，但以內容 hash 而不是修改時間）:
+  - 每個檔案記錄 blake2b（目錄為各檔案的大小 + mtime），列表頁記錄表格內容的 hash；
+    上次執行結束時的值存在 pipeline_state.json
+  - 一個階段需要執行：從未成功過、腳本或參數變了、輸出不存在、或任何輸入與上次不同
+    （被外部修改，或上游階段這次執行後內容改變）
+  - 原地修改同一個 JSON 的階段（crawl → coordinates → google）依宣告順序串接
+  - 階段失敗時，它與所有下游階段的紀錄都清掉，下次一定重跑
+列表頁沒變時整個流程只需抓一次列表頁 + hash 幾個檔案，幾秒內結束。
+
+用法:
+  python pipeline.py                       # 第 2 學期
+  python pipeline.py --semester 1
+  python pipeline.py --dry-run             # 只顯示哪些階段會執行
+  python pipeline.py --only crawl,diff     # 只考慮這些階段
+  python pipeline.py --force coordinates   # 強制重跑（下游會因輸入改變而跟著跑）
+  python pipeline.py --touch               # 不執行，把目前的檔案狀態記為最新（手動跑完各腳本後使用）
+  python pipeline.py --import              # 最後匯入 DB
+  python pipeline.py --base-url http://127.0.0.1:8765  # 改爬本機替身（oia_replay_server.py）
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+REPO_DIR = BASE_DIR.parent
+STATE_FILE = BASE_DIR / 'pipeline_state.json'
+DEFAULT_BASE_URL = 'https://oia.ntu.edu.tw'
+
+
+class Stage(NamedTuple):
+    name: str
+    command: list[str]           # 相對 cwd；.py 開頭的以目前的直譯器執行
+    cwd: Path
+    inputs: list[str]            # 相對 BASE_DIR 的檔案 / 目錄，或 remote:<url>
+    outputs: list[str]
+    key: str                     # pipeline_state.json 中的 key（學期相關的階段帶學期）
+    disabled: Callable[[], str | None] = lambda: None   # 回傳停用原因
+
+
+def build_stages(semester: int, base_url: str, with_import: bool) -> list[Stage]:
+    """宣告順序即原地修改同一檔案時的執行順序"""
+    raw = f'raw_schools_v2_sem{semester}.json'
+    list_url = f'{base_url}/outgoing/school.list/semester/{semester}'
+    crawl_args = ['--semester', str(semester), '--changed-only']
+    if base_url != DEFAULT_BASE_URL:
+        crawl_args += ['--base-url', base_url]
+    experiences = BASE_DIR / 'experiences'
+
+    def google_disabled():
+        if semester != 2:
+            return 'geocode_google.py 只處理第 2 學期'
+        if not os.environ.get('GOOGLE_MAPS_API_KEY'):
+            return '未設定 GOOGLE_MAPS_API_KEY'
+        return None
+
+    return [
+        Stage('crawl', ['fetch_schools_v2.py', *crawl_args], BASE_DIR,
+              inputs=[f'remote:{list_url}'],
+              outputs=[raw, f'eligibility_index_sem{semester}.json', f'snapshots/sem{semester}'],
+              key=f'crawl:sem{semester}'),
+        Stage('diff', ['diff_engine.py', '--semester', str(semester)], BASE_DIR,
+              inputs=[raw, f'snapshots/sem{semester}'],
+              outputs=[f'diff_report_sem{semester}.json'],
+              key=f'diff:sem{semester}'),
+        Stage('coordinates', ['add_coordinates.py', '--semester', str(semester)], BASE_DIR,
+              inputs=[raw, 'coordinates_cache.json'],
+              outputs=[raw, 'coordinates_cache.json'],
+              key=f'coordinates:sem{semester}'),
+        Stage('google', ['geocode_google.py', '--update-json'], BASE_DIR,
+              inputs=[raw, 'google_coordinates.json'],
+              outputs=[raw, 'google_coordinates.json'],
+              key=f'google:sem{semester}', disabled=google_disabled),
+        Stage('import', ['npx', 'tsx', 'scripts/import-schools-v2.ts', '--semester', str(semester)], REPO_DIR,
+              inputs=[raw],
+              outputs=[],
+              key=f'import:sem{semester}',
+              disabled=lambda: None if with_import else '未指定 --import'),
+        Stage('pdfs', ['extract_pdfs.py'], experiences,
+              inputs=['experiences/experiences_data.json'],
+              outputs=['experiences/pdf_extracts', 'experiences/pdfs'],
+              key='pdfs'),
+        Stage('images', ['process_images.py'], experiences,
+              inputs=['experiences/pdf_extracts'],
+              outputs=['experiences/pdf_extracts'],
+              key='images'),
+    ]
+
+
+def dependencies(stages: list[Stage]) -> dict[str, set[str]]:
+    """
+    後宣告的階段若讀寫先宣告階段的輸出（或寫入它的輸入），就必須等它完成；
+    沒有共用檔案的階段互不相依，可同時執行
+    """
+    deps = {stage.name: set() for stage in stages}
+    for i, later in enumerate(stages):
+        touches = set(later.inputs) | set(later.outputs)
+        for earlier in stages[:i]:
+            if set(earlier.outputs) & touches or set(later.outputs) & set(earlier.inputs):
+                deps[later.name].add(earlier.name)
+    return deps
+
+
+# ── 指紋 ─────────────────────────────────────────────────────
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dir_digest(path: Path) -> str:
+    # 目錄內可能有上千張圖片：只看相對路徑、大小、修改時間，不讀內容
+    h = hashlib.blake2b(digest_size=16)
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file = Path(root, name)
+            st = file.stat()
+            h.update(f'{file.relative_to(path)}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode())
+    return h.hexdigest()
+
+
+def _remote_digest(url: str) -> str | None:
+    """列表頁表格（tbody）內容的 hash；名額、更新標記等列表欄位變了才會不同。抓取失敗回傳 None"""
+    import requests
+    from bs4 import BeautifulSoup
+    try:
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"無法取得 {url}: {e}")
+        return None
+    soup = BeautifulSoup(response.text, 'lxml')
+    table = ''.join(str(tbody) for tbody in soup.select('tbody'))
+    return hashlib.blake2b(table.encode(), digest_size=16).hexdigest()
+
+
+def fingerprint(item: str) -> str | None:
+    """輸入 / 輸出的目前狀態；不存在（或遠端抓不到）為 None"""
+    if item.startswith('remote:'):
+        return _remote_digest(item[len('remote:'):])
+    path = BASE_DIR / item
+    if path.is_dir():
+        return _dir_digest(path)
+    if path.is_file():
+        return _file_digest(path)
+    return None
+
+
+def signature(stage: Stage) -> str:
+    """腳本內容 + 參數；改了腳本或參數就視為需要重跑"""
+    h = hashlib.blake2b(json.dumps(stage.command).encode(), digest_size=16)
+    for arg in stage.command:
+        script = stage.cwd / arg
+        if script.suffix in ('.py', '.ts') and script.is_file():
+            h.update(script.read_bytes())
+    return h.hexdigest()
+
+
+# ── 狀態 ─────────────────────────────────────────────────────
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        with open(STATE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    return {'files': {}, 'stages': {}}
+
+
+def save_state(state: dict):
+    tmp = STATE_FILE.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+# ── 執行 ─────────────────────────────────────────────────────
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], state: dict, force: set[str] = frozenset(), only: set[str] | None = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.only = only
+        self.order = [stage.name for stage in stages]
+        self.deps = dependencies(stages)
+        self.state = state
+        self.force = force
+
+        # 與上次結束時不同的檔案（外部修改 / 上游這次改了內容）
+        items = {item for stage in stages for item in stage.inputs + stage.outputs}
+        self.current = {item: fingerprint(item) for item in sorted(items)}
+        self.changed = {item for item, digest in self.current.items()
+                        if digest is None or digest != state['files'].get(item)}
+
+    def reason_to_run(self, stage: Stage) -> str | None:
+        """需要執行的原因；None 表示可跳過"""
+        record = self.state['stages'].get(stage.key)
+        if stage.name in self.force:
+            return '--force'
+        if record is None:
+            return '沒有成功紀錄'
+        if record['signature'] != signature(stage):
+            return '腳本或參數改變'
+        missing = [o for o in stage.outputs if self.current.get(o) is None]
+        if missing:
+            return f'輸出不存在: {", ".join(missing)}'
+        # 只看輸入（原地修改的檔案同時也是輸入）；輸出被外部改動不會讓 crawl 重爬
+        changed = [i for i in stage.inputs if i in self.changed]
+        if changed:
+            return f'內容改變: {", ".join(changed)}'
+        return None
+
+    def missing_inputs(self, stage: Stage) -> list[str]:
+        # 上游都結束了仍不存在的輸入（例如還沒爬過心得）
+        return [i for i in stage.inputs if not i.startswith('remote:') and self.current.get(i) is None]
+
+    def _execute(self, stage: Stage) -> bool:
+        command = list(stage.command)
+        if command[0].endswith('.py'):
+            command.insert(0, sys.executable)
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        start = time.time()
+        process = subprocess.Popen(command, cwd=stage.cwd, env=env, text=True,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        for line in process.stdout:
+            logger.info(f"[{stage.name}] {line.rstrip()}")
+        process.wait()
+        ok = process.returncode == 0
+        mark = '✓' if ok else f'✗ exit {process.returncode}'
+        logger.info(f"[{stage.name}] {mark}（{time.time() - start:.1f}s）")
+        return ok
+
+    def _record(self, stage: Stage, before: dict[str, str | None]):
+        """階段成功：記錄簽章，內容改變的輸出標為 changed 讓下游重跑"""
+        for item in stage.outputs:
+            self.current[item] = fingerprint(item)
+            if self.current[item] != before.get(item):
+                self.changed.add(item)
+        self.state['stages'][stage.key] = {
+            'signature': signature(stage),
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+
+    def _uses_output(self, stage: Stage, upstream: str) -> bool:
+        # 只是「先讀完才能改寫」的順序關係（例如 diff 之於 coordinates）不受上游失敗影響
+        return bool(set(self.stages[upstream].outputs) & set(stage.inputs + stage.outputs))
+
+    def _invalidate(self, name: str):
+        self.state['stages'].pop(self.stages[name].key, None)
+
+    def run(self, workers: int, dry_run: bool = False, touch: bool = False) -> dict[str, str]:
+        """
+        依相依關係執行，相依的階段都結束後才決定要不要跑；_execute 在 thread 中執行，
+        其餘狀態只在這個 thread 更新。回傳 {階段: ran / skipped / disabled / failed / blocked ...}
+        """
+        results: dict[str, str] = {}
+        pending = list(self.order)
+        running = {}
+
+        def finished(name):
+            return name in results
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name in list(pending):
+                    if not all(finished(d) for d in self.deps[name]):
+                        continue
+                    pending.remove(name)
+                    stage = self.stages[name]
+
+                    if any(results[d] in ('failed', 'blocked') and self._uses_output(stage, d) for d in self.deps[name]):
+                        logger.warning(f"[{name}] 上游失敗，不執行")
+                        self._invalidate(name)
+                        results[name] = 'blocked'
+                        continue
+                    disabled = '未選取（--only）' if self.only and name not in self.only else stage.disabled()
+                    if disabled:
+                        logger.info(f"[{name}] 停用：{disabled}")
+                        if self.reason_to_run(stage):
+                            # 這次原本需要執行：清掉紀錄，重新啟用後會補跑
+                            self._invalidate(name)
+                        results[name] = 'disabled'
+                        continue
+                    missing = self.missing_inputs(stage)
+                    if missing:
+                        logger.info(f"[{name}] 略過：缺少輸入 {', '.join(missing)}")
+                        self._invalidate(name)
+                        results[name] = 'disabled'
+                        continue
+                    reason = self.reason_to_run(stage)
+                    if reason is None:
+                        logger.info(f"[{name}] ✓ 輸入未改變，跳過")
+                        results[name] = 'skipped'
+                        continue
+
+                    if touch and any(self.current.get(o) is None for o in stage.outputs):
+                        logger.warning(f"[{name}] {reason}，無法記為最新")
+                        results[name] = 'not touched'
+                        continue
+                    if dry_run or touch:
+                        logger.info(f"[{name}] {'記為最新' if touch else '將執行'}：{reason}")
+                        if touch:
+                            self._record(stage, dict(self.current))
+                        else:
+                            # 假設執行後輸出都會產生且改變，下游跟著顯示
+                            self.changed.update(stage.outputs)
+                            self.current.update({o: self.current.get(o) or 'dry-run' for o in stage.outputs})
+                        results[name] = 'touched' if touch else 'would run'
+                        continue
+
+                    logger.info(f"[{name}] 執行：{reason}")
+                    before = {item: self.current.get(item) for item in stage.outputs}
+                    running[pool.submit(self._execute, stage)] = (name, before)
+
+                if not running:
+                    if pending and not any(all(finished(d) for d in self.deps[n]) for n in pending):
+                        raise RuntimeError(f"相依關係無法滿足: {pending}")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, before = running.pop(future)
+                    if future.result():
+                        self._record(self.stages[name], before)
+                        results[name] = 'ran'
+                    else:
+                        self._invalidate(name)
+                        results[name] = 'failed'
+
+        if not dry_run:
+            # 記錄這次結束時的狀態；失敗 / 被擋下的階段紀錄已清除，下次仍會執行
+            # （失敗階段改到一半的輸出沒有更新 current，下次會被視為外部修改）
+            self.state['files'].update({k: v for k, v in self.current.items() if v is not None})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬蟲資料流程（輸入沒變的階段跳過）')
+    parser.add_argument('--semester', type=int, default=2)
+    parser.add_argument('--only', help='只考慮這些階段（逗號分隔）')
+    parser.add_argument('--force', default='', help='強制重跑的階段（逗號分隔，all 為全部）')
+    parser.add_argument('--workers', type=int, default=2, help='同時執行的階段數')
+    parser.add_argument('--dry-run', action='store_true', help='只顯示會執行的階段')
+    parser.add_argument('--touch', action='store_true', help='不執行，把目前狀態記為最新')
+    parser.add_argument('--import', dest='with_import', action='store_true', help='最後匯入 DB')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='網站位址（測試時指向 oia_replay_server.py）')
+    args = parser.parse_args()
+
+    stages = build_stages(args.semester, args.base_url.rstrip('/'), args.with_import)
+    names = [s.name for s in stages]
+    selected = args.only.split(',') if args.only else names
+    force = set(names) if args.force == 'all' else {f for f in args.force.split(',') if f}
+    unknown = (set(selected) | force) - set(names)
+    if unknown:
+        parser.error(f"未知的階段: {', '.join(sorted(unknown))}（可用: {', '.join(names)}）")
+
+    start = time.time()
+    logger.info("=" * 60)
+    logger.info(f"Pipeline Semester {args.semester}{'  [DRY RUN]' if args.dry_run else ''}{'  [TOUCH]' if args.touch else ''}")
+    logger.info("=" * 60)
+
+    state = load_state()
+    # 未選取的階段照樣參與判斷：輸入變了就清掉紀錄，之後不加 --only 時會補跑
+    pipeline = Pipeline(stages, state, force, set(selected))
+    results = pipeline.run(args.workers, dry_run=args.dry_run, touch=args.touch)
+    if not args.dry_run:
+        save_state(state)
+
+    logger.info("=" * 60)
+    for name in pipeline.order:
+        logger.info(f"  {name:<12} {results.get(name, '-')}")
+    logger.info(f"耗時: {time.time() - start:.1f}s")
+    logger.info("=" * 60)
+    if any(r in ('failed', 'blocked') for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
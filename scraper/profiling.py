@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+爬蟲腳本共用的效能剖析開關（cProfile）
+
+  --profile                     剖析整個 main()
+  --profile-stage detail        只剖析某個階段：list / detail / extract / geocode / write（可用逗號指定多個）
+  --profile-output DIR          .prof 輸出目錄（預設 scraper/profiles/）
+  --profile-top 25              結束時印出累計耗時前 N 名的函式
+環境變數 SCRAPER_PROFILE=1、SCRAPER_PROFILE_STAGE=detail,geocode 效果相同（nightly 不必改指令）。
+
+這些參數在 run() 開始時才從 sys.argv 移除（之後 main() 的 argparse 看不到）；import 本模組不會動到 sys.argv，
+被其他程式當函式庫 import 時 stage() 一律不剖析。
+沒有開啟時 stage() 回傳同一個 nullcontext、run() 直接呼叫 main()，不增加任何成本。
+階段可能在 thread pool 中執行：每個 thread 各用一個 profiler，輸出時合併。
+
+腳本端:
+  import profiling
+  with profiling.stage('detail'):
+      ...
+  if __name__ == '__main__':
+      profiling.run(main)
+
+輸出 profiles/<腳本>-<main|階段>-<時間>.prof（python -m pstats / snakeviz 可開啟）。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+STAGES = ('list', 'detail', 'extract', 'geocode', 'write')
+DEFAULT_OUTPUT = Path(__file__).parent / 'profiles'
+DEFAULT_TOP = 25
+
+_NULL = nullcontext()
+
+
+def _take_flags(argv: list[str]) -> dict:
+    """從 argv 取出（並移除）剖析參數"""
+    options = {
+        'main': os.environ.get('SCRAPER_PROFILE', '') not in ('', '0'),
+        'stages': {s for s in os.environ.get('SCRAPER_PROFILE_STAGE', '').split(',') if s},
+        'output': os.environ.get('SCRAPER_PROFILE_OUTPUT') or DEFAULT_OUTPUT,
+        'top': DEFAULT_TOP,
+    }
+    remaining = [argv[0]] if argv else []
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        name, _, inline = arg.partition('=')
+        if name == '--profile':
+            options['main'] = True
+        elif name in ('--profile-stage', '--profile-output', '--profile-top'):
+            value = inline if inline else (argv[i + 1] if i + 1 < len(argv) else '')
+            if not inline:
+                i += 1
+            if name == '--profile-stage':
+                options['stages'].update(s for s in value.split(',') if s)
+            elif name == '--profile-output':
+                options['output'] = value
+            else:
+                try:
+                    options['top'] = int(value)
+                except ValueError:
+                    raise SystemExit(f"--profile-top 需要整數: {value!r}")
+        else:
+            remaining.append(arg)
+        i += 1
+    argv[:] = remaining
+
+    unknown = options['stages'] - set(STAGES)
+    if unknown:
+        raise SystemExit(f"未知的 --profile-stage: {', '.join(sorted(unknown))}（可用: {', '.join(STAGES)}）")
+    return options
+
+
+# run() 設定之前（例如被當成函式庫 import）一律不剖析
+_options: dict = {}
+ENABLED = False
+
+
+class _StageProfiler:
+    """同一階段在各 thread 的 profiler；同一 thread 內巢狀進入只算一次"""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.profiles: list[cProfile.Profile] = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self):
+        if getattr(_active, 'stage', None) is not None:
+            # 已有其他階段在剖析（cProfile 同一 thread 只能有一個），時間算在外層
+            yield
+            return
+        profile = getattr(self.local, 'profile', None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        _active.stage = self
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            _active.stage = None
+
+
+_active = threading.local()
+_stage_profilers: dict[str, _StageProfiler] = {}
+
+
+def stage(name: str):
+    """標記一個階段；只有 --profile-stage 指定的階段會被剖析"""
+    if not ENABLED:
+        return _NULL
+    profiler = _stage_profilers.get(name)
+    return profiler() if profiler else _NULL
+
+
+def _report(label: str, profiles: list[cProfile.Profile]):
+    profiles = [p for p in profiles if p.getstats()]
+    if not profiles:
+        print(f"[profile] {label}: 沒有執行到，未輸出", file=sys.stderr)
+        return
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+
+    output = Path(_options['output'])
+    output.mkdir(parents=True, exist_ok=True)
+    script = Path(sys.argv[0]).stem or 'python'
+    path = output / f"{script}-{label}-{datetime.now():%Y%m%d-%H%M%S}.prof"
+    stats.dump_stats(path)
+
+    buffer = io.StringIO()
+    stats.stream = buffer
+    stats.sort_stats('cumulative').print_stats(_options['top'])
+    print('=' * 60, file=sys.stderr)
+    print(f"[profile] {label}（{len(profiles)} 個 thread）→ {path}", file=sys.stderr)
+    print(buffer.getvalue().strip(), file=sys.stderr)
+    print('=' * 60, file=sys.stderr)
+
+
+def run(main, *args, **kwargs):
+    """從 sys.argv / 環境變數讀取剖析參數後執行 main()；有開啟剖析時包上 cProfile 並在結束後輸出"""
+    global _options, _stage_profilers, ENABLED
+    _options = _take_flags(sys.argv)
+    ENABLED = _options['main'] or bool(_options['stages'])
+    _stage_profilers = {name: _StageProfiler() for name in _options['stages']} if not _options['main'] else {}
+    if not ENABLED:
+        return main(*args, **kwargs)
+
+    if _options['stages'] and _options['main']:
+        print("[profile] 已指定 --profile，忽略 --profile-stage", file=sys.stderr)
+
+    profile = cProfile.Profile() if _options['main'] else None
+    try:
+        if profile:
+            return profile.runcall(main, *args, **kwargs)
+        return main(*args, **kwargs)
+    finally:
+        if profile:
+            _report('main', [profile])
+        for name, profiler in _stage_profilers.items():
+            _report(name, profiler.profiles)
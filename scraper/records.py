@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+學校 / 心得資料的記憶體內表示（__slots__ dataclass），以及與現有 JSON 的互轉
+
+JSON 格式不變（raw_schools_v2*.json、experiences_data.json），只是載入後不再是層層 dict：
+  ListRow          列表頁一列（fetch_schools_v2.extract_school_links 的欄位）
+  School           ListRow + 詳細頁（校名、sections、_extract_common_fields 萃取的欄位、座標）
+  Sections         詳細頁 section 的唯一表示：依頁面順序的 tuple[Section]
+                   JSON 的 sections（label → dict 或 list）與 sections_ordered 都由它產生，
+                   查詢不必再判斷 dict / list（同名 section 取第一個，all() 取全部）；
+                   normalized() 取正規化後的文字（text_normalizer，每段只算一次）
+  ExperienceEntry  fetch_experiences.py 的一位學生（pdf_links / image_links）
+
+JSON 中沒有的欄位以 ABSENT 表示，to_dict() 不輸出，轉回去與原本的 dict 相等（未知欄位保留在 extra）。
+label、國家等重複字串以 sys.intern 共用。
+
+用法:
+  from records import School, load_schools, dump_schools
+  schools = load_schools('raw_schools_v2.json')       # list[School]
+  schools[0].sections.text('申請資格')
+  dump_schools(schools, 'out.json')                   # 與原 JSON 相同
+
+記憶體與萃取速度比較見 bench_records.py。
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field, fields
+
+from text_normalizer import normalize
+
+ABSENT = type('Absent', (), {'__repr__': lambda self: 'ABSENT', '__bool__': lambda self: False})()
+_intern = sys.intern
+
+
+# ── 詳細頁 section ───────────────────────────────────────────
+
+@dataclass(slots=True, frozen=True)
+class Link:
+    text: str
+    href: str
+
+
+@dataclass(slots=True, frozen=True)
+class Section:
+    label: str
+    text: str
+    links: tuple[Link, ...] = ()
+    # text 的正規化結果（text_normalizer），第一次用到時才計算；不進 JSON、不影響比較
+    _normalized: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def normalized(self) -> str:
+        value = self._normalized
+        if value is None:
+            value = normalize(self.text)
+            object.__setattr__(self, '_normalized', value)
+        return value
+
+    @classmethod
+    def from_json(cls, entry: dict) -> 'Section':
+        links = entry.get('links')
+        return cls(
+            _intern(entry.get('label', '')),
+            entry.get('text', ''),
+            tuple(Link(l.get('text', ''), l.get('href', '')) for l in links) if links else (),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            'label': self.label,
+            'text': self.text,
+            'links': [{'text': l.text, 'href': l.href} for l in self.links],
+        }
+
+
+class Sections:
+    """詳細頁所有 section（依頁面順序）；同名 section 可能出現多次"""
+
+    __slots__ = ('entries',)
+
+    def __init__(self, entries=()):
+        self.entries: tuple[Section, ...] = tuple(entries)
+
+    def get(self, label: str) -> Section | None:
+        # 一頁約 15 個 section，線性比對比多建一個 dict 省記憶體，速度也相當
+        for entry in self.entries:
+            if entry.label == label:
+                return entry
+        return None
+
+    def text(self, label: str) -> str:
+        """第一個同名 section 的文字；沒有則為空字串"""
+        entry = self.get(label)
+        return entry.text if entry else ''
+
+    def normalized(self, label: str) -> str:
+        """第一個同名 section 正規化後的文字（快取在 Section 上）；沒有則為空字串"""
+        entry = self.get(label)
+        return entry.normalized if entry else ''
+
+    def all(self, label: str) -> list[Section]:
+        return [e for e in self.entries if e.label == label]
+
+    def __contains__(self, label: str) -> bool:
+        return self.get(label) is not None
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __eq__(self, other):
+        return isinstance(other, Sections) and self.entries == other.entries
+
+    def __repr__(self):
+        return f"Sections({[e.label for e in self.entries]})"
+
+    @classmethod
+    def from_json(cls, sections_ordered: list[dict]) -> 'Sections':
+        """由 sections_ordered 建立"""
+        return cls(Section.from_json(e) for e in sections_ordered)
+
+    @classmethod
+    def from_legacy(cls, sections: dict) -> 'Sections':
+        """由舊的 sections（label → dict 或 list）建立；只有 sections、沒有 sections_ordered 的資料使用"""
+        entries = []
+        for value in sections.values():
+            for entry in (value if isinstance(value, list) else [value]):
+                entries.append(Section.from_json(entry))
+        return cls(entries)
+
+    @classmethod
+    def coerce(cls, sections) -> 'Sections':
+        """sections_ordered（list）或舊的 sections（dict）轉換；Sections 原樣回傳"""
+        if isinstance(sections, dict):
+            return cls.from_legacy(sections)
+        if isinstance(sections, list):
+            return cls.from_json(sections)
+        return sections if sections is not None else cls()
+
+    def to_json(self) -> list[dict]:
+        """sections_ordered 格式"""
+        return [e.to_json() for e in self.entries]
+
+    def to_legacy(self) -> dict:
+        """sections 格式（同名 section 以 list 保存，與 fetch_schools_v2 相同）"""
+        result = {}
+        for entry in self.entries:
+            value = entry.to_json()
+            existing = result.get(entry.label)
+            if existing is None:
+                result[entry.label] = value
+            elif isinstance(existing, list):
+                existing.append(value)
+            else:
+                result[entry.label] = [existing, value]
+        return result
+
+
+# ── 共用：dict ↔ dataclass ───────────────────────────────────
+
+class _JsonRecord:
+    """from_dict / to_dict：子類別宣告欄位，JSON 沒有的欄位為 ABSENT，未知欄位放 extra"""
+
+    __slots__ = ()
+    _FIELDS: tuple[str, ...] = ()
+    _INTERNED: frozenset[str] = frozenset()
+
+    @classmethod
+    def _known(cls) -> tuple[str, ...]:
+        return tuple(f.name for f in fields(cls) if f.name != 'extra')
+
+    @classmethod
+    def _from_dict(cls, data: dict, **special):
+        values = {}
+        for name in cls._FIELDS:
+            if name in special:
+                continue
+            value = data.get(name, ABSENT)
+            if name in cls._INTERNED and value.__class__ is str:
+                value = _intern(value)
+            values[name] = value
+        extra = {k: v for k, v in data.items() if k not in cls._FIELD_SET} or None
+        return cls(**values, **special, extra=extra)
+
+    def _to_dict(self, **special) -> dict:
+        result = {}
+        for name in self._FIELDS:
+            if name in special:
+                result.update(special[name])
+                continue
+            value = getattr(self, name)
+            if value is not ABSENT:
+                result[name] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+def _json_record(cls):
+    """class decorator：在 dataclass 建立後記錄欄位順序"""
+    cls._FIELDS = cls._known()
+    cls._FIELD_SET = frozenset(cls._FIELDS) | cls._DERIVED
+    return cls
+
+
+# ── 學校 ─────────────────────────────────────────────────────
+
+@_json_record
+@dataclass(slots=True, eq=True)
+class ListRow(_JsonRecord):
+    """列表頁一列"""
+    id: str
+    name_zh: str = ABSENT
+    country: str = ABSENT
+    url: str = ABSENT
+    semester: int = ABSENT
+    contract_quota: int | None = ABSENT
+    selection_quota: int | None = ABSENT
+    selection_count: int | None = ABSENT
+    is_updated: bool = ABSENT
+    extra: dict | None = None
+
+    _INTERNED = frozenset({'country'})
+    _DERIVED = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ListRow':
+        return cls._from_dict(data)
+
+    def to_dict(self) -> dict:
+        return self._to_dict()
+
+
+@_json_record
+@dataclass(slots=True, eq=True)
+class School(_JsonRecord):
+    """列表頁 + 詳細頁（raw_schools_v2*.json 的一筆）"""
+    id: str
+    name_zh: str = ABSENT
+    country: str = ABSENT
+    url: str = ABSENT
+    semester: int = ABSENT
+    contract_quota: int | None = ABSENT
+    selection_quota: int | None = ABSENT
+    selection_count: int | None = ABSENT
+    is_updated: bool = ABSENT
+    name_zh_detail: str = ABSENT
+    name_en: str = ABSENT
+    sections: Sections | None = ABSENT
+    language_group: str = ABSENT
+    gpa_min: float | None = ABSENT
+    toefl_ibt: int | None = ABSENT
+    ielts: float | None = ABSENT
+    toeic: int | None = ABSENT
+    gept: str | None = ABSENT
+    language_cefr: str | None = ABSENT
+    jlpt: str | None = ABSENT
+    language_requirements: dict = ABSENT      # 組別 → 條件（language_requirements.to_json）
+    quota: int | None = ABSENT
+    semesters: str = ABSENT
+    no_fail_required: bool = ABSENT
+    grade_requirement: str | None = ABSENT
+    restricted_colleges: str = ABSENT
+    second_exchange_eligible: bool = ABSENT
+    eligibility_text: str = ABSENT
+    quota_text: str = ABSENT
+    calendar_text: str = ABSENT
+    notes_text: str = ABSENT
+    housing_text: str = ABSENT
+    latitude: float | None = ABSENT
+    longitude: float | None = ABSENT
+    extra: dict | None = None
+
+    _INTERNED = frozenset({'country', 'language_group', 'semesters', 'gept', 'language_cefr', 'jlpt'})
+    # JSON 的 sections / sections_ordered 都由 Sections 產生
+    _DERIVED = frozenset({'sections_ordered'})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'School':
+        if 'sections_ordered' in data:
+            sections = Sections.from_json(data['sections_ordered'])
+        elif 'sections' in data:
+            sections = Sections.from_legacy(data['sections'])
+        else:
+            sections = ABSENT
+        return cls._from_dict(data, sections=sections)
+
+    def to_dict(self) -> dict:
+        if self.sections is ABSENT:
+            return self._to_dict(sections={})
+        return self._to_dict(sections={
+            'sections': self.sections.to_legacy(),
+            'sections_ordered': self.sections.to_json(),
+        })
+
+    def update(self, values: dict):
+        """合併 _extract_common_fields 等回傳的 dict（未知欄位放 extra）"""
+        for key, value in values.items():
+            if key in self._FIELD_SET and key != 'sections_ordered':
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+
+def load_schools(path) -> list[School]:
+    with open(path, encoding='utf-8') as f:
+        return [School.from_dict(d) for d in json.load(f)]
+
+
+def dump_schools(schools: list[School], path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([s.to_dict() for s in schools], f, ensure_ascii=False, indent=2)
+
+
+# ── 心得 ─────────────────────────────────────────────────────
+
+@dataclass(slots=True, frozen=True)
+class PdfLink:
+    url: str
+    text: str
+
+
+@dataclass(slots=True, frozen=True)
+class ImageLink:
+    url: str
+    alt: str
+
+
+@_json_record
+@dataclass(slots=True, eq=True)
+class ExperienceEntry(_JsonRecord):
+    """experiences_data.json 的一位學生；詳細頁抓取失敗時沒有 pdf_links / image_links"""
+    year_info: str = ABSENT
+    country: str = ABSENT
+    school: str = ABSENT
+    college: str = ABSENT
+    department: str = ABSENT
+    degree: str = ABSENT
+    name: str = ABSENT
+    detail_url: str = ABSENT
+    pdf_links: tuple[PdfLink, ...] = ABSENT
+    image_links: tuple[ImageLink, ...] = ABSENT
+    extra: dict | None = None
+
+    _INTERNED = frozenset({'year_info', 'country', 'school', 'college', 'department', 'degree'})
+    _DERIVED = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ExperienceEntry':
+        pdfs = data.get('pdf_links', ABSENT)
+        images = data.get('image_links', ABSENT)
+        return cls._from_dict(
+            data,
+            pdf_links=ABSENT if pdfs is ABSENT else tuple(PdfLink(p['url'], p.get('text', '')) for p in pdfs),
+            image_links=ABSENT if images is ABSENT else tuple(ImageLink(i['url'], i.get('alt', '')) for i in images),
+        )
+
+    def to_dict(self) -> dict:
+        special = {'pdf_links': {}, 'image_links': {}}
+        if self.pdf_links is not ABSENT:
+            special['pdf_links'] = {'pdf_links': [{'url': p.url, 'text': p.text} for p in self.pdf_links]}
+        if self.image_links is not ABSENT:
+            special['image_links'] = {'image_links': [{'url': i.url, 'alt': i.alt} for i in self.image_links]}
+        return self._to_dict(**special)
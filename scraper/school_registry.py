@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+跨學期去重的學校資料庫（school_registry.json）
+
+raw_schools_v2.json、raw_schools_v2_sem{N}.json、school_map*.csv 都是同一批學校（以 sn / id 為 key）的重複副本。
+這裡把資料拆成三層，每份資料只存一次：
+
+  schools   : id → 不隨學期改變的屬性（校名、國家、英文名、座標）
+  content   : sections hash → 詳細頁內容（sections_ordered）與由它萃取出的欄位（gpa_min、toefl_ibt…）
+              內容相同的學期 / 學年共用同一份，不必重新解析
+  semesters : '學年-學期'（如 '114-2'）→ id → 該學期的事實（url、名額、is_updated、對應的 sections hash）
+              不同學年的同一學期各存一份，重新匯入不會蓋掉前一年的名額
+
+OIA 的資料本身沒有學年，匯入時以爬取日期換算民國學年（8 月起算新學年）；build 用各檔案的修改時間。
+semester_view(N) 再把三層 join 回 fetch_schools_v2.py 輸出的 raw_schools_v2_sem{N}.json 格式（預設最新學年）。
+
+用法:
+  python school_registry.py build                       # 匯入現有 JSON / CSV，輸出 school_registry.json
+  python school_registry.py view --semester 2 -o out.json
+  python school_registry.py view --semester 2 --year 113
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+import profiling
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+REGISTRY_FILE = BASE_DIR / 'school_registry.json'
+
+# 不隨學期改變的屬性
+SCHOOL_FIELDS = ['name_zh', 'country', 'name_en', 'name_zh_detail', 'latitude', 'longitude']
+# 每學期不同的列表頁資訊
+SEMESTER_FIELDS = ['url', 'semester', 'contract_quota', 'selection_quota', 'selection_count', 'is_updated']
+SECTION_FIELDS = ['sections', 'sections_ordered']
+
+
+def sections_hash(content: dict) -> str:
+    """詳細頁內容（sections_ordered + 萃取欄位）的 hash"""
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def sections_dict(sections_ordered: list) -> dict:
+    """由 sections_ordered 重建 sections（同名 section 以 list 保存，與 fetch_schools_v2 相同）"""
+    result = {}
+    for entry in sections_ordered:
+        label = entry['label']
+        if label not in result:
+            result[label] = entry
+        elif isinstance(result[label], list):
+            result[label].append(entry)
+        else:
+            result[label] = [result[label], entry]
+    return result
+
+
+def semester_of(school: dict) -> int | None:
+    if school.get('semester'):
+        return int(school['semester'])
+    m = re.search(r'/semester/(\d+)', school.get('url', ''))
+    return int(m.group(1)) if m else None
+
+
+def academic_year(when: date | None = None) -> int:
+    """民國學年：8 月起為新學年（2026-03 → 114，2026-09 → 115）"""
+    when = when or date.today()
+    return when.year - 1911 - (when.month < 8)
+
+
+def term_key(year: int, semester: int) -> str:
+    return f'{year}-{semester}'
+
+
+def _split_term(key: str) -> tuple[int, int]:
+    year, _, semester = key.partition('-')
+    return int(year), int(semester)
+
+
+class SchoolRegistry:
+    def __init__(self, schools=None, content=None, semesters=None):
+        self.schools: dict[str, dict] = schools or {}
+        self.content: dict[str, dict] = content or {}
+        self.semesters: dict[str, dict[str, dict]] = semesters or {}
+
+    # ── 匯入 ─────────────────────────────────────────────
+
+    def ingest(self, records: list[dict], semester: int | None = None, year: int | None = None) -> dict:
+        """
+        匯入 fetch_schools_v2.py 的輸出（列表頁或含詳細頁皆可）；year 預設為今天的學年
+        回傳統計：新學校數、新內容數、共用既有內容數
+        """
+        year = year or academic_year()
+        stats = {'schools': 0, 'new_content': 0, 'shared_content': 0}
+        for record in records:
+            school_id = str(record['id'])
+            term = term_key(year, semester or semester_of(record))
+
+            attrs = self.schools.get(school_id)
+            if attrs is None:
+                attrs = self.schools[school_id] = {}
+                stats['schools'] += 1
+            for field in SCHOOL_FIELDS:
+                if record.get(field) not in (None, ''):
+                    attrs[field] = record[field]
+
+            facts = self.semesters.setdefault(term, {}).setdefault(school_id, {})
+            for field in SEMESTER_FIELDS:
+                if field in record:
+                    facts[field] = record[field]
+
+            if 'sections_ordered' in record:
+                fields = {k: v for k, v in record.items()
+                          if k not in SCHOOL_FIELDS and k not in SEMESTER_FIELDS
+                          and k not in SECTION_FIELDS and k != 'id'}
+                content = {'sections_ordered': record['sections_ordered'], 'fields': fields}
+                digest = sections_hash(content)
+                if digest in self.content:
+                    stats['shared_content'] += 1
+                else:
+                    self.content[digest] = content
+                    stats['new_content'] += 1
+                facts['sections_hash'] = digest
+        return stats
+
+    def ingest_coordinates(self, cache: dict[str, list]) -> int:
+        """匯入 coordinates_cache.json（key: 'name_en|country'），回傳補上座標的學校數"""
+        added = 0
+        for attrs in self.schools.values():
+            if attrs.get('latitude') is not None:
+                continue
+            coords = cache.get(f"{attrs.get('name_en', '')}|{attrs.get('country', '')}")
+            if coords:
+                attrs['latitude'], attrs['longitude'] = coords
+                added += 1
+        return added
+
+    def ingest_school_map(self, path) -> int:
+        """匯入 school_map.csv 的英文名與座標（只補缺少的欄位）"""
+        added = 0
+        with open(path, encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                attrs = self.schools.get(row['id'])
+                if attrs is None:
+                    continue
+                if not attrs.get('name_en') and row.get('name_en'):
+                    attrs['name_en'] = row['name_en']
+                if attrs.get('latitude') is None and row.get('latitude') and row.get('longitude'):
+                    attrs['latitude'], attrs['longitude'] = float(row['latitude']), float(row['longitude'])
+                    added += 1
+        return added
+
+    # ── 查詢 ─────────────────────────────────────────────
+
+    def latest_year(self, semester: int) -> int | None:
+        """有這個學期資料的最新學年"""
+        years = [y for y, s in map(_split_term, self.semesters) if s == semester]
+        return max(years) if years else None
+
+    def get(self, school_id, semester: int, with_coordinates: bool = False, year: int | None = None) -> dict | None:
+        """單一學校在某學年某學期的完整資料（與 raw_schools_v2_sem{N}.json 的一筆相同）；year 預設最新學年"""
+        school_id = str(school_id)
+        year = year or self.latest_year(semester)
+        facts = self.semesters.get(term_key(year, semester), {}).get(school_id)
+        if facts is None:
+            return None
+        attrs = self.schools[school_id]
+
+        record = {'id': school_id, 'name_zh': attrs.get('name_zh'), 'country': attrs.get('country')}
+        record.update({k: v for k, v in facts.items() if k != 'sections_hash'})
+        content = self.content.get(facts.get('sections_hash'))
+        if content:
+            record['name_zh_detail'] = attrs.get('name_zh_detail', '')
+            record['name_en'] = attrs.get('name_en', '')
+            record['sections'] = sections_dict(content['sections_ordered'])
+            record['sections_ordered'] = content['sections_ordered']
+            record.update(content['fields'])
+        if with_coordinates:
+            record['latitude'] = attrs.get('latitude')
+            record['longitude'] = attrs.get('longitude')
+        return record
+
+    def semester_view(self, semester: int, with_coordinates: bool = False, year: int | None = None) -> list[dict]:
+        """某學年某學期所有學校（依匯入順序）；year 預設最新學年"""
+        year = year or self.latest_year(semester)
+        return [self.get(school_id, semester, with_coordinates, year)
+                for school_id in self.semesters.get(term_key(year, semester), {})]
+
+    def history(self, school_id) -> dict[str, dict]:
+        """學校在各學年學期的事實（'學年-學期' → facts，依時間排序）"""
+        school_id = str(school_id)
+        return {term: self.semesters[term][school_id]
+                for term in sorted(self.semesters, key=_split_term) if school_id in self.semesters[term]}
+
+    def missing_coordinates(self) -> list[str]:
+        """尚未有座標的學校（只需對這些學校做地理編碼）"""
+        return [i for i, attrs in self.schools.items() if attrs.get('latitude') is None]
+
+    # ── 存檔 ─────────────────────────────────────────────
+
+    def to_json(self) -> dict:
+        return {'schools': self.schools, 'content': self.content, 'semesters': self.semesters}
+
+    def save(self, path=REGISTRY_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path=REGISTRY_FILE) -> 'SchoolRegistry':
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if any('-' not in term for term in data['semesters']):
+            raise SystemExit(f"{path} 是沒有學年的舊格式，請重新執行 python school_registry.py build")
+        return cls(data['schools'], data['content'], data['semesters'])
+
+
+def build(output=REGISTRY_FILE) -> SchoolRegistry:
+    """匯入 scraper/ 目錄下現有的 v2 JSON、座標快取與 school_map.csv"""
+    registry = SchoolRegistry()
+    sources = [BASE_DIR / 'raw_schools_v2.json'] + sorted(BASE_DIR.glob('raw_schools_v2_sem*.json'))
+    input_bytes = 0
+    for path in sources:
+        if not path.exists() or path.name.endswith('_list_only.json'):
+            continue
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)
+        year = academic_year(datetime.fromtimestamp(path.stat().st_mtime).date())
+        stats = registry.ingest(records, year=year)
+        input_bytes += path.stat().st_size
+        logger.info(f"{path.name}（{year} 學年）: {len(records)} 筆，新學校 {stats['schools']}，"
+                    f"新內容 {stats['new_content']}，共用內容 {stats['shared_content']}")
+
+    cache_file = BASE_DIR / 'coordinates_cache.json'
+    if cache_file.exists():
+        with open(cache_file, encoding='utf-8') as f:
+            logger.info(f"座標快取補上 {registry.ingest_coordinates(json.load(f))} 間")
+    school_map = BASE_DIR / 'school_map.csv'
+    if school_map.exists():
+        logger.info(f"school_map.csv 補上 {registry.ingest_school_map(school_map)} 間")
+
+    registry.save(output)
+    logger.info(f"學校 {len(registry.schools)} 間，內容 {len(registry.content)} 份，"
+                f"學期 {sorted(registry.semesters)}，缺座標 {len(registry.missing_coordinates())} 間")
+    logger.info(f"輸入 {input_bytes / 1024:.0f} KB → {Path(output).stat().st_size / 1024:.0f} KB ({output})")
+    return registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='跨學期學校資料庫')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help='由現有 JSON / CSV 建立 school_registry.json')
+    view = sub.add_parser('view', help='輸出某學期的 raw_schools_v2_sem{N}.json 格式')
+    view.add_argument('--semester', type=int, required=True)
+    view.add_argument('--year', type=int, help='民國學年（預設為有資料的最新學年）')
+    view.add_argument('--coordinates', action='store_true', help='附上座標')
+    view.add_argument('-o', '--output', help='輸出檔案（預設印出筆數）')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build()
+        return
+
+    registry = SchoolRegistry.load()
+    year = args.year or registry.latest_year(args.semester)
+    records = registry.semester_view(args.semester, with_coordinates=args.coordinates, year=year)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    logger.info(f"{year} 學年第 {args.semester} 學期: {len(records)} 間學校")
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+每次爬取的歷史快照（snapshots/sem{N}/）
+
+fetch_schools_v2.py 每次輸出都會覆蓋 raw_schools_v2_sem{N}.json，舊資料就不見了。
+這裡把每次爬取記成「相對上一次的差異」（以 sn 為單位、逐欄位），可以：
+  - 還原任一時間點的完整資料（at）
+  - 查某間學校某個欄位的變動歷史（history，例如 toefl_ibt 何時改過）
+
+目錄結構:
+  base.json.gz   第一次記錄時的完整資料（sections 由 sections_ordered 重建，不另存）
+  deltas.jsonl   之後每次爬取一行：{seq, taken_at, added, removed, changed, unset, order}
+  index.json     每行 delta 的 byte offset，以及 sn → 欄位 → 有變動的 seq（查歷史時直接 seek）
+
+資料沒變的晚上只多一行約 60 bytes 的 delta，一年份的每晚爬取仍在數 MB 以內。
+
+用法:
+  python snapshot_store.py record raw_schools_v2_sem2.json --semester 2
+  python snapshot_store.py at --semester 2 --time 2026-03-01 -o sem2_0301.json
+  python snapshot_store.py history --semester 2 --id 1075 --field toefl_ibt
+  python snapshot_store.py stats --semester 2
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import profiling
+from school_registry import sections_dict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+
+# 可由其他欄位重建、不存進快照的欄位
+DERIVED_FIELDS = ['sections']
+
+_MISSING = object()
+
+
+def _strip(record: dict) -> dict:
+    return {k: v for k, v in record.items() if k not in DERIVED_FIELDS}
+
+
+def _restore(record: dict) -> dict:
+    if 'sections_ordered' in record:
+        record['sections'] = sections_dict(record['sections_ordered'])
+    return record
+
+
+def _parse_time(value: str) -> datetime:
+    """ISO 時間；只有日期（2026-03-01）時視為當天結束，當天所有快照都算在內"""
+    parsed = datetime.fromisoformat(value)
+    if 'T' not in value and ' ' not in value.strip():
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+
+def _atomic_write(path: Path, data: bytes):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def diff_states(old: dict[str, dict], new: dict[str, dict]) -> dict:
+    """
+    兩份 {sn: record} 的逐欄位差異
+    回傳 {added: {sn: record}, removed: [sn], changed: {sn: {field: value}}, unset: {sn: [field]}}
+    """
+    added = {sn: record for sn, record in new.items() if sn not in old}
+    removed = [sn for sn in old if sn not in new]
+    changed, unset = {}, {}
+    for sn, record in new.items():
+        before = old.get(sn)
+        if before is None:
+            continue
+        fields = {k: v for k, v in record.items() if before.get(k, _MISSING) != v}
+        if fields:
+            changed[sn] = fields
+        dropped = [k for k in before if k not in record]
+        if dropped:
+            unset[sn] = dropped
+    return {'added': added, 'removed': removed, 'changed': changed, 'unset': unset}
+
+
+def apply_delta(state: dict[str, dict], delta: dict):
+    """把一行 delta 套用到 {sn: record}（就地修改）"""
+    for sn in delta.get('removed', []):
+        state.pop(sn, None)
+    for sn, record in delta.get('added', {}).items():
+        state[sn] = dict(record)
+    for sn, fields in delta.get('changed', {}).items():
+        state[sn].update(fields)
+    for sn, fields in delta.get('unset', {}).items():
+        for field in fields:
+            state[sn].pop(field, None)
+    if 'order' in delta:
+        ordered = {sn: state[sn] for sn in delta['order']}
+        state.clear()
+        state.update(ordered)
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.base_path = self.root / 'base.json.gz'
+        self.deltas_path = self.root / 'deltas.jsonl'
+        self.index_path = self.root / 'index.json'
+        self.index = self._load_index()
+
+    @classmethod
+    def for_semester(cls, semester: int, root=SNAPSHOT_DIR) -> 'SnapshotStore':
+        return cls(Path(root) / f'sem{semester}')
+
+    def _load_index(self) -> dict:
+        if self.index_path.exists():
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'base_taken_at': None, 'snapshots': [], 'fields': {}}
+
+    def _save_index(self):
+        data = json.dumps(self.index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        _atomic_write(self.index_path, data)
+
+    # ── 讀取 ─────────────────────────────────────────────
+
+    def _load_base(self) -> dict[str, dict]:
+        with gzip.open(self.base_path, 'rt', encoding='utf-8') as f:
+            return {str(r['id']): r for r in json.load(f)}
+
+    def _read_delta(self, f, seq: int) -> dict:
+        offset = self.index['snapshots'][seq - 1]['offset']
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def _state_at(self, seq: int) -> dict[str, dict]:
+        """第 seq 次爬取後的 {sn: record}（seq=0 為 base）"""
+        state = self._load_base()
+        if seq and self.deltas_path.exists():
+            with open(self.deltas_path, 'rb') as f:
+                for line_no, line in enumerate(f, 1):
+                    if line_no > seq:
+                        break
+                    apply_delta(state, json.loads(line))
+        return state
+
+    def timeline(self) -> list[str]:
+        """所有快照時間（base 在最前）"""
+        if self.index['base_taken_at'] is None:
+            return []
+        return [self.index['base_taken_at']] + [s['taken_at'] for s in self.index['snapshots']]
+
+    def _seq_at(self, when: str) -> int | None:
+        """when 當下（含）最新一次快照的 seq；早於第一次快照回傳 None"""
+        when = _parse_time(when)
+        seq = None
+        for i, taken_at in enumerate(self.timeline()):
+            if datetime.fromisoformat(taken_at) <= when:
+                seq = i
+        return seq
+
+    def at(self, when: str | None = None) -> list[dict]:
+        """還原某時間點的完整資料（與 raw_schools_v2_sem{N}.json 格式相同）；when 省略為最新"""
+        if self.index['base_taken_at'] is None:
+            return []
+        seq = len(self.index['snapshots']) if when is None else self._seq_at(when)
+        if seq is None:
+            return []
+        return [_restore(record) for record in self._state_at(seq).values()]
+
+    def history(self, school_id, field: str) -> list[tuple[str, object]]:
+        """
+        某間學校某欄位的變動歷史：[(taken_at, value), ...]
+        只讀 base 與索引指到的 delta 行；學校被移除時 value 為 None
+        """
+        school_id = str(school_id)
+        if self.index['base_taken_at'] is None:
+            return []
+        base = self._load_base().get(school_id)
+        result = []
+        if base is not None:
+            result.append((self.index['base_taken_at'], base.get(field)))
+
+        seqs = self.index['fields'].get(school_id, {}).get(field, [])
+        if seqs:
+            with open(self.deltas_path, 'rb') as f:
+                for seq in seqs:
+                    delta = self._read_delta(f, seq)
+                    if school_id in delta.get('added', {}):
+                        value = delta['added'][school_id].get(field)
+                    elif school_id in delta.get('changed', {}) and field in delta['changed'][school_id]:
+                        value = delta['changed'][school_id][field]
+                    else:
+                        value = None   # removed / unset
+                    result.append((delta['taken_at'], value))
+        return result
+
+    # ── 寫入 ─────────────────────────────────────────────
+
+    def record(self, records: list[dict], taken_at: str | None = None) -> dict:
+        """
+        記錄一次爬取結果
+        第一次寫 base；之後與目前最新狀態比較，只附加差異
+        """
+        taken_at = taken_at or datetime.now().isoformat(timespec='microseconds')
+        self.root.mkdir(parents=True, exist_ok=True)
+        new = {str(r['id']): _strip(r) for r in records}
+
+        if self.index['base_taken_at'] is None:
+            payload = json.dumps(list(new.values()), ensure_ascii=False, separators=(',', ':'))
+            _atomic_write(self.base_path, gzip.compress(payload.encode('utf-8')))
+            self.index = {'base_taken_at': taken_at, 'snapshots': [], 'fields': {}}
+            self._save_index()
+            return {'seq': 0, 'added': len(new), 'removed': 0, 'changed_fields': 0}
+
+        # 時間必須遞增（at / history 依時間找 delta）；同一秒內連續爬取或時鐘倒退時往後挪 1 µs，不中斷爬蟲
+        last = datetime.fromisoformat(self.timeline()[-1])
+        if datetime.fromisoformat(taken_at) <= last:
+            adjusted = (last + timedelta(microseconds=1)).isoformat(timespec='microseconds')
+            logger.warning(f"快照時間 {taken_at} 不晚於上一次 {last.isoformat()}，改記為 {adjusted}")
+            taken_at = adjusted
+
+        old = self._state_at(len(self.index['snapshots']))
+        delta = diff_states(old, new)
+        seq = len(self.index['snapshots']) + 1
+        line = {'seq': seq, 'taken_at': taken_at}
+        line.update({k: v for k, v in delta.items() if v})
+        if list(new) != [sn for sn in old if sn in new] + [sn for sn in new if sn not in old]:
+            line['order'] = list(new)
+
+        # 先寫 delta（append），再更新索引；中斷時多出的尾行會在下次 record 時被截掉
+        with open(self.deltas_path, 'ab') as f:
+            f.truncate(self._deltas_size())
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        fields_index = self.index['fields']
+        touched = {}
+        for sn, record in delta['added'].items():
+            touched.setdefault(sn, set()).update(record)
+        for sn in delta['removed']:
+            touched.setdefault(sn, set()).update(old[sn])
+        for sn, fields in delta['changed'].items():
+            touched.setdefault(sn, set()).update(fields)
+        for sn, fields in delta['unset'].items():
+            touched.setdefault(sn, set()).update(fields)
+        for sn, fields in touched.items():
+            for field in fields:
+                fields_index.setdefault(sn, {}).setdefault(field, []).append(seq)
+
+        self.index['snapshots'].append({'taken_at': taken_at, 'offset': offset})
+        self._save_index()
+        return {
+            'seq': seq,
+            'added': len(delta['added']),
+            'removed': len(delta['removed']),
+            'changed_fields': sum(len(f) for f in delta['changed'].values()),
+        }
+
+    def _deltas_size(self) -> int:
+        """索引記錄到的 deltas.jsonl 長度"""
+        snapshots = self.index['snapshots']
+        if not snapshots:
+            return 0
+        with open(self.deltas_path, 'rb') as f:
+            f.seek(snapshots[-1]['offset'])
+            return snapshots[-1]['offset'] + len(f.readline())
+
+    def disk_usage(self) -> int:
+        return sum(p.stat().st_size for p in (self.base_path, self.deltas_path, self.index_path) if p.exists())
+
+
+def record_snapshot(records: list[dict], semester: int) -> dict:
+    """fetch_schools_v2.py 每次輸出後呼叫"""
+    store = SnapshotStore.for_semester(semester)
+    stats = store.record(records)
+    logger.info(f"快照 #{stats['seq']}（sem{semester}）：新增 {stats['added']}，移除 {stats['removed']}，"
+                f"欄位變動 {stats['changed_fields']}，共 {store.disk_usage() / 1024:.0f} KB")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='交換學校資料歷史快照')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='記錄一次爬取結果')
+    rec.add_argument('input', help='raw_schools_v2_sem{N}.json')
+    rec.add_argument('--time', help='快照時間（ISO 格式，預設現在）')
+
+    at = sub.add_parser('at', help='還原某時間點的完整資料')
+    at.add_argument('--time', help='ISO 時間（預設最新）')
+    at.add_argument('-o', '--output', help='輸出檔案（預設印出筆數）')
+
+    hist = sub.add_parser('history', help='某間學校某欄位的變動歷史')
+    hist.add_argument('--id', required=True)
+    hist.add_argument('--field', required=True)
+
+    sub.add_parser('stats', help='快照數量與大小')
+
+    for p in (rec, at, hist, sub.choices['stats']):
+        p.add_argument('--semester', type=int, default=2)
+        p.add_argument('--root', default=SNAPSHOT_DIR, help='快照目錄')
+    args = parser.parse_args()
+
+    store = SnapshotStore.for_semester(args.semester, args.root)
+
+    if args.command == 'record':
+        with open(args.input, encoding='utf-8') as f:
+            records = json.load(f)
+        stats = store.record(records, args.time)
+        logger.info(f"快照 #{stats['seq']}：新增 {stats['added']}，移除 {stats['removed']}，"
+                    f"欄位變動 {stats['changed_fields']}")
+
+    elif args.command == 'at':
+        records = store.at(args.time)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+        logger.info(f"{args.time or '最新'}: {len(records)} 間學校")
+
+    elif args.command == 'history':
+        for taken_at, value in store.history(args.id, args.field):
+            print(f"{taken_at}  {json.dumps(value, ensure_ascii=False)}")
+
+    else:
+        times = store.timeline()
+        print(f"快照數: {len(times)}（{times[0] if times else '-'} ~ {times[-1] if times else '-'}）")
+        print(f"大小: {store.disk_usage() / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    profiling.run(main)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+多關鍵字比對器（學院、系所、語言組別、限制條件）
+
+所有關鍵字依共同字首編成一棵 trie，再轉成單一 regex：
+掃描時每個位置只沿著 trie 往下走，成本取決於關鍵字長度而非關鍵字數量，
+因此整段文字只掃一次、時間與文字長度成線性。
+同一位置以最長的關鍵字優先（「管理學院」不會被拆成「理學院」）。
+
+用法:
+  from text_matcher import ELIGIBILITY_MATCHER
+  for hit in ELIGIBILITY_MATCHER.find_all(eligibility_text):
+      hit.category, hit.label, hit.keyword, hit.start, hit.end
+"""
+
+import re
+from typing import NamedTuple
+
+# ── 詞彙表 ───────────────────────────────────────────────────
+
+# 學院標準化對照表（標準學院 → 關鍵字；含 OIA 頁面上常見的正式全名）
+COLLEGE_MAPPING = {
+    '文學院': ['文學院', '中文系', '外文系', '歷史系', '哲學系', '人類學系', '圖資系', '日文系', '戲劇系', '語言學研究所'],
+    '理學院': ['理學院', '數學系', '物理系', '化學系', '地質系', '心理系', '地理系', '大氣系'],
+    '社會科學院': ['社會科學院', '政治系', '經濟系', '社會系', '社工系', '新聞所', '國發所'],
+    '醫學院': ['醫學院', '醫學系', '牙醫系', '藥學系','護理系', '醫技系', '物治系', '職治系'],
+    '工學院': ['工學院', '土木系', '機械系', '化工系', '材料系', '工海系', '醫工系', '應力所'],
+    '生農學院': ['生農學院', '生物資源暨農學院', '農藝系', '生工系', '農化系', '森林系', '動科系', '農經系', '園藝系', '獸醫系', '生傳系', '生機系', '昆蟲系', '植微系'],
+    '管理學院': ['管理學院', '工管系', '會計系', '財金系', '國企系', '資管系', 'MBA', 'EMBA', 'GMBA'],
+    '公衛學院': ['公衛學院', '公共衛生學院', '公衛系'],
+    '電資學院': ['電資學院', '電機資訊學院', '電機系', '資工系', '光電所', '電信所', '電子所', '網媒所'],
+    '法律學院': ['法律學院', '法律系', '科法所'],
+    '生科學院': ['生科學院', '生命科學院', '生化科技學系', '生命科學系'],
+}
+
+# 語言組別（申請資格中「日語組/一般組」等）
+LANGUAGE_GROUPS = ['一般組', '日語組', '法語組', '西語組', '德語組', '葡語組', '韓語組', '中語組', '中文組', '英語組']
+
+# 限制條件的錨點關鍵字 → 代號
+RESTRICTION_KEYWORDS = {
+    '不接受': 'excluded_applicants',   # 「不接受XXX之學生申請」
+    '不及格': 'no_fail',
+    '全校': 'all_colleges',
+    '所有學院': 'all_colleges',
+}
+
+
+class Hit(NamedTuple):
+    category: str   # college / department / language_group / restriction
+    label: str      # 標準化後的值（如 '電資學院'、'日語組'、'no_fail'）
+    keyword: str    # 文字中實際出現的關鍵字
+    start: int
+    end: int
+
+
+# ── 比對器 ───────────────────────────────────────────────────
+
+def _trie_regex(words) -> str:
+    """把關鍵字集合轉成共用字首的 regex（同位置最長者優先）"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node) -> str:
+        is_end = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_end:
+            # 可以在此結束，但 greedy 會先嘗試更長的關鍵字
+            return f'(?:{body})?'
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    多分類關鍵字比對器
+    vocabulary: {category: {keyword: label}}；同一個關鍵字可以屬於多個分類
+    """
+
+    def __init__(self, vocabulary: dict[str, dict[str, str]]):
+        self._payloads: dict[str, list[tuple[str, str]]] = {}
+        for category, keywords in vocabulary.items():
+            for keyword, label in keywords.items():
+                self._payloads.setdefault(keyword, []).append((category, label))
+        self.pattern = re.compile(_trie_regex(self._payloads))
+
+    def find_all(self, text: str | None, categories=None) -> list[Hit]:
+        """回傳文字中所有關鍵字（依出現位置排序），categories 可限定分類"""
+        if not text:
+            return []
+        hits = []
+        for m in self.pattern.finditer(text):
+            keyword = m.group(0)
+            for category, label in self._payloads[keyword]:
+                if categories is None or category in categories:
+                    hits.append(Hit(category, label, keyword, m.start(), m.end()))
+        return hits
+
+    def labels(self, text: str | None, category: str) -> list[str]:
+        """某分類出現過的標準值（去重、保留首次出現順序）"""
+        return list(dict.fromkeys(h.label for h in self.find_all(text, (category,))))
+
+
+def _college_vocabulary() -> tuple[dict[str, str], dict[str, str]]:
+    """COLLEGE_MAPPING 拆成「學院名稱」與「系所」兩類"""
+    colleges, departments = {}, {}
+    for college, keywords in COLLEGE_MAPPING.items():
+        for keyword in keywords:
+            (colleges if keyword.endswith('學院') else departments)[keyword] = college
+    return colleges, departments
+
+
+_COLLEGES, _DEPARTMENTS = _college_vocabulary()
+
+# 申請資格 / 注意事項共用的比對器（模組載入時編譯一次）
+ELIGIBILITY_MATCHER = KeywordMatcher({
+    'college': _COLLEGES,
+    'department': _DEPARTMENTS,
+    'language_group': {g: g for g in LANGUAGE_GROUPS},
+    'restriction': RESTRICTION_KEYWORDS,
+})
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+申請資格等文字的正規化（萃取前先做一次，各欄位的 regex 都在正規化後的文字上比對）
+
+  1. NFKC        全形英數 / 標點轉半形（ＴＯＥＦＬ→TOEFL、８０→80、：→:、，→,），不斷行空白 / 全形空白轉空格
+  2. 空白        每行內連續空白併成一個空格；換行保留，空行與行首尾空白去掉
+  3. 同義詞      多益→TOEIC、托福→TOEFL、雅思→IELTS、日語檢定 / 日檢→JLPT、全民英語能力分級檢定→全民英檢、
+                 日文 / 法文…→日語 / 法語…（日文系、日文所等系所名稱不動）、Toefl / Ielts→大寫、TOEFL-iBT→TOEFL iBT
+
+正規化後 regex 不需要再處理全形、\s*、IGNORECASE 與各種寫法，直接比對標準寫法即可。
+records.Section.normalized 會把結果與原文存在一起，同一段文字只正規化一次。
+
+用法:
+  from text_normalizer import normalize
+  normalize('多益：８５０分')        # 'TOEIC:850分'
+"""
+
+import re
+import unicodedata
+
+from text_matcher import _trie_regex
+
+# 固定寫法 → 標準寫法（同位置較長者優先，日語能力檢定不會先被「日語」吃掉）
+SYNONYMS = {
+    '多益': 'TOEIC',
+    '托福': 'TOEFL',
+    '雅思': 'IELTS',
+    '全民英語能力分級檢定': '全民英檢',
+    '全民英語能力檢定': '全民英檢',
+    '日本語能力試驗': 'JLPT',
+    '日本語能力試験': 'JLPT',
+    '日本語能力檢定': 'JLPT',
+    '日語能力檢定': 'JLPT',
+    '日語能力測驗': 'JLPT',
+    '日文能力檢定': 'JLPT',
+    '日文檢定': 'JLPT',
+    '日語檢定': 'JLPT',
+    '日檢': 'JLPT',
+    '日本語': '日語',
+    '西班牙語組': '西語組',
+    '葡萄牙語組': '葡語組',
+    '英文組': '英語組',
+}
+
+# X文 → X語（後面接系 / 所時為系所名稱，如日文系、日文所，不轉換）
+LANGUAGES = ['日', '法', '德', '韓', '西班牙', '葡萄牙', '義大利', '俄']
+
+# 英文檢定名稱統一大寫（iBT 為固定寫法）
+TEST_NAMES = ['TOEFL', 'IELTS', 'TOEIC', 'JLPT', 'GPA', 'CEFR']
+
+
+def _canonical_words() -> dict[str, str]:
+    """
+    所有要替換的寫法 → 標準寫法
+    大小寫變體直接列出（不用 IGNORECASE，字首固定的 trie regex 掃描快得多）；
+    全小寫的寫法沒有出現過，列入的話英文段落每個 t / i / g / c 都要試一次，只收首字大寫
+    """
+    words = dict(SYNONYMS)
+    words.update({lang + '文': lang + '語' for lang in LANGUAGES})
+    for name in TEST_NAMES:
+        words[name.capitalize()] = name
+    for toefl in ('TOEFL', 'Toefl'):
+        for sep in ('', ' ', '-'):
+            for ibt in ('iBT', 'IBT', 'ibt'):
+                words[f'{toefl}{sep}{ibt}'] = 'TOEFL iBT'
+    return words
+
+
+CANONICAL_WORDS = _canonical_words()
+_CANONICAL = re.compile(_trie_regex(CANONICAL_WORDS))
+
+# NFKC 只需要處理「可能有相容分解」的字元：ASCII、CJK 標點（、。「」等）、常用漢字都不會變，
+# 其餘連續區段才交給 unicodedata（整段 NFKC 慢 3 倍以上）；不是 NFC 的文字（如 a + 組合字元）整段處理
+_COMPATIBILITY = re.compile('[^\x00-\x9f\u3001-\u3035\u3037\u303b-\u303f\u4e00-\u9fff]+')
+
+_UNTIDY = ('  ', ' \n', '\n ', '\n\n', '\t', '\r', '\x0b', '\x0c')
+
+
+def _nfkc(m: re.Match) -> str:
+    return unicodedata.normalize('NFKC', m.group(0))
+
+
+def _canonical(m: re.Match) -> str:
+    word = m.group(0)
+    if word[-1] == '文':
+        after = m.string[m.end():m.end() + 2]
+        if after[:1] in ('系', '所') or after == '學系':
+            return word
+    return CANONICAL_WORDS[word]
+
+
+def normalize(text: str | None) -> str:
+    """NFKC → 空白 → 同義詞；None / 空字串回傳空字串"""
+    if not text:
+        return ''
+    if unicodedata.is_normalized('NFC', text):
+        text = _COMPATIBILITY.sub(_nfkc, text)
+    else:
+        text = unicodedata.normalize('NFKC', text)
+    # 每行內的連續空白併成一個，去掉空行與行首尾空白（大部分文字本來就不需要）
+    if any(ws in text for ws in _UNTIDY):
+        text = '\n'.join(filter(None, (' '.join(line.split()) for line in text.split('\n'))))
+    else:
+        text = text.strip()
+    return _CANONICAL.sub(_canonical, text)
+
@@ -97,7 +97,7 @@ interface DiffReport {
     id: number;
     name_zh: string;
     changes: Record<string, FieldChange>;
-    record: Record<string, any>;
+    record?: Record<string, any>;  // diff_engine.py 的報告只有 changes
   }>;
 }
 
@@ -357,7 +357,21 @@ async function applyChanges() {
   // 新學校：用 upsert 寫入完整 record
   const newSchools = report.new_schools
     .filter(s => !ONLY_IDS || ONLY_IDS.has(s.id))
-    .map(s => ({ id: s.id, name_zh: s.name_zh, record: s.record }));
+    .map(s => ({ id: s.id, name_zh: s.name_zh, country: s.country, record: s.record }));
+
+  // scraper/diff_engine.py 產生的報告不含 country_id，依國家名稱補上
+  if (newSchools.some(s => s.record.country_id == null)) {
+    const countryMap = await buildCountryMap();
+    for (const s of newSchools) {
+      if (s.record.country_id != null) continue;
+      const countryId = countryMap.get(s.country);
+      if (!countryId) {
+        console.error(`❌ #${s.id} ${s.name_zh} 無法匹配國家: ${s.country}`);
+        process.exit(1);
+      }
+      s.record.country_id = countryId;
+    }
+  }
 
   // 既有學校：只 update 有差異的欄位
   const changedSchools = report.changed_schools